@@ -0,0 +1,107 @@
+"""
+Backtest of the forecasting tiers in retailpro.forecasting.FORECAST_TIERS, plus "auto" (the tier
+choose_forecast_tier picks per item), comparing accuracy against fit cost.
+
+Every item's last --holdout-days days are hidden, each tier forecasts them from the
+rest of the history, and the forecast is scored against what actually sold:
+MAE is the mean absolute daily error, WAPE the absolute error of the holdout total
+relative to units actually sold. Histories come from a workspace's daily_sales_rollup
+(read only) or, with --synthetic, from generated smooth, seasonal and intermittent
+items. Run from the project directory:
+
+    python benchmarks/bench_forecast_tiers.py --workspace-id 1
+    python benchmarks/bench_forecast_tiers.py --synthetic 60 --holdout-days 30
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retailpro import db, forecasting
+import numpy as np
+import pandas as pd
+
+
+def synthetic_histories(item_count, seed=7):
+    """Daily histories ending today: a third steady, a third trending with weekly seasonality, a third intermittent."""
+    generator = np.random.default_rng(seed)
+    histories = {}
+    for item_id in range(1, item_count + 1):
+        days = int(generator.integers(20, 400))
+        day_numbers = np.arange(days)
+        kind = item_id % 3
+        if kind == 0:
+            rate = np.full(days, generator.uniform(2, 8))
+        elif kind == 1:
+            rate = generator.uniform(2, 6) + day_numbers * generator.uniform(0, 0.02) + 2 * np.sin(2 * np.pi * day_numbers / 7) + 2
+        else:
+            rate = np.where(generator.random(days) < generator.uniform(0.05, 0.3), generator.uniform(1, 5), 0.0)
+        dates = pd.date_range(end=pd.Timestamp.today().normalize(), periods=days, freq='D')
+        histories[item_id] = pd.DataFrame({'ds': dates, 'y': generator.poisson(np.clip(rate, 0, None)).astype(float)})
+    return histories
+
+
+def backtest(histories, holdout_days, tiers):
+    results = {tier: {'items': 0, 'abs_error': 0.0, 'total_error': 0.0, 'actual_total': 0.0, 'seconds': 0.0, 'failed': 0}
+               for tier in tiers}
+    auto_choices = {}
+    for prepared_df in histories.values():
+        if prepared_df is None or len(prepared_df) <= holdout_days + 1:
+            continue
+        training_df = prepared_df.iloc[:-holdout_days].reset_index(drop=True)
+        actual = prepared_df['y'].to_numpy(dtype=float)[-holdout_days:]
+        for tier in tiers:
+            started = time.perf_counter()
+            try:
+                chosen_tier, daily_predictions, _ = forecasting.forecast_item_demand(
+                    training_df, tier=None if tier == "auto" else tier, horizon_days=holdout_days
+                )
+            except Exception:
+                results[tier]['failed'] += 1
+                continue
+            results[tier]['seconds'] += time.perf_counter() - started
+            if tier == "auto":
+                auto_choices[chosen_tier] = auto_choices.get(chosen_tier, 0) + 1
+            daily_predictions = np.clip(daily_predictions, 0, None)
+            results[tier]['items'] += 1
+            results[tier]['abs_error'] += np.abs(daily_predictions - actual).mean()
+            results[tier]['total_error'] += abs(daily_predictions.sum() - actual.sum())
+            results[tier]['actual_total'] += actual.sum()
+    return results, auto_choices
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--workspace-id", type=int, help="Backtest this workspace's items from the app database.")
+    source.add_argument("--synthetic", type=int, default=60, help="Number of generated items (used without --workspace-id).")
+    parser.add_argument("--holdout-days", type=int, default=forecasting.FORECAST_HORIZON_DAYS)
+    parser.add_argument("--tiers", nargs="+", default=forecasting.FORECAST_TIERS + ["auto"])
+    args = parser.parse_args(argv)
+
+    if args.workspace_id is not None:
+        with db.engine.connect() as connection:
+            histories = forecasting.load_workspace_daily_histories(connection, args.workspace_id)
+        print(f"Workspace {args.workspace_id}: {len(histories)} items with sales, holdout {args.holdout_days} days")
+    else:
+        histories = synthetic_histories(args.synthetic)
+        print(f"{len(histories)} synthetic items, holdout {args.holdout_days} days")
+
+    results, auto_choices = backtest(histories, args.holdout_days, args.tiers)
+    print(f"{'tier':<24}{'items':>7}{'MAE/day':>10}{'WAPE':>9}{'ms/item':>10}{'failed':>8}")
+    for tier in args.tiers:
+        result = results[tier]
+        if not result['items']:
+            print(f"{tier:<24}{0:>7}{'-':>10}{'-':>9}{'-':>10}{result['failed']:>8}")
+            continue
+        wape = result['total_error'] / result['actual_total'] if result['actual_total'] else 0.0
+        print(f"{tier:<24}{result['items']:>7}{result['abs_error'] / result['items']:>10.2f}{wape:>9.1%}"
+              f"{result['seconds'] * 1000 / result['items']:>10.2f}{result['failed']:>8}")
+    if auto_choices:
+        print("auto picked: " + ", ".join(f"{tier} {count}" for tier, count in sorted(auto_choices.items())))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,140 @@
+"""
+Concurrent write throughput of the SQLite engine for each profile in
+retailpro.db.DATABASE_ENGINE_PROFILES ("legacy" is the original engine configuration).
+
+Each writer thread stands in for a Streamlit session posting chat messages and
+recording sales, while reader threads poll the chat history the way the Chat page
+does. Every profile runs against its own scratch database, so the app database is
+never touched. Run from the project directory:
+
+    python benchmarks/bench_sqlite_write_concurrency.py --writers 16 --readers 8 --writes 200
+"""
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retailpro import db, models
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+
+def seed_database(session_factory):
+    session = session_factory()
+    try:
+        user = models.User(email="bench@example.com", password_hash=b"x", name="Bench")
+        session.add(user)
+        session.flush()
+        workspace = models.Workspace(name="Bench", owner_user_id=user.id, created_at=datetime.datetime.now().isoformat())
+        session.add(workspace)
+        session.flush()
+        item = models.Inventory(workspace_id=workspace.id, name="Bench item", retail_price=1.0, stock_level=10**9, is_active=True)
+        session.add(item)
+        session.commit()
+        return user.id, workspace.id, item.id
+    finally:
+        session.close()
+
+
+def run_writer(session_factory, user_id, workspace_id, item_id, writes, results):
+    committed, locked = 0, 0
+    for write_number in range(writes):
+        session = session_factory()
+        try:
+            if write_number % 2 == 0:
+                session.add(models.WorkspaceMessage(workspace_id=workspace_id, user_id=user_id, content="benchmark",
+                                                  timestamp=datetime.datetime.now().isoformat()))
+            else:
+                sale = models.Sale(workspace_id=workspace_id, recorded_by_user_id=user_id,
+                                   sale_datetime=db.format_sale_timestamp(datetime.datetime.now()), total_amount=1.0)
+                session.add(sale)
+                session.flush()
+                session.add(models.SaleItem(sale_id=sale.id, inventory_item_id=item_id, quantity_sold=1,
+                                          price_per_unit_at_sale=1.0, subtotal=1.0))
+                session.query(models.Inventory).filter_by(id=item_id).update(
+                    {models.Inventory.stock_level: models.Inventory.stock_level - 1}, synchronize_session=False)
+            session.commit()
+            committed += 1
+        except OperationalError:
+            session.rollback()
+            locked += 1
+        finally:
+            session.close()
+    results.append((committed, locked))
+
+
+def run_reader(session_factory, workspace_id, stop_event, read_counts):
+    reads = 0
+    while not stop_event.is_set():
+        session = session_factory()
+        try:
+            session.query(models.WorkspaceMessage).filter_by(workspace_id=workspace_id).order_by(
+                models.WorkspaceMessage.id.desc()).limit(100).all()
+            reads += 1
+        except OperationalError:
+            pass
+        finally:
+            session.close()
+    read_counts.append(reads)
+
+
+def benchmark_profile(profile_name, writers, readers, writes):
+    with tempfile.TemporaryDirectory() as scratch_directory:
+        database_url = f"sqlite:///{os.path.join(scratch_directory, 'bench.db')}"
+        bench_engine = db.create_database_engine(database_url, profile_name)
+        db.Base.metadata.create_all(bind=bench_engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=bench_engine)
+        user_id, workspace_id, item_id = seed_database(session_factory)
+
+        write_results, read_counts = [], []
+        stop_event = threading.Event()
+        reader_threads = [threading.Thread(target=run_reader, args=(session_factory, workspace_id, stop_event, read_counts))
+                          for _ in range(readers)]
+        writer_threads = [threading.Thread(target=run_writer, args=(session_factory, user_id, workspace_id, item_id, writes, write_results))
+                          for _ in range(writers)]
+        started_at = time.perf_counter()
+        for thread in reader_threads + writer_threads:
+            thread.start()
+        for thread in writer_threads:
+            thread.join()
+        elapsed_seconds = time.perf_counter() - started_at
+        stop_event.set()
+        for thread in reader_threads:
+            thread.join()
+        bench_engine.dispose()
+
+    committed = sum(result[0] for result in write_results)
+    locked = sum(result[1] for result in write_results)
+    return {
+        'profile': profile_name,
+        'committed': committed,
+        'locked': locked,
+        'reads': sum(read_counts),
+        'seconds': elapsed_seconds,
+        'writes_per_second': committed / elapsed_seconds if elapsed_seconds else 0.0,
+    }
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=16, help="Concurrent writer threads (sessions).")
+    parser.add_argument("--readers", type=int, default=8, help="Concurrent chat-polling reader threads.")
+    parser.add_argument("--writes", type=int, default=200, help="Write transactions per writer thread.")
+    parser.add_argument("--profiles", nargs="+", default=list(db.DATABASE_ENGINE_PROFILES))
+    args = parser.parse_args(argv)
+
+    print(f"{args.writers} writers x {args.writes} writes, {args.readers} readers")
+    print(f"{'profile':<10}{'committed':>11}{'locked':>9}{'reads':>9}{'seconds':>10}{'writes/s':>11}")
+    for profile_name in args.profiles:
+        result = benchmark_profile(profile_name, args.writers, args.readers, args.writes)
+        print(f"{result['profile']:<10}{result['committed']:>11}{result['locked']:>9}{result['reads']:>9}"
+              f"{result['seconds']:>10.2f}{result['writes_per_second']:>11.0f}")
+
+
+if __name__ == "__main__":
+    main_cli()
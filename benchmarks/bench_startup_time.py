@@ -0,0 +1,101 @@
+"""
+Cold-start cost of the app: how long a fresh Python process takes to import main,
+which of main's imports dominate (from `python -X importtime`), and the time until
+the login page has rendered (a first Streamlit script run through
+streamlit.testing's AppTest, which is what a new session or a code reload pays).
+
+Every measurement runs in a new interpreter so nothing is warm. Run from the
+project directory:
+
+    python benchmarks/bench_startup_time.py --repeats 5 --top 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LOGIN_PAGE_SCRIPT = """
+import time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file("main.py", default_timeout=120)
+app.run()
+if app.exception:
+    raise SystemExit(app.exception[0].message)
+print(time.perf_counter() - started)
+"""
+
+
+def parse_importtime(stderr_text):
+    """Returns (main's cumulative seconds, [(seconds, module)] for main's direct imports) from -X importtime output."""
+    rows = []
+    for line in stderr_text.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        indent = len(name) - len(name.lstrip(" "))
+        rows.append((indent, int(cumulative_us), name.strip()))
+    main_rows = [row for row in rows if row[2] == "main"]
+    if not main_rows:
+        raise RuntimeError("main was not imported; run from the project directory.")
+    main_indent, main_cumulative, _ = main_rows[-1]
+    main_position = rows.index(main_rows[-1])
+    # -X importtime prints a module after everything it imported, so main's children precede it.
+    children = []
+    for indent, cumulative, name in reversed(rows[:main_position]):
+        if indent <= main_indent:
+            break
+        if indent == main_indent + 2:
+            children.append((cumulative / 1e6, name))
+    return main_cumulative / 1e6, sorted(children, reverse=True)
+
+
+def measure_import(repeats):
+    import_seconds, heaviest = [], []
+    for _ in range(repeats):
+        completed = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                                   cwd=PROJECT_DIRECTORY, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f"import main failed:\n{completed.stderr[-2000:]}")
+        seconds, heaviest = parse_importtime(completed.stderr)
+        import_seconds.append(seconds)
+    return import_seconds, heaviest
+
+
+def measure_login_page(repeats):
+    render_seconds, process_seconds = [], []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        completed = subprocess.run([sys.executable, "-c", LOGIN_PAGE_SCRIPT],
+                                   cwd=PROJECT_DIRECTORY, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f"login page run failed:\n{completed.stderr[-2000:]}")
+        process_seconds.append(time.perf_counter() - started)
+        render_seconds.append(float(completed.stdout.strip().splitlines()[-1]))
+    return render_seconds, process_seconds
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=3, help="Fresh processes per measurement (the median is reported).")
+    parser.add_argument("--top", type=int, default=10, help="How many of main's heaviest imports to list.")
+    parser.add_argument("--skip-login-page", action="store_true", help="Only measure the import of main.")
+    args = parser.parse_args(argv)
+
+    import_seconds, heaviest = measure_import(args.repeats)
+    print(f"import main:            {statistics.median(import_seconds):7.3f}s median of {args.repeats}")
+    if not args.skip_login_page:
+        render_seconds, process_seconds = measure_login_page(args.repeats)
+        print(f"login page first run:   {statistics.median(render_seconds):7.3f}s median (AppTest, includes importing streamlit)")
+        print(f"process to login page:  {statistics.median(process_seconds):7.3f}s median (interpreter start to exit)")
+    print("\nHeaviest imports of main (cumulative, last run):")
+    for seconds, module_name in heaviest[:args.top]:
+        print(f"  {seconds:7.3f}s  {module_name}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,212 @@
+"""
+Maintenance commands for Retail Pro+.
+
+Run from the project directory, e.g.:
+    python manage.py backfill-rollup
+    python manage.py backfill-rollup --workspace-id 3
+    python manage.py import-sales history.csv --workspace-id 3 --user-id 1 --no-stock-adjust
+    python manage.py rebuild-search-index
+    python manage.py reencode-images
+    python manage.py gc-images --dry-run
+    python manage.py forecast --workers 4
+    python manage.py archive-chat --vacuum
+"""
+import argparse
+import sys
+
+import sqlalchemy
+
+from retailpro import config, db, forecasting, images, migrations, retention, sales, search
+from retailpro.errors import RetailProError
+from retailpro.models import Workspace
+
+
+def command_backfill_rollup(args):
+    migrations.start_database()
+    with db.engine.begin() as connection:
+        rows_written = sales.rebuild_daily_sales_rollup(connection, workspace_id=args.workspace_id)
+    scope = f"workspace {args.workspace_id}" if args.workspace_id is not None else "all workspaces"
+    print(f"Rebuilt daily_sales_rollup for {scope}: {rows_written} rows written.")
+    return 0
+
+
+def command_import_sales(args):
+    migrations.start_database()
+
+    def report_progress(stats):
+        rate = stats['sales_imported'] / stats['elapsed_seconds'] if stats['elapsed_seconds'] else 0.0
+        print(f"  chunk {stats['chunks']}: {stats['sales_imported']} sales, "
+              f"{stats['line_items_imported']} line items ({rate:,.0f} sales/s)")
+
+    try:
+        stats = sales.bulk_import_sales(
+            args.source_path, args.workspace_id, args.user_id,
+            chunk_size=args.chunk_size,
+            adjust_stock=not args.no_stock_adjust,
+            progress_callback=report_progress
+        )
+    except (RetailProError, OSError) as error:
+        print(f"Import stopped: {error}", file=sys.stderr)
+        return 1
+    print(f"Imported {stats['sales_imported']} sales ({stats['line_items_imported']} line items) "
+          f"in {stats['elapsed_seconds']:.2f}s - {stats['sales_per_second']:,.0f} sales/s.")
+    return 0
+
+
+def command_rebuild_search_index(args):
+    migrations.start_database()
+    with db.engine.begin() as connection:
+        items_indexed = search.rebuild_inventory_search_index(connection)
+    if items_indexed is None:
+        print("This database does not support the FTS5 trigram index; product search uses ILIKE.", file=sys.stderr)
+        return 1
+    print(f"Rebuilt inventory_search: {items_indexed} items indexed.")
+    return 0
+
+
+def command_gc_images(args):
+    migrations.start_database()
+    with db.engine.connect() as connection:
+        stats = images.collect_orphaned_inventory_images(
+            connection, args.directory, dry_run=args.dry_run, min_age_seconds=args.min_age_hours * 3600
+        )
+    for orphan_path in stats['orphan_paths']:
+        print(f"  {'would delete' if args.dry_run else 'deleted'} {orphan_path}")
+    action = "Would delete" if args.dry_run else "Deleted"
+    print(f"Scanned {stats['scanned']} files: {stats['orphaned']} orphaned ({stats['orphaned_bytes'] / 1024:,.0f} KiB). "
+          f"{action} {stats['orphaned'] if args.dry_run else stats['deleted']}.")
+    return 0
+
+
+def command_reencode_images(args):
+    migrations.start_database()
+    with db.engine.begin() as connection:
+        stats = images.reencode_inventory_images(connection, args.directory, dry_run=args.dry_run)
+    if args.dry_run:
+        print(f"Would re-encode {stats['converted']} images ({stats['bytes_before'] / 1024:,.0f} KiB) and write "
+              f"{stats['thumbnails_written']} missing thumbnails; {stats['missing']} referenced files are missing.")
+        return 0
+    print(f"Re-encoded {stats['converted']} images ({stats['rows_updated']} inventory rows updated): "
+          f"{stats['bytes_before'] / 1024:,.0f} KiB -> {stats['bytes_after'] / 1024:,.0f} KiB, "
+          f"{stats['thumbnails_written']} missing thumbnails written. "
+          f"{stats['missing']} missing, {stats['failed']} unreadable. Run gc-images to remove the old files.")
+    return 0 if not stats['failed'] else 1
+
+
+def command_forecast(args):
+    migrations.start_database()
+    if args.workspace_id is not None:
+        workspace_ids = [args.workspace_id]
+    else:
+        with db.engine.connect() as connection:
+            workspace_ids = connection.execute(sqlalchemy.select(Workspace.id).order_by(Workspace.id)).scalars().all()
+
+    def report_fit(item_id, tier, fit_seconds, error):
+        print(f"  item {item_id}: {fit_seconds * 1000:.1f}ms " + (f"FAILED: {error}" if error else tier))
+
+    exit_code = 0
+    for workspace_id in workspace_ids:
+        print(f"Workspace {workspace_id}:")
+        try:
+            stats = forecasting.run_batch_forecasts(workspace_id, max_workers=args.workers, force=args.force, progress_callback=report_fit)
+        except RetailProError as error:
+            print(f"  Forecasting stopped: {error}", file=sys.stderr)
+            return 1
+        fit_total = sum(stats['fit_seconds'].values())
+        print(f"  {stats['fitted']} of {stats['items']} items forecast ({stats['up_to_date']} up to date, "
+              f"{stats['insufficient_history']} with too little history, {stats['failed']} failed). "
+              f"Fit time {fit_total:.2f}s, wall time {stats['wall_seconds']:.2f}s.")
+        if stats['tiers']:
+            print("  Tiers: " + ", ".join(f"{tier} {count}" for tier, count in sorted(stats['tiers'].items())))
+        if stats['failed']:
+            exit_code = 1
+    return exit_code
+
+
+def command_archive_chat(args):
+    migrations.start_database()
+    if args.workspace_id is not None:
+        workspace_ids = [args.workspace_id]
+    else:
+        with db.engine.connect() as connection:
+            workspace_ids = connection.execute(sqlalchemy.select(Workspace.id).order_by(Workspace.id)).scalars().all()
+
+    archived_total = 0
+    for workspace_id in workspace_ids:
+        try:
+            stats = retention.archive_workspace_chat(
+                workspace_id, args.directory, batch_size=args.batch_size, dry_run=args.dry_run
+            )
+        except (RetailProError, OSError) as error:
+            print(f"Workspace {workspace_id}: archiving stopped: {error}", file=sys.stderr)
+            return 1
+        archived_total += stats['archived']
+        if stats['archived'] and args.dry_run:
+            print(f"Workspace {workspace_id}: {stats['archived']} messages would be archived.")
+        elif stats['archived']:
+            print(f"Workspace {workspace_id}: {stats['archived']} messages archived in {stats['batches']} batches to "
+                  + ", ".join(stats['archive_paths']))
+    print(f"{'Would archive' if args.dry_run else 'Archived'} {archived_total} messages from {len(workspace_ids)} workspaces.")
+    if args.vacuum and not args.dry_run:
+        if db.compact_database():
+            print("Compacted the database file.")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Retail Pro+ maintenance commands.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backfill_parser = subparsers.add_parser("backfill-rollup", help="Rebuild the daily sales rollup from raw sales.")
+    backfill_parser.add_argument("--workspace-id", type=int, default=None, help="Only rebuild this workspace.")
+    backfill_parser.set_defaults(handler=command_backfill_rollup)
+
+    import_parser = subparsers.add_parser("import-sales", help="Bulk import sales from a CSV or JSONL file.")
+    import_parser.add_argument("source_path", help="Path to a .csv or .jsonl file of sales.")
+    import_parser.add_argument("--workspace-id", type=int, required=True)
+    import_parser.add_argument("--user-id", type=int, required=True, help="Member recorded as the seller.")
+    import_parser.add_argument("--chunk-size", type=int, default=500, help="Sales written per transaction.")
+    import_parser.add_argument("--no-stock-adjust", action="store_true",
+                               help="Do not validate or decrement current stock (for historical imports).")
+    import_parser.set_defaults(handler=command_import_sales)
+
+    search_parser = subparsers.add_parser("rebuild-search-index", help="Recreate the product name search index.")
+    search_parser.set_defaults(handler=command_rebuild_search_index)
+
+    gc_parser = subparsers.add_parser("gc-images", help="Delete image files no inventory item references.")
+    gc_parser.add_argument("--dry-run", action="store_true", help="Only report the orphaned files.")
+    gc_parser.add_argument("--min-age-hours", type=float, default=1.0,
+                           help="Keep files modified more recently than this (uploads in progress).")
+    gc_parser.add_argument("--directory", default=config.INVENTORY_IMAGE_DIRECTORY)
+    gc_parser.set_defaults(handler=command_gc_images)
+
+    reencode_parser = subparsers.add_parser("reencode-images", help="Convert legacy uploads to content-addressed WebP renditions.")
+    reencode_parser.add_argument("--dry-run", action="store_true", help="Only report what would be converted.")
+    reencode_parser.add_argument("--directory", default=config.INVENTORY_IMAGE_DIRECTORY)
+    reencode_parser.set_defaults(handler=command_reencode_images)
+
+    forecast_parser = subparsers.add_parser("forecast", help="Forecast demand for every active item (run nightly).")
+    forecast_parser.add_argument("--workspace-id", type=int, default=None, help="Only forecast this workspace.")
+    forecast_parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    forecast_parser.add_argument("--force", action="store_true", help="Refit items whose stored forecast is still current.")
+    forecast_parser.set_defaults(handler=command_forecast)
+
+    archive_parser = subparsers.add_parser("archive-chat", help="Move chat messages outside each workspace's retention policy to the archive.")
+    archive_parser.add_argument("--workspace-id", type=int, default=None, help="Only archive this workspace.")
+    archive_parser.add_argument("--batch-size", type=int, default=retention.CHAT_ARCHIVE_BATCH_SIZE,
+                                help="Messages moved per transaction.")
+    archive_parser.add_argument("--dry-run", action="store_true", help="Only count the messages that would be archived.")
+    archive_parser.add_argument("--vacuum", action="store_true", help="Compact the SQLite file afterwards to return the freed space.")
+    archive_parser.add_argument("--directory", default=config.CHAT_ARCHIVE_DIRECTORY)
+    archive_parser.set_defaults(handler=command_archive_chat)
+
+    return parser
+
+
+def run(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,8 @@
+"""
+Retail Pro+ service layer.
+
+Everything here runs without Streamlit: the models and database setup (db, models, migrations),
+the services the pages call (users, accounts, workspaces, chat, inventory, sales, images), the
+read side (analytics, forecasting) and the outgoing integrations (notifications, assistant).
+Services report failures by raising the exceptions in retailpro.errors; main.py renders them.
+"""
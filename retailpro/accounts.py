@@ -0,0 +1,54 @@
+"""Sign-up: creating a user together with their default workspace and any invitations waiting for them."""
+from sqlalchemy.exc import IntegrityError as SQLAlchemyIntegrityError, SQLAlchemyError
+
+from retailpro.db import create_database_connection
+from retailpro.errors import ConflictError, DataAccessError, RetailProError, ValidationError
+from retailpro.models import User, WorkspaceMember
+from retailpro.users import hash_user_password
+from retailpro.workspaces import create_new_workspace
+
+
+def register_new_user(email, password, name):
+    """Creates the user and their default workspace and returns the new user's id."""
+    hashed_pw = hash_user_password(password)
+    if not hashed_pw:
+        raise ValidationError("Failed to register user: Password hashing failed.")
+
+    session = create_database_connection()
+    try:
+        new_user = User(email=email.lower(), password_hash=hashed_pw, name=name)
+        session.add(new_user)
+        session.commit()
+        user_id = new_user.id
+    except SQLAlchemyIntegrityError as error:
+        session.rollback()
+        raise ConflictError(f"Email '{email}' already registered.") from error
+    except SQLAlchemyError as error:
+        session.rollback()
+        raise DataAccessError(f"Failed to register user: {error}") from error
+    finally:
+        session.close()
+
+    workspace_name = f"{name.split(' ')[0]}'s Workspace" if name else f"{email.split('@')[0]}'s Workspace"
+    try:
+        create_new_workspace(workspace_name, user_id)
+    except RetailProError as error:
+        raise DataAccessError("User account created, but failed to create their default workspace. Please contact support.") from error
+    return user_id
+
+def claim_pending_invitations(email, user_id):
+    """Links invitations sent to email before the account existed to user_id. Returns how many were found."""
+    session = create_database_connection()
+    try:
+        claimed = session.query(WorkspaceMember).filter(
+            WorkspaceMember.invite_email == email.lower(),
+            WorkspaceMember.user_id == None,
+            WorkspaceMember.status == 'pending'
+        ).update({'user_id': user_id, 'status': 'pending'}, synchronize_session=False)
+        session.commit()
+        return claimed
+    except SQLAlchemyError as error:
+        session.rollback()
+        raise DataAccessError(f"Failed to link pending invitations: {error}") from error
+    finally:
+        session.close()
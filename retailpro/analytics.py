@@ -0,0 +1,277 @@
+import datetime
+
+import sqlalchemy
+from sqlalchemy import func, and_, case
+from sqlalchemy.exc import SQLAlchemyError
+
+from retailpro.cache import cached_workspace_analytics
+from retailpro.db import engine, create_database_connection, format_sale_timestamp
+from retailpro.errors import DataAccessError, ValidationError
+from retailpro.lazy import pd, np
+from retailpro.models import DailySalesRollup, Inventory, Sale
+
+
+@cached_workspace_analytics
+def get_sales_by_item(workspace_id, days_limit=30):
+    """
+    Retrieves sales performance for each item in a given period.
+    Returns a list of dictionaries with item name, units sold, and total revenue.
+    """
+    session = create_database_connection()
+    try:
+        start_date = datetime.date.today() - datetime.timedelta(days=days_limit)
+
+        sales_data = session.query(
+            Inventory.name,
+            func.sum(DailySalesRollup.units_sold).label("total_quantity_sold"),
+            func.sum(DailySalesRollup.revenue).label("total_revenue")
+        ).select_from(DailySalesRollup)\
+         .join(Inventory, Inventory.id == DailySalesRollup.inventory_item_id)\
+         .filter(DailySalesRollup.workspace_id == workspace_id)\
+         .filter(DailySalesRollup.sale_date >= start_date.isoformat())\
+         .group_by(Inventory.name)\
+         .order_by(func.sum(DailySalesRollup.units_sold).desc())\
+         .all()
+
+        return [dict(row._mapping) for row in sales_data]
+
+    except SQLAlchemyError as error:
+        raise DataAccessError(f"Error fetching item sales data: {error}") from error
+    finally:
+        session.close()
+
+def get_sales_summary_periods(today_date=None):
+    """
+    Returns the [start, end) ISO bounds for the today, this-week (ISO week, Monday start)
+    and this-year sales totals, formatted like Sale.sale_datetime so they can be compared
+    directly inside the database.
+    """
+    if today_date is None:
+        today_date = datetime.date.today()
+    start_of_week = today_date - datetime.timedelta(days=today_date.weekday())
+    periods = {
+        'today': (today_date, today_date + datetime.timedelta(days=1)),
+        'this_week': (start_of_week, start_of_week + datetime.timedelta(days=7)),
+        'this_year': (datetime.date(today_date.year, 1, 1), datetime.date(today_date.year + 1, 1, 1)),
+    }
+    return {
+        period: (format_sale_timestamp(datetime.datetime.combine(start, datetime.time.min)),
+                 format_sale_timestamp(datetime.datetime.combine(end, datetime.time.min)))
+        for period, (start, end) in periods.items()
+    }
+
+@cached_workspace_analytics
+def get_sales_summary_data(workspace_id):
+    periods = get_sales_summary_periods()
+    # The current week can start in the previous year, so scan from whichever bound is earlier.
+    window_start = min(start for start, _ in periods.values())
+    window_end = max(end for _, end in periods.values())
+
+    def period_total(period):
+        start, end = periods[period]
+        return func.coalesce(func.sum(case(
+            (and_(Sale.sale_datetime >= start, Sale.sale_datetime < end), Sale.total_amount),
+            else_=0.0
+        )), 0.0)
+
+    session = create_database_connection()
+    try:
+        totals = session.query(
+            period_total('today').label('today'),
+            period_total('this_week').label('this_week'),
+            period_total('this_year').label('this_year')
+        ).filter(
+            Sale.workspace_id == workspace_id,
+            Sale.sale_datetime >= window_start,
+            Sale.sale_datetime < window_end
+        ).one()
+        return {'today': float(totals.today), 'this_week': float(totals.this_week), 'this_year': float(totals.this_year)}
+    except SQLAlchemyError as error:
+        raise DataAccessError(f"Database error fetching sales summary for workspace {workspace_id}: {error}") from error
+    finally:
+        session.close()
+
+
+@cached_workspace_analytics
+def get_total_units_sold(workspace_id):
+    session = create_database_connection()
+    try:
+        return session.query(func.sum(DailySalesRollup.units_sold)).filter(DailySalesRollup.workspace_id == workspace_id).scalar() or 0
+    except SQLAlchemyError as error:
+        raise DataAccessError(f"DB error getting total quantity sold: {error}") from error
+    finally:
+        session.close()
+
+SALES_BUCKET_GRANULARITIES = ["Hour", "Day", "Week", "Month"]
+MAX_SALES_BUCKETS = 5000
+
+def floor_to_sales_bucket(timestamp, granularity):
+    """Rounds a timestamp down to the start of the bucket it falls in (weeks start on Monday)."""
+    timestamp = pd.Timestamp(timestamp)
+    if granularity == "Hour":
+        return timestamp.floor('h')
+    if granularity == "Day":
+        return timestamp.normalize()
+    if granularity == "Week":
+        return timestamp.normalize() - pd.Timedelta(days=timestamp.weekday())
+    if granularity == "Month":
+        return timestamp.normalize().replace(day=1)
+    raise ValidationError(f"Unsupported granularity '{granularity}'. Choose one of: {', '.join(SALES_BUCKET_GRANULARITIES)}.")
+
+@cached_workspace_analytics
+def bucket_sales_totals(workspace_id, start_datetime, end_datetime, granularity):
+    """
+    Sums Sale.total_amount into consecutive Hour/Day/Week/Month buckets covering
+    [start_datetime, end_datetime). Only sales inside the window are read (via
+    idx_sales_workspace_datetime) and the binning is done with NumPy, so the cost grows
+    with the window rather than with the workspace's full history.
+    Returns a DataFrame with a 'Sales' column indexed by bucket start. Raises ValidationError for
+    empty or too finely divided ranges.
+    """
+    first_bucket = floor_to_sales_bucket(start_datetime, granularity)
+    window_end = pd.Timestamp(end_datetime)
+    if window_end <= first_bucket:
+        raise ValidationError("The end of the range must be after its start.")
+    frequency = {"Hour": 'h', "Day": 'D', "Week": '7D', "Month": 'MS'}[granularity]
+    bucket_starts = pd.date_range(start=first_bucket, end=window_end, freq=frequency, inclusive='left', name="Period Start")
+    if len(bucket_starts) > MAX_SALES_BUCKETS:
+        raise ValidationError(f"That range would produce {len(bucket_starts)} points. Choose a coarser granularity or a shorter range.")
+
+    try:
+        query = sqlalchemy.select(Sale.sale_datetime, Sale.total_amount).where(
+            Sale.workspace_id == workspace_id,
+            Sale.sale_datetime >= format_sale_timestamp(first_bucket.to_pydatetime()),
+            Sale.sale_datetime < format_sale_timestamp(window_end.to_pydatetime())
+        )
+        with engine.connect() as conn:
+            sales_df = pd.read_sql_query(query, conn)
+    except (SQLAlchemyError, pd.errors.DatabaseError) as error:
+        raise DataAccessError(f"Database error while generating report data for workspace {workspace_id}: {error}") from error
+
+    sale_times = pd.to_datetime(sales_df['sale_datetime'], format='%Y-%m-%dT%H:%M:%S.%f', errors='coerce')
+    valid_rows = sale_times.notna().to_numpy()
+    bucket_positions = np.searchsorted(
+        bucket_starts.to_numpy(), sale_times[valid_rows].to_numpy(), side='right'
+    ) - 1
+    totals = np.bincount(
+        bucket_positions,
+        weights=sales_df['total_amount'].to_numpy(dtype=float)[valid_rows],
+        minlength=len(bucket_starts)
+    )
+    return pd.DataFrame({'Sales': totals[:len(bucket_starts)]}, index=bucket_starts)
+
+@cached_workspace_analytics
+def get_chart_sales_data(workspace_id, period):
+    """Sales of the current day (by hour), week (by weekday) or year (by month) for the report charts."""
+    periods = get_sales_summary_periods(datetime.date.today())
+    if period == "Day":
+        window_start, window_end = periods['today']
+        bucketed = bucket_sales_totals(workspace_id, window_start, window_end, "Hour")
+        return pd.DataFrame({'Sales': bucketed['Sales'].to_numpy()}, index=pd.Index(range(24), name="Hour of Day (0-23)"))
+    elif period == "Week":
+        days_of_week_labels = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+        window_start, window_end = periods['this_week']
+        bucketed = bucket_sales_totals(workspace_id, window_start, window_end, "Day")
+        ordered_week_index = pd.CategoricalIndex(days_of_week_labels, categories=days_of_week_labels, ordered=True, name="Day of Week")
+        return pd.DataFrame({'Sales': bucketed['Sales'].to_numpy()}, index=ordered_week_index)
+    elif period == "Year":
+        months_of_year_labels = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+        window_start, window_end = periods['this_year']
+        bucketed = bucket_sales_totals(workspace_id, window_start, window_end, "Month")
+        ordered_month_index = pd.CategoricalIndex(months_of_year_labels, categories=months_of_year_labels, ordered=True, name="Month")
+        return pd.DataFrame({'Sales': bucketed['Sales'].to_numpy()}, index=ordered_month_index)
+    raise ValidationError(f"Unsupported report period '{period}'.")
+
+@cached_workspace_analytics
+def get_best_sellers(workspace_id, limit=5):
+    session = create_database_connection()
+    try:
+        results = session.query(
+            Inventory.name,
+            func.sum(DailySalesRollup.units_sold).label('total_quantity_sold'),
+            Inventory.image_path,
+            Inventory.retail_price,
+            Inventory.is_active
+        ).join(DailySalesRollup, Inventory.id == DailySalesRollup.inventory_item_id)\
+         .filter(DailySalesRollup.workspace_id == workspace_id, Inventory.workspace_id == workspace_id)\
+         .group_by(Inventory.id, Inventory.name, Inventory.image_path, Inventory.retail_price, Inventory.is_active)\
+         .order_by(func.sum(DailySalesRollup.units_sold).desc())\
+         .limit(limit)\
+         .all()
+
+        return [dict(row._mapping) for row in results]
+    except SQLAlchemyError as error:
+        raise DataAccessError(f"DB error getting best selling items: {error}") from error
+    finally:
+        session.close()
+
+STOCKOUT_VELOCITY_WINDOW_DAYS = 28
+STOCKOUT_MIN_OBSERVED_DAYS = 7
+REORDER_LEAD_TIME_DAYS = 7
+REORDER_SERVICE_LEVEL_Z = 1.65
+REORDER_COVER_DAYS = 30
+STOCK_RISK_LEVELS = ["Out of Stock", "Reorder Now", "Watch", "Healthy"]
+# Fixed units-on-hand cut-off behind the Inventory page's "Low Stock" filter, which does not look at sales velocity.
+LOW_STOCK_THRESHOLD = 5
+
+@cached_workspace_analytics
+def get_stockout_risk(workspace_id):
+    """
+    Active items ranked by stockout risk. Daily sales velocity and its variance come from the last
+    STOCKOUT_VELOCITY_WINDOW_DAYS of daily_sales_rollup in one grouped query (items first sold more
+    recently are averaged over the days since their first sale, at least STOCKOUT_MIN_OBSERVED_DAYS),
+    then every item is scored in one vectorized pass:
+    reorder point = velocity x lead time + z x daily std dev x sqrt(lead time),
+    days until stockout = stock / velocity.
+    """
+    today = datetime.date.today()
+    window_start = (today - datetime.timedelta(days=STOCKOUT_VELOCITY_WINDOW_DAYS - 1)).isoformat()
+    in_window = DailySalesRollup.sale_date >= window_start
+    velocity_query = sqlalchemy.select(
+        Inventory.id, Inventory.name, Inventory.stock_level, Inventory.retail_price,
+        func.coalesce(func.sum(case((in_window, DailySalesRollup.units_sold), else_=0)), 0).label('window_units'),
+        func.coalesce(func.sum(case((in_window, DailySalesRollup.units_sold * DailySalesRollup.units_sold), else_=0)), 0).label('window_units_squared'),
+        func.min(DailySalesRollup.sale_date).label('first_sale_date')
+    ).outerjoin(DailySalesRollup, and_(
+        DailySalesRollup.inventory_item_id == Inventory.id, DailySalesRollup.workspace_id == workspace_id
+    )).where(
+        Inventory.workspace_id == workspace_id, Inventory.is_active == True
+    ).group_by(Inventory.id, Inventory.name, Inventory.stock_level, Inventory.retail_price)
+    try:
+        with engine.connect() as connection:
+            items_df = pd.read_sql_query(velocity_query, connection)
+    except (SQLAlchemyError, pd.errors.DatabaseError) as error:
+        raise DataAccessError(f"DB error computing stock risk: {error}") from error
+    if items_df.empty:
+        return []
+
+    days_selling = (pd.Timestamp(today) - pd.to_datetime(items_df['first_sale_date'])).dt.days + 1
+    observed_days = days_selling.fillna(STOCKOUT_VELOCITY_WINDOW_DAYS).clip(STOCKOUT_MIN_OBSERVED_DAYS, STOCKOUT_VELOCITY_WINDOW_DAYS).to_numpy(dtype=float)
+    velocity = items_df['window_units'].to_numpy(dtype=float) / observed_days
+    daily_variance = np.clip(items_df['window_units_squared'].to_numpy(dtype=float) / observed_days - velocity ** 2, 0, None)
+    reorder_point = np.ceil(velocity * REORDER_LEAD_TIME_DAYS + REORDER_SERVICE_LEVEL_Z * np.sqrt(daily_variance * REORDER_LEAD_TIME_DAYS))
+    stock = items_df['stock_level'].fillna(0).to_numpy(dtype=float)
+    selling = velocity > 0
+    days_until_stockout = np.divide(stock, velocity, out=np.full_like(stock, np.inf), where=selling)
+    days_until_stockout = np.where(stock <= 0, 0.0, days_until_stockout)
+    risk_level = np.select(
+        [stock <= 0, selling & (stock <= reorder_point), days_until_stockout <= 2 * REORDER_LEAD_TIME_DAYS],
+        STOCK_RISK_LEVELS[:3], default=STOCK_RISK_LEVELS[3]
+    )
+    suggested_reorder_units = np.where(selling, np.ceil(np.clip(reorder_point + velocity * REORDER_COVER_DAYS - stock, 0, None)), 0)
+
+    items_df = items_df.assign(
+        daily_velocity=velocity.round(2), reorder_point=reorder_point.astype(int),
+        days_until_stockout=days_until_stockout, risk_level=risk_level,
+        suggested_reorder_units=suggested_reorder_units.astype(int),
+        risk_rank=[STOCK_RISK_LEVELS.index(level) for level in risk_level]
+    ).sort_values(['risk_rank', 'days_until_stockout', 'name'])
+    risk_items = []
+    for row in items_df.itertuples(index=False):
+        risk_items.append({
+            'id': row.id, 'name': row.name, 'stock_level': int(row.stock_level or 0), 'retail_price': row.retail_price,
+            'daily_velocity': row.daily_velocity, 'reorder_point': row.reorder_point,
+            'days_until_stockout': None if np.isinf(row.days_until_stockout) else round(row.days_until_stockout, 1),
+            'risk_level': row.risk_level, 'suggested_reorder_units': row.suggested_reorder_units,
+        })
+    return risk_items
@@ -0,0 +1,150 @@
+from retailpro.analytics import (get_sales_summary_data, get_sales_by_item, get_best_sellers, get_stockout_risk,
+                                 STOCKOUT_VELOCITY_WINDOW_DAYS, REORDER_LEAD_TIME_DAYS)
+from retailpro.config import get_secret
+from retailpro.errors import AssistantError, ConfigurationError
+from retailpro.lazy import LazyModule
+
+genai = LazyModule("google.generativeai")
+
+ASSISTANT_MODEL_NAME = "gemini-1.5-flash-latest"
+
+def _configured_genai(api_key=None):
+    api_key = api_key or get_secret("GOOGLE_API_KEY")
+    if not api_key:
+        raise ConfigurationError("Google AI API Key not found. Please add it to your Streamlit secrets.")
+    genai.configure(api_key=api_key)
+    return genai
+
+def summarize_workspace_performance(workspace_id, workspace_name):
+    """The figures generate_ai_performance_report is given about a workspace."""
+    sales_summary = get_sales_summary_data(workspace_id)
+    stock_risk = get_stockout_risk(workspace_id)
+    best_sellers = get_best_sellers(workspace_id, limit=5)
+    total_stock_units = sum(max(item['stock_level'], 0) for item in stock_risk)
+    low_stock_items = len([item for item in stock_risk if item['risk_level'] == "Reorder Now"])
+    out_of_stock_items = len([item for item in stock_risk if item['risk_level'] == "Out of Stock"])
+    best_sellers_formatted = ", ".join([f"{item['name']} ({item['total_quantity_sold']} sold)" for item in best_sellers]) if best_sellers else "No sales data yet"
+    return {
+        "workspace_name": workspace_name, "sales_today": sales_summary.get('today', 0),
+        "sales_this_week": sales_summary.get('this_week', 0), "sales_this_year": sales_summary.get('this_year', 0),
+        "total_items": len(stock_risk), "total_stock_units": total_stock_units,
+        "low_stock_items": low_stock_items, "out_of_stock_items": out_of_stock_items,
+        "best_sellers_list": best_sellers_formatted
+    }
+
+def generate_ai_performance_report(workspace_data, api_key=None):
+    """Markdown performance report for the figures from summarize_workspace_performance."""
+    configured_genai = _configured_genai(api_key)
+    try:
+        generation_config = {
+            "temperature": 0.7,
+            "top_p": 1,
+            "top_k": 1,
+            "max_output_tokens": 2048,
+        }
+        model = configured_genai.GenerativeModel(model_name=ASSISTANT_MODEL_NAME,
+                                                 generation_config=generation_config)
+        prompt = f"""
+        Act as a friendly and insightful business analyst for a small retail business.
+        I will provide you with a summary of the business's performance data from our system.
+        Please generate a clear, concise, and encouraging performance report in Markdown format.
+
+        **Business Performance Data:**
+        - Workspace Name: {workspace_data.get('workspace_name', 'N/A')}
+        - Sales Today: ${workspace_data.get('sales_today', 0):.2f}
+        - Sales This Week: ${workspace_data.get('sales_this_week', 0):.2f}
+        - Sales This Year: ${workspace_data.get('sales_this_year', 0):.2f}
+        - Total Inventory Items: {workspace_data.get('total_items', 0)}
+        - Total Units in Stock: {workspace_data.get('total_stock_units', 0)}
+        - Number of Items at or Below Their Reorder Point (based on sales velocity): {workspace_data.get('low_stock_items', 0)}
+        - Number of Items Out of Stock: {workspace_data.get('out_of_stock_items', 0)}
+        - Best Selling Items (by quantity): {workspace_data.get('best_sellers_list', 'None')}
+
+        **Your Task:**
+        Based on the data above, please write a report with the following sections:
+
+        1.  **Executive Summary:** A brief, one-paragraph overview of the business's current performance.
+        2.  **Key Highlights (The Good News):** Use a bulleted list to point out 2-3 positive aspects (e.g., strong weekly sales, popular items). Be encouraging.
+        3.  **Areas for Attention (Opportunities):** Use a bulleted list to gently point out 2-3 areas that could be improved (e.g., items out of stock, slow sales today). Frame these as opportunities, not failures.
+        4.  **Actionable Suggestions:** Provide a short, bulleted list of 2-3 simple, concrete next steps the business owner could take. For example, 'Consider reordering your best-selling items to avoid stockouts.' or 'Run a small weekend promotion to boost daily sales.'
+
+        Keep the tone professional but easy to understand for someone who is not a data expert.
+        """
+        response = model.generate_content(prompt)
+        return response.text
+    except Exception as error:
+        raise AssistantError(f"An error occurred while generating the AI report: {str(error)}. Please check your API key and configuration.") from error
+
+def start_ai_chat_session(api_key=None):
+    """A new chat session with the analyst model, kept by the caller across questions."""
+    configured_genai = _configured_genai(api_key)
+    try:
+        model = configured_genai.GenerativeModel(model_name=ASSISTANT_MODEL_NAME)
+        return model.start_chat(history=[])
+    except Exception as error:
+        raise AssistantError(f"Failed to initialize AI chat session: {error}") from error
+
+def build_business_context(workspace_id, workspace_name):
+    """Markdown snapshot of a workspace's sales and stock that the analyst answers questions from."""
+    sales_summary = get_sales_summary_data(workspace_id)
+    item_sales_data = get_sales_by_item(workspace_id, days_limit=30)
+    stock_risk = get_stockout_risk(workspace_id)
+
+    context_lines = []
+    context_lines.append(f"Here is a snapshot of the business data for '{workspace_name}':")
+
+    context_lines.append("\n### Overall Sales Summary (All Time)")
+    context_lines.append(f"- Sales Today: ${sales_summary.get('today', 0):.2f}")
+    context_lines.append(f"- Sales This Week: ${sales_summary.get('this_week', 0):.2f}")
+    context_lines.append(f"- Sales This Year: ${sales_summary.get('this_year', 0):.2f}")
+
+    context_lines.append("\n### Top 5 Best-Selling Products (Last 30 Days)")
+    if item_sales_data:
+        for d in item_sales_data[:5]:
+            context_lines.append(f"- **{d['name']}**: {d['total_quantity_sold']} units sold, generating ${d['total_revenue']:.2f}")
+    else:
+        context_lines.append("- No sales recorded in the last 30 days.")
+
+    out_of_stock_items = [item['name'] for item in stock_risk if item['risk_level'] == "Out of Stock"]
+    at_risk_items = [item for item in stock_risk if item['risk_level'] in ("Reorder Now", "Watch")]
+    sold_item_names = {d['name'] for d in item_sales_data}
+    unsold_items = [item['name'] for item in stock_risk if item['name'] not in sold_item_names]
+
+    context_lines.append("\n### Stock Alert")
+    context_lines.append(f"- **Out of Stock Items:** {', '.join(out_of_stock_items) if out_of_stock_items else 'None'}")
+    context_lines.append(f"\n### Stockout Risk (ranked, based on the last {STOCKOUT_VELOCITY_WINDOW_DAYS} days of sales and a {REORDER_LEAD_TIME_DAYS}-day restock lead time)")
+    if at_risk_items:
+        for item in at_risk_items[:10]:
+            context_lines.append(
+                f"- **{item['name']}** ({item['risk_level']}): {item['stock_level']} in stock, selling ~{item['daily_velocity']:.1f}/day, "
+                f"~{item['days_until_stockout']:.0f} days until stockout, reorder point {item['reorder_point']}, suggested order {item['suggested_reorder_units']} units"
+            )
+    else:
+        context_lines.append("- No in-stock items are at risk of selling out soon.")
+
+    context_lines.append("\n### Slowest-Moving Products (No Sales in Last 30 Days)")
+    if unsold_items:
+        for name in unsold_items[:5]:
+            context_lines.append(f"- {name}")
+    else:
+        context_lines.append("- All active products have had recent sales.")
+
+    return "\n".join(context_lines)
+
+def ask_ai_analyst(chat_session, workspace_id, workspace_name, question):
+    """Sends question to the analyst with a fresh snapshot of the workspace's data and returns the reply text."""
+    business_context = build_business_context(workspace_id, workspace_name)
+    final_prompt = f"""
+    You are "Gem", a friendly and helpful business analyst. Your role is to analyze the provided data context to answer the user's question.
+    When you are presenting data back to the user, you MUST maintain the markdown formatting (like bullet points, newlines, and bold text) from the "Business Data Snapshot".
+    Use only the information given in the context below. Do not invent data.
+
+    **Business Data Snapshot:**
+    {business_context}
+    ---
+    **User's Question:** "{question}"
+    """
+    try:
+        return chat_session.send_message(final_prompt).text
+    except Exception as error:
+        raise AssistantError(f"The AI analyst could not answer: {error}") from error
@@ -0,0 +1,109 @@
+import copy
+import datetime
+import functools
+import threading
+import time
+
+ANALYTICS_CACHE_MAX_AGE_SECONDS = 300
+ANALYTICS_CACHE_MAX_ENTRIES_PER_WORKSPACE = 64
+
+_analytics_cache_lock = threading.Lock()
+_workspace_data_versions = {}
+_analytics_cache = {}
+
+MEMBERSHIP_CACHE_MAX_AGE_SECONDS = 30
+MEMBERSHIP_CACHE_MAX_ENTRIES = 10000
+
+_membership_cache_lock = threading.Lock()
+_membership_cache_generation = 0
+_membership_cache = {}
+
+def bump_workspace_data_version(workspace_id):
+    """Invalidates every cached analytics result for a workspace. Called by the write paths after commit."""
+    with _analytics_cache_lock:
+        _workspace_data_versions[workspace_id] = _workspace_data_versions.get(workspace_id, 0) + 1
+        _analytics_cache.pop(workspace_id, None)
+
+def invalidate_cached_workspace_analytics(workspace_id, function):
+    """Drops a workspace's cached results of one cached_workspace_analytics function, leaving the rest."""
+    with _analytics_cache_lock:
+        workspace_entries = _analytics_cache.get(workspace_id, {})
+        for cache_key in [key for key in workspace_entries if key[0] == function.__name__]:
+            del workspace_entries[cache_key]
+
+def cached_workspace_analytics(function):
+    """
+    Caches a read function's result per workspace until bump_workspace_data_version is called
+    for that workspace (or the entry is older than ANALYTICS_CACHE_MAX_AGE_SECONDS, which picks
+    up writes made by other processes). The first argument must be the workspace_id, and the
+    cached result is shared between callers, so it must not be mutated.
+    """
+    @functools.wraps(function)
+    def wrapper(workspace_id, *args, **kwargs):
+        cache_key = (function.__name__, datetime.date.today(), args, tuple(sorted(kwargs.items())))
+        now = time.monotonic()
+        with _analytics_cache_lock:
+            version = _workspace_data_versions.get(workspace_id, 0)
+            cached_entry = _analytics_cache.get(workspace_id, {}).get(cache_key)
+        if cached_entry is not None and now - cached_entry[0] < ANALYTICS_CACHE_MAX_AGE_SECONDS:
+            return cached_entry[1]
+
+        result = function(workspace_id, *args, **kwargs)
+        with _analytics_cache_lock:
+            if _workspace_data_versions.get(workspace_id, 0) == version:
+                workspace_entries = _analytics_cache.setdefault(workspace_id, {})
+                if cache_key not in workspace_entries and len(workspace_entries) >= ANALYTICS_CACHE_MAX_ENTRIES_PER_WORKSPACE:
+                    workspace_entries.pop(next(iter(workspace_entries)))
+                workspace_entries[cache_key] = (now, result)
+        return result
+    return wrapper
+
+def invalidate_membership_cache(workspace_id=None, user_id=None):
+    """
+    Drops cached access lookups after a membership, ownership or workspace name change. Passing
+    workspace_id drops every lookup about that workspace, including all cached workspace lists
+    (they carry its name and the member's role); passing user_id drops that user's lookups.
+    Called by the write paths after commit.
+    """
+    global _membership_cache_generation
+    with _membership_cache_lock:
+        _membership_cache_generation += 1
+        for cache_key in list(_membership_cache):
+            _, cached_user_id, cached_workspace_id = cache_key
+            if ((workspace_id is not None and cached_workspace_id in (workspace_id, None))
+                    or (user_id is not None and cached_user_id == user_id)):
+                del _membership_cache[cache_key]
+
+def cached_membership_lookup(cache_scope):
+    """
+    Caches a membership lookup under (user_id, workspace_id) for MEMBERSHIP_CACHE_MAX_AGE_SECONDS,
+    so the workspace lists and owner lookups repeated on every rerun skip the database. It is not
+    used for the access checks themselves (see workspaces.is_user_a_member_of_workspace). cache_scope maps the
+    call's arguments to that pair, using None for the half the lookup does not depend on. Writes
+    made here invalidate through invalidate_membership_cache; the age limit bounds how long
+    changes made by other processes go unseen. Negative answers (False, None, an empty list) are
+    never cached, so access granted by any path is seen on the next lookup. Callers get a copy
+    they may modify.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            user_id, workspace_id = cache_scope(*args, **kwargs)
+            cache_key = (function.__name__, user_id, workspace_id)
+            now = time.monotonic()
+            with _membership_cache_lock:
+                generation = _membership_cache_generation
+                cached_entry = _membership_cache.get(cache_key)
+            if cached_entry is not None and now - cached_entry[0] < MEMBERSHIP_CACHE_MAX_AGE_SECONDS:
+                return copy.deepcopy(cached_entry[1])
+
+            result = function(*args, **kwargs)
+            with _membership_cache_lock:
+                # A lookup that raced an invalidation may have read the old rows, so it is not kept.
+                if result and _membership_cache_generation == generation:
+                    if cache_key not in _membership_cache and len(_membership_cache) >= MEMBERSHIP_CACHE_MAX_ENTRIES:
+                        _membership_cache.pop(next(iter(_membership_cache)))
+                    _membership_cache[cache_key] = (now, copy.deepcopy(result))
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,74 @@
+import datetime
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from retailpro.db import create_database_connection
+from retailpro.errors import DataAccessError
+from retailpro.events import publish_workspace_event
+from retailpro.models import User, WorkspaceMessage
+
+
+def post_workspace_message(workspace_id, user_id, content):
+    """Saves a new chat message to the database."""
+    session = create_database_connection()
+    try:
+        new_message = WorkspaceMessage(
+            workspace_id=workspace_id,
+            user_id=user_id,
+            content=content,
+            timestamp=datetime.datetime.now().isoformat()
+        )
+        session.add(new_message)
+        session.commit()
+        publish_workspace_event(workspace_id, "chat")
+        return True
+    except SQLAlchemyError as error:
+        session.rollback()
+        raise DataAccessError(f"Failed to send message: {error}") from error
+    finally:
+        session.close()
+
+def get_workspace_messages(workspace_id, limit=100, after_id=None, before_id=None):
+    """
+    Retrieves messages for a workspace, oldest first, including the sender's name.
+    By default this is the latest `limit` messages. With before_id set it is the `limit` messages
+    just before that message id (to page back through older history); with after_id set it is the
+    messages newer than that id, so a caller that keeps the history it has already shown can poll
+    for just the new rows. All three are served by idx_workspace_messages_workspace_id_id.
+    """
+    session = create_database_connection()
+    try:
+        query = session.query(
+            WorkspaceMessage.id,
+            WorkspaceMessage.content,
+            WorkspaceMessage.timestamp,
+            User.name.label("user_name"),
+            User.id.label("user_id")
+        ).join(User, WorkspaceMessage.user_id == User.id)\
+         .filter(WorkspaceMessage.workspace_id == workspace_id)
+        if after_id is not None:
+            messages = query.filter(WorkspaceMessage.id > after_id)\
+                            .order_by(WorkspaceMessage.id.asc()).limit(limit).all()
+        else:
+            if before_id is not None:
+                query = query.filter(WorkspaceMessage.id < before_id)
+            messages = query.order_by(WorkspaceMessage.id.desc()).limit(limit).all()[::-1]
+        return [dict(row._mapping) for row in messages]
+    except SQLAlchemyError as error:
+        raise DataAccessError(f"Failed to retrieve messages: {error}") from error
+    finally:
+        session.close()
+
+def clear_workspace_chat(workspace_id):
+    """Deletes all messages for a specific workspace. Returns how many were deleted."""
+    session = create_database_connection()
+    try:
+        num_deleted = session.query(WorkspaceMessage).filter_by(workspace_id=workspace_id).delete(synchronize_session=False)
+        session.commit()
+        publish_workspace_event(workspace_id, "chat", "chat_cleared")
+        return num_deleted
+    except SQLAlchemyError as error:
+        session.rollback()
+        raise DataAccessError(f"An error occurred while clearing the chat: {error}") from error
+    finally:
+        session.close()
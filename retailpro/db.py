@@ -0,0 +1,135 @@
+import sqlalchemy
+from sqlalchemy import create_engine, event, REAL
+from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.dialects import postgresql
+
+from retailpro.config import DATABASE_SETTINGS, DATABASE_URL
+
+# "legacy" reproduces the original engine (SQLite defaults). "tuned" uses WAL so readers never
+# block the writer, relaxes fsyncs to once per WAL checkpoint, and waits on locks instead of
+# failing with "database is locked". Select a profile or override single values in the
+# [database] section, e.g. profile = "tuned", pool_size = 20. The pragmas only apply to SQLite;
+# other backends just use the pool settings.
+DATABASE_ENGINE_PROFILES = {
+    "legacy": {
+        "journal_mode": None,
+        "synchronous": None,
+        "busy_timeout_ms": None,
+        "cache_size_kib": None,
+        "mmap_size_bytes": None,
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 30,
+    },
+    "tuned": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout_ms": 5000,
+        "cache_size_kib": 64000,
+        "mmap_size_bytes": 256 * 1024 * 1024,
+        "pool_size": 10,
+        "max_overflow": 20,
+        "pool_timeout": 30,
+    },
+}
+
+def create_database_engine(database_url, profile_name="tuned", overrides=None):
+    """Builds the SQLAlchemy engine for a profile in DATABASE_ENGINE_PROFILES, applying its SQLite pragmas on every new connection."""
+    if profile_name not in DATABASE_ENGINE_PROFILES:
+        raise ValueError(f"Unknown database profile '{profile_name}'. Choose one of: {', '.join(DATABASE_ENGINE_PROFILES)}.")
+    settings = dict(DATABASE_ENGINE_PROFILES[profile_name])
+    settings.update({key: value for key, value in (overrides or {}).items() if key in settings})
+
+    url = sqlalchemy.engine.make_url(database_url)
+    is_sqlite = url.get_backend_name() == "sqlite"
+    # Only QueuePool takes sizing arguments; in-memory SQLite (sqlite://) uses SingletonThreadPool,
+    # which rejects them.
+    pool_arguments = {}
+    if issubclass(url.get_dialect().get_pool_class(url), sqlalchemy.pool.QueuePool):
+        pool_arguments = {key: settings[key] for key in ("pool_size", "max_overflow", "pool_timeout")}
+    new_engine = create_engine(
+        database_url,
+        connect_args={"check_same_thread": False} if is_sqlite else {},
+        pool_pre_ping=True,
+        echo=False,
+        **pool_arguments
+    )
+    if not is_sqlite:
+        return new_engine
+
+    @event.listens_for(new_engine, "connect")
+    def apply_sqlite_pragmas(dbapi_connection, connection_record):
+        pragmas = []
+        if settings["journal_mode"]: pragmas.append(f"PRAGMA journal_mode={settings['journal_mode']}")
+        if settings["synchronous"]: pragmas.append(f"PRAGMA synchronous={settings['synchronous']}")
+        if settings["busy_timeout_ms"] is not None: pragmas.append(f"PRAGMA busy_timeout={int(settings['busy_timeout_ms'])}")
+        # A negative cache_size is interpreted by SQLite as KiB rather than pages.
+        if settings["cache_size_kib"] is not None: pragmas.append(f"PRAGMA cache_size=-{int(settings['cache_size_kib'])}")
+        if settings["mmap_size_bytes"] is not None: pragmas.append(f"PRAGMA mmap_size={int(settings['mmap_size_bytes'])}")
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    return new_engine
+
+engine = create_database_engine(DATABASE_URL, DATABASE_SETTINGS.get("profile", "tuned"), DATABASE_SETTINGS)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+Base = declarative_base()
+
+# SQLAlchemy's REAL is single precision on PostgreSQL, which is too coarse for prices and totals.
+PORTABLE_REAL = REAL().with_variant(postgresql.DOUBLE_PRECISION(), "postgresql")
+
+def create_database_connection():
+    """Provides a SQLAlchemy session."""
+    return SessionLocal()
+
+def compact_database():
+    """
+    Returns the space freed by deleted rows to the filesystem. SQLite only reuses freed pages,
+    so this runs VACUUM there (it rewrites the whole file and briefly blocks writers); other
+    backends reclaim space on their own and are left alone. True when VACUUM ran.
+    """
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.exec_driver_sql("VACUUM")
+    return True
+
+def format_sale_timestamp(datetime_value):
+    """
+    Normalizes a datetime into the fixed-width ISO form stored in Sale.sale_datetime
+    (YYYY-MM-DDTHH:MM:SS.ffffff, local time). Fixed width keeps string comparisons
+    chronological so range filters can use idx_sales_workspace_datetime.
+    """
+    if datetime_value.tzinfo is not None:
+        datetime_value = datetime_value.astimezone().replace(tzinfo=None)
+    return datetime_value.isoformat(timespec='microseconds')
+
+def is_unique_violation(error, index_name, columns):
+    """
+    True when an IntegrityError came from the given unique index/constraint. PostgreSQL names
+    the constraint in its message, while SQLite lists the "table.column" pairs instead.
+    """
+    message = str(getattr(error, "orig", error)).lower()
+    if "unique constraint" not in message:
+        return False
+    return index_name.lower() in message or all(column.lower() in message for column in columns)
+
+def is_foreign_key_violation(error):
+    return "foreign key constraint" in str(getattr(error, "orig", error)).lower()
+
+def is_not_null_violation(error, column_name):
+    message = str(getattr(error, "orig", error)).lower()
+    return ("not null constraint" in message or "not-null constraint" in message) and column_name.lower() in message
+
+def row_to_dict(row):
+    """Converts a SQLAlchemy model instance into a dictionary."""
+    if row is None:
+        return None
+    d = {}
+    for column in row.__table__.columns:
+        d[column.name] = getattr(row, column.name)
+    return d
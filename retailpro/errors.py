@@ -0,0 +1,45 @@
+"""Exceptions raised by the service layer. Messages are written to be shown to the user as they are."""
+
+
+class RetailProError(Exception):
+    """Base class for every error the services raise on purpose."""
+
+
+class ConfigurationError(RetailProError):
+    """A required secret or setting is missing."""
+
+
+class DataAccessError(RetailProError):
+    """The database could not be read or written."""
+
+
+class ValidationError(RetailProError, ValueError):
+    """The input was rejected (empty names, negative prices, malformed import rows, ...)."""
+
+
+class InsufficientStockError(ValidationError):
+    """A sale asked for more units than are in stock, or for an inactive or unknown product."""
+
+
+class NotFoundError(RetailProError):
+    """The record the caller asked for does not exist (or is not visible to them)."""
+
+
+class PermissionDeniedError(RetailProError):
+    """The acting user may not perform this action in this workspace."""
+
+
+class ConflictError(RetailProError):
+    """The change clashes with existing data, e.g. a duplicate name or an invitation already sent."""
+
+
+class NotificationError(RetailProError):
+    """An email could not be sent."""
+
+
+class ForecastError(RetailProError):
+    """A forecasting model could not be fitted."""
+
+
+class AssistantError(RetailProError):
+    """The AI assistant could not be reached or returned an error."""
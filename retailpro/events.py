@@ -0,0 +1,81 @@
+import threading
+
+import sqlalchemy
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+
+from retailpro.db import engine
+from retailpro.errors import DataAccessError
+from retailpro.models import Inventory, Sale, WorkspaceMember, WorkspaceMessage
+
+# In-process change notifications. The write paths publish to a channel after they commit; a
+# session subscribes by remembering the sequence numbers of the channels its page shows and
+# comparing them later, which is a dictionary lookup rather than a database query. Channels are
+# ("workspace", workspace_id, topic) for data inside a workspace and ("user", user_id) for changes
+# to a user's own memberships. Only writes made by this process are seen: the sequences live in
+# this process's memory, so another app worker or a manage.py command never bumps them; pages
+# learn about those writes through workspace_change_cursor below.
+WORKSPACE_EVENT_TOPICS = ("chat", "chat_cleared", "sales", "inventory", "members")
+
+_event_lock = threading.Lock()
+_event_sequences = {}
+
+def workspace_event_channel(workspace_id, topic):
+    return ("workspace", workspace_id, topic)
+
+def user_event_channel(user_id):
+    return ("user", user_id)
+
+def publish_event(channel):
+    with _event_lock:
+        _event_sequences[channel] = _event_sequences.get(channel, 0) + 1
+
+def publish_workspace_event(workspace_id, *topics):
+    """Notifies subscribers of workspace_id that the data behind each topic changed."""
+    for topic in topics:
+        publish_event(workspace_event_channel(workspace_id, topic))
+
+def publish_user_event(user_id):
+    """Notifies a user's sessions that the workspaces they belong to changed."""
+    publish_event(user_event_channel(user_id))
+
+def event_sequences(channels):
+    """Current sequence number of each channel; two snapshots differ once anything was published to one of them."""
+    with _event_lock:
+        return tuple(_event_sequences.get(channel, 0) for channel in channels)
+
+def _workspace_change_markers(workspace_id, topic):
+    """Aggregates that move when another process writes the data behind a topic (all but the small members table are index-served)."""
+    if topic in ("chat", "chat_cleared"):
+        in_workspace = WorkspaceMessage.workspace_id == workspace_id
+        return [sqlalchemy.select(func.max(WorkspaceMessage.id)).where(in_workspace),
+                sqlalchemy.select(func.min(WorkspaceMessage.id)).where(in_workspace)]
+    if topic == "sales":
+        return [sqlalchemy.select(func.max(Sale.id)).where(Sale.workspace_id == workspace_id)]
+    if topic == "inventory":
+        # Sales are what move stock levels, so the newest sale id is part of the inventory marker too.
+        return [sqlalchemy.select(func.max(Inventory.id)).where(Inventory.workspace_id == workspace_id),
+                sqlalchemy.select(func.count(Inventory.id)).where(Inventory.workspace_id == workspace_id, Inventory.is_active == True),
+                sqlalchemy.select(func.max(Sale.id)).where(Sale.workspace_id == workspace_id)]
+    if topic == "members":
+        in_workspace = WorkspaceMember.workspace_id == workspace_id
+        return [sqlalchemy.select(func.max(WorkspaceMember.id)).where(in_workspace),
+                sqlalchemy.select(func.count(WorkspaceMember.id)).where(in_workspace, WorkspaceMember.status == "accepted")]
+    return []
+
+def workspace_change_cursor(workspace_id, topics):
+    """
+    A tuple that changes when rows behind the given topics of a workspace are added or removed by
+    any process, read in a single query of aggregates (newest message, sale and item ids, active
+    item and member counts). Edits to existing rows (a price change, say) do not move
+    it; in this process they are published on the event bus instead.
+    """
+    markers = [marker.scalar_subquery() for topic in dict.fromkeys(topics)
+               for marker in _workspace_change_markers(workspace_id, topic)]
+    if not markers:
+        return ()
+    try:
+        with engine.connect() as connection:
+            return tuple(connection.execute(sqlalchemy.select(*markers)).one())
+    except SQLAlchemyError as error:
+        raise DataAccessError(f"Failed to check workspace {workspace_id} for changes: {error}") from error
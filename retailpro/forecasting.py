@@ -0,0 +1,354 @@
+import datetime
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import sqlalchemy
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from retailpro.cache import bump_workspace_data_version, cached_workspace_analytics, invalidate_cached_workspace_analytics
+from retailpro.db import engine, SessionLocal, create_database_connection
+from retailpro.errors import DataAccessError, ForecastError, NotFoundError
+from retailpro.lazy import pd, np
+from retailpro.models import DailySalesRollup, Inventory, Sale, SaleItem, SalesForecast
+
+
+def get_product_sales_history(item_id, workspace_id):
+    try:
+        query = sqlalchemy.select(
+            Sale.sale_datetime,
+            SaleItem.quantity_sold
+        ).join(SaleItem, Sale.id == SaleItem.sale_id).where(
+            SaleItem.inventory_item_id == item_id,
+            Sale.workspace_id == workspace_id
+        ).order_by(Sale.sale_datetime.asc())
+
+        with engine.connect() as conn:
+            data_frame = pd.read_sql_query(query, conn)
+
+        if 'sale_datetime' in data_frame.columns:
+            data_frame['sale_datetime'] = pd.to_datetime(data_frame['sale_datetime'])
+        return data_frame
+    except (SQLAlchemyError, pd.errors.DatabaseError) as error:
+        raise DataAccessError(f"Prediction failed: Error fetching sales history: {error}") from error
+
+def prepare_forecasting_data(df_sales_history):
+    if df_sales_history.empty or 'quantity_sold' not in df_sales_history.columns:
+        return None
+    df_daily = df_sales_history.groupby(df_sales_history['sale_datetime'].dt.date)['quantity_sold'].sum().reset_index()
+    df_daily.rename(columns={'sale_datetime': 'ds', 'quantity_sold': 'y'}, inplace=True)
+    df_daily['ds'] = pd.to_datetime(df_daily['ds'])
+    if not df_daily.empty:
+        first_sale_date = df_daily['ds'].min()
+        today_date = pd.to_datetime(datetime.date.today())
+        if first_sale_date <= today_date:
+            all_dates_range = pd.date_range(start=first_sale_date, end=today_date, freq='D')
+            all_dates_df = pd.DataFrame({'ds': all_dates_range})
+            df_daily = pd.merge(all_dates_df, df_daily, on='ds', how='left')
+            df_daily['y'] = df_daily['y'].fillna(0)
+    return df_daily
+
+FORECAST_HORIZON_DAYS = 30
+PROPHET_WARM_START_PARAMS = ('k', 'm', 'sigma_obs', 'delta', 'beta')
+
+def prophet_warm_start_params(model):
+    """Fitted Prophet parameters as a JSON-serializable dict, for warm-starting the next fit."""
+    params = {}
+    for name in PROPHET_WARM_START_PARAMS:
+        values = np.asarray(model.params[name])[0]
+        params[name] = values.tolist() if name in ('delta', 'beta') else float(np.ravel(values)[0])
+    return params
+
+def fit_prophet_model(prepared_df, warm_start_params=None):
+    """
+    Fits Prophet on a prepared daily history and returns the model; raises on failure.
+    warm_start_params from a previous fit of the same item seed the optimizer (Prophet falls
+    back to its default init for any parameter whose shape no longer matches, e.g. when more
+    changepoints became available).
+    """
+    from prophet import Prophet
+    model = Prophet(daily_seasonality=True)
+    if warm_start_params:
+        init = {name: np.asarray(value) if isinstance(value, list) else value for name, value in warm_start_params.items()}
+        return model.fit(prepared_df, init=init)
+    return model.fit(prepared_df)
+
+def prophet_daily_forecast(model, horizon_days=FORECAST_HORIZON_DAYS):
+    """Daily predictions for the horizon_days after the history (the history itself is not predicted)."""
+    future = model.make_future_dataframe(periods=horizon_days, include_history=False)
+    return model.predict(future)['yhat'].to_numpy()
+
+# Tiers of the forecasting engine. Short, sparse or intermittent histories get a closed-form NumPy
+# method that runs in microseconds; Prophet is only fitted once an item has enough continuous
+# history for its trend and seasonality terms to mean anything.
+FORECAST_MOVING_AVERAGE_DAYS = 7
+FORECAST_SMOOTHING_ALPHA = 0.2
+FORECAST_CROSTON_ALPHA = 0.1
+FORECAST_MIN_SMOOTHING_DAYS = 14
+FORECAST_MIN_PROPHET_DAYS = 90
+# Average days per sale above which demand counts as intermittent (Syntetos-Boylan ADI cut-off).
+FORECAST_INTERMITTENT_INTERVAL = 1.32
+
+def _exponential_smoothing_level(values, alpha):
+    """Final simple exponential smoothing level of values (initialized at the first value), as one weighted sum."""
+    weights = alpha * (1 - alpha) ** np.arange(len(values) - 1, -1, -1)
+    weights[0] = (1 - alpha) ** (len(values) - 1)
+    return float(weights @ values)
+
+def forecast_moving_average(values, horizon_days=FORECAST_HORIZON_DAYS):
+    """Flat forecast at the mean of the last FORECAST_MOVING_AVERAGE_DAYS days."""
+    return np.full(horizon_days, values[-FORECAST_MOVING_AVERAGE_DAYS:].mean())
+
+def forecast_exponential_smoothing(values, horizon_days=FORECAST_HORIZON_DAYS):
+    """Flat forecast at the simple exponential smoothing level of the daily series."""
+    return np.full(horizon_days, _exponential_smoothing_level(values, FORECAST_SMOOTHING_ALPHA))
+
+def forecast_croston(values, horizon_days=FORECAST_HORIZON_DAYS):
+    """
+    Croston's method for intermittent demand: smooths the non-zero sale sizes and the intervals
+    between them separately, forecasting their ratio as the daily rate.
+    """
+    sale_days = np.flatnonzero(values)
+    if len(sale_days) == 0:
+        return np.zeros(horizon_days)
+    intervals = np.diff(sale_days, prepend=-1).astype(float)
+    size_level = _exponential_smoothing_level(values[sale_days], FORECAST_CROSTON_ALPHA)
+    interval_level = _exponential_smoothing_level(intervals, FORECAST_CROSTON_ALPHA)
+    return np.full(horizon_days, size_level / interval_level)
+
+NUMPY_FORECAST_METHODS = {
+    "moving_average": forecast_moving_average,
+    "exponential_smoothing": forecast_exponential_smoothing,
+    "croston": forecast_croston,
+}
+FORECAST_TIERS = list(NUMPY_FORECAST_METHODS) + ["prophet"]
+
+def choose_forecast_tier(values):
+    """Picks the cheapest tier that suits a daily series running from the item's first sale to today."""
+    history_days = len(values)
+    sale_days = np.count_nonzero(values)
+    if history_days < FORECAST_MIN_SMOOTHING_DAYS or sale_days < 2:
+        return "moving_average"
+    if history_days / sale_days > FORECAST_INTERMITTENT_INTERVAL:
+        return "croston"
+    if history_days < FORECAST_MIN_PROPHET_DAYS:
+        return "exponential_smoothing"
+    return "prophet"
+
+def summarize_daily_forecast(daily_predictions):
+    """Next day / week / 30 days unit totals from daily predictions (negative days count as zero)."""
+    daily_predictions = np.clip(daily_predictions, 0, None)
+    return {
+        'next_day': int(round(daily_predictions[0])),
+        'next_week': int(round(daily_predictions[:7].sum())),
+        'next_30_days': int(round(daily_predictions[:30].sum()))
+    }
+
+def forecast_item_demand(prepared_df, warm_start_params=None, tier=None, horizon_days=FORECAST_HORIZON_DAYS):
+    """
+    Forecasts a prepared daily history (see prepare_forecasting_data) with the given tier, or the
+    one choose_forecast_tier picks. Returns (tier, daily_predictions, params), where params are the
+    Prophet warm-start parameters (None for the NumPy tiers). Raises if Prophet fails to fit.
+    """
+    values = prepared_df['y'].to_numpy(dtype=float)
+    tier = tier or choose_forecast_tier(values)
+    if tier == "prophet":
+        model = fit_prophet_model(prepared_df, warm_start_params)
+        return tier, prophet_daily_forecast(model, horizon_days), prophet_warm_start_params(model)
+    return tier, NUMPY_FORECAST_METHODS[tier](values, horizon_days), None
+
+def get_item_sales_watermark(session, workspace_id, item_id):
+    """Highest sale_items.id recorded for the item; it changes exactly when a new sale of the item arrives."""
+    return session.query(func.max(SaleItem.id)).join(Sale, Sale.id == SaleItem.sale_id).filter(
+        SaleItem.inventory_item_id == item_id, Sale.workspace_id == workspace_id
+    ).scalar() or 0
+
+def save_sales_forecast(session, forecast_values):
+    """Inserts or replaces one item's row in forecasts inside the caller's transaction."""
+    dialect_insert = postgresql.insert if session.get_bind().dialect.name == "postgresql" else sqlite_insert
+    insert_statement = dialect_insert(SalesForecast).values(forecast_values)
+    session.execute(insert_statement.on_conflict_do_update(
+        index_elements=['workspace_id', 'inventory_item_id'],
+        set_={name: insert_statement.excluded[name] for name in forecast_values if name not in ('workspace_id', 'inventory_item_id')}
+    ))
+
+def get_item_sales_forecast(item_id, workspace_id):
+    """
+    Next day / week / 30 days prediction for an item, served from the forecasts table while the
+    item's sales watermark and the forecast date are unchanged. Otherwise the model is refit,
+    warm-started from the stored parameters, and the store is updated. Raises NotFoundError for
+    items without sales and ForecastError when the model cannot be fitted.
+    """
+    session = create_database_connection()
+    try:
+        watermark = get_item_sales_watermark(session, workspace_id, item_id)
+        as_of_date = datetime.date.today().isoformat()
+        stored = session.query(SalesForecast).filter_by(workspace_id=workspace_id, inventory_item_id=item_id).first()
+        if stored is not None and stored.sales_watermark == watermark and stored.as_of_date == as_of_date:
+            return {'next_day': stored.next_day, 'next_week': stored.next_week, 'next_30_days': stored.next_30_days,
+                    'model_name': stored.model_name, 'generated_at': stored.generated_at, 'from_store': True}
+
+        prepared_df = prepare_forecasting_data(get_product_sales_history(item_id, workspace_id))
+        if prepared_df is None or prepared_df.empty:
+            raise NotFoundError("Cannot generate a prediction. This item has no sales history yet.")
+        warm_start_params = json.loads(stored.model_params) if stored is not None and stored.model_params else None
+        try:
+            tier, daily_predictions, params = forecast_item_demand(prepared_df, warm_start_params)
+        except Exception as error:
+            raise ForecastError(f"Model training failed: {error}") from error
+        predictions = summarize_daily_forecast(daily_predictions)
+        generated_at = datetime.datetime.now().isoformat()
+        save_sales_forecast(session, {
+            'workspace_id': workspace_id, 'inventory_item_id': item_id,
+            'sales_watermark': watermark, 'as_of_date': as_of_date,
+            'model_name': tier, 'model_params': json.dumps(params) if params else None,
+            'generated_at': generated_at, **predictions
+        })
+        session.commit()
+        # Only the stored forecasts changed, so the workspace's other cached analytics stay valid.
+        invalidate_cached_workspace_analytics(workspace_id, get_workspace_forecasts)
+        return {**predictions, 'model_name': tier, 'generated_at': generated_at, 'from_store': False}
+    except SQLAlchemyError as error:
+        session.rollback()
+        raise DataAccessError(f"Prediction failed: {error}") from error
+    finally:
+        session.close()
+
+def load_workspace_daily_histories(connection, workspace_id):
+    """Prepared daily histories (see prepare_forecasting_data) of a workspace's active items, from daily_sales_rollup in one query."""
+    history_df = pd.read_sql_query(
+        sqlalchemy.select(
+            DailySalesRollup.inventory_item_id,
+            DailySalesRollup.sale_date.label('sale_datetime'),
+            DailySalesRollup.units_sold.label('quantity_sold')
+        ).join(Inventory, Inventory.id == DailySalesRollup.inventory_item_id)
+        .where(DailySalesRollup.workspace_id == workspace_id, Inventory.is_active == True),
+        connection
+    )
+    history_df['sale_datetime'] = pd.to_datetime(history_df['sale_datetime'])
+    return {item_id: prepare_forecasting_data(item_history) for item_id, item_history in history_df.groupby('inventory_item_id')}
+
+def _fit_forecast_task(task):
+    """Process-pool worker for run_batch_forecasts: forecasts one item, returning any error instead of raising it."""
+    item_id, prepared_df, tier, warm_start_params = task
+    started = time.perf_counter()
+    try:
+        tier, daily_predictions, params = forecast_item_demand(prepared_df, warm_start_params, tier)
+        return item_id, tier, summarize_daily_forecast(daily_predictions), params, time.perf_counter() - started, None
+    except Exception as error:
+        return item_id, None, None, None, time.perf_counter() - started, str(error)
+
+def run_batch_forecasts(workspace_id, max_workers=None, force=False, progress_callback=None):
+    """
+    Forecasts every active item of a workspace into the forecasts table. Daily histories come from
+    daily_sales_rollup in one query; items whose stored forecast still matches their sales watermark
+    and today's date are skipped unless force is set. Each item gets the tier choose_forecast_tier
+    picks; Prophet fits run in parallel in a ProcessPoolExecutor (max_workers=1 fits everything
+    in-process) and all results are written in one transaction. progress_callback(item_id, tier, fit_seconds, error) is called as
+    each fit finishes. Returns {'items', 'fitted', 'up_to_date', 'insufficient_history', 'failed',
+    'tiers', 'fit_seconds', 'errors', 'wall_seconds'}. Raises DataAccessError on database failures.
+    """
+    started = time.perf_counter()
+    as_of_date = datetime.date.today().isoformat()
+    try:
+        with engine.connect() as connection:
+            histories = load_workspace_daily_histories(connection, workspace_id)
+            active_item_ids = connection.execute(
+                sqlalchemy.select(Inventory.id).where(Inventory.workspace_id == workspace_id, Inventory.is_active == True)
+            ).scalars().all()
+            watermarks = dict(connection.execute(
+                sqlalchemy.select(SaleItem.inventory_item_id, func.max(SaleItem.id))
+                .join(Sale, Sale.id == SaleItem.sale_id)
+                .where(Sale.workspace_id == workspace_id)
+                .group_by(SaleItem.inventory_item_id)
+            ).all())
+            stored_forecasts = {row.inventory_item_id: row for row in connection.execute(
+                sqlalchemy.select(SalesForecast.inventory_item_id, SalesForecast.sales_watermark,
+                                  SalesForecast.as_of_date, SalesForecast.model_params)
+                .where(SalesForecast.workspace_id == workspace_id)
+            )}
+    except (SQLAlchemyError, pd.errors.DatabaseError) as error:
+        raise DataAccessError(f"Could not load sales histories for workspace {workspace_id}: {error}") from error
+
+    stats = {'items': len(active_item_ids), 'fitted': 0, 'up_to_date': 0, 'insufficient_history': 0,
+             'failed': 0, 'tiers': {}, 'fit_seconds': {}, 'errors': {}, 'wall_seconds': 0.0}
+    tasks = []
+    for item_id in active_item_ids:
+        stored = stored_forecasts.get(item_id)
+        watermark = watermarks.get(item_id, 0)
+        if not force and stored is not None and stored.sales_watermark == watermark and stored.as_of_date == as_of_date:
+            stats['up_to_date'] += 1
+            continue
+        prepared_df = histories.get(item_id)
+        if prepared_df is None or prepared_df.empty:
+            stats['insufficient_history'] += 1
+            continue
+        warm_start_params = json.loads(stored.model_params) if stored is not None and stored.model_params else None
+        tasks.append((item_id, prepared_df, choose_forecast_tier(prepared_df['y'].to_numpy(dtype=float)), warm_start_params))
+
+    results = []
+    def collect(result):
+        item_id, tier, predictions, params, fit_seconds, error = result
+        stats['fit_seconds'][item_id] = fit_seconds
+        if error is None:
+            results.append((item_id, tier, predictions, params))
+            stats['tiers'][tier] = stats['tiers'].get(tier, 0) + 1
+        else:
+            stats['failed'] += 1
+            stats['errors'][item_id] = error
+        if progress_callback:
+            progress_callback(item_id, tier, fit_seconds, error)
+
+    # The NumPy tiers take well under a millisecond, so only Prophet fits are worth shipping to worker processes.
+    prophet_tasks = [task for task in tasks if task[2] == "prophet"]
+    for task in tasks:
+        if task[2] != "prophet" or max_workers == 1 or len(prophet_tasks) <= 1:
+            collect(_fit_forecast_task(task))
+    if len(prophet_tasks) > 1 and max_workers != 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            for future in as_completed([pool.submit(_fit_forecast_task, task) for task in prophet_tasks]):
+                collect(future.result())
+
+    if results:
+        generated_at = datetime.datetime.now().isoformat()
+        session = SessionLocal()
+        try:
+            for item_id, tier, predictions, params in results:
+                save_sales_forecast(session, {
+                    'workspace_id': workspace_id, 'inventory_item_id': item_id,
+                    'sales_watermark': watermarks.get(item_id, 0), 'as_of_date': as_of_date,
+                    'model_name': tier, 'model_params': json.dumps(params) if params else None,
+                    'generated_at': generated_at, **predictions
+                })
+            session.commit()
+        except SQLAlchemyError as error:
+            session.rollback()
+            raise DataAccessError(f"Could not save forecasts for workspace {workspace_id}: {error}") from error
+        finally:
+            session.close()
+        bump_workspace_data_version(workspace_id)
+    stats['fitted'] = len(results)
+    stats['wall_seconds'] = time.perf_counter() - started
+    return stats
+
+@cached_workspace_analytics
+def get_workspace_forecasts(workspace_id):
+    """Stored forecasts of the workspace's active items, highest 30-day demand first."""
+    session = create_database_connection()
+    try:
+        rows = session.query(
+            SalesForecast.inventory_item_id, Inventory.name, Inventory.stock_level,
+            SalesForecast.next_day, SalesForecast.next_week, SalesForecast.next_30_days,
+            SalesForecast.model_name, SalesForecast.as_of_date, SalesForecast.generated_at
+        ).join(Inventory, Inventory.id == SalesForecast.inventory_item_id)\
+         .filter(SalesForecast.workspace_id == workspace_id, Inventory.is_active == True)\
+         .order_by(SalesForecast.next_30_days.desc(), Inventory.name.asc())\
+         .all()
+        return [dict(row._mapping) for row in rows]
+    except SQLAlchemyError as error:
+        raise DataAccessError(f"DB error getting forecasts: {error}") from error
+    finally:
+        session.close()
@@ -0,0 +1,202 @@
+import hashlib
+import io
+import os
+import re
+import threading
+import time
+import uuid
+
+import sqlalchemy
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from retailpro.config import INVENTORY_IMAGE_DIRECTORY
+from retailpro.models import Inventory
+
+# Uploads are stored as WebP renditions named by the SHA-256 of the uploaded bytes, so the same
+# picture uploaded twice shares one copy. image_path holds the "display" rendition and list views
+# show the "thumb" one next to it (<hash>_thumb.webp). The original upload is not kept.
+INVENTORY_IMAGE_RENDITIONS = {
+    "display": {"max_size": (1024, 1024), "suffix": ""},
+    "thumb": {"max_size": (240, 240), "suffix": "_thumb"},
+}
+INVENTORY_IMAGE_FORMAT = "WEBP"
+INVENTORY_IMAGE_EXTENSION = ".webp"
+INVENTORY_IMAGE_QUALITY = 80
+
+def normalize_inventory_image_path(image_path):
+    """Stored paths may use Windows separators (inventory_images\\x.jpg); returns a path usable on this OS."""
+    if not image_path:
+        return image_path
+    return os.path.normpath(image_path.replace("\\", "/"))
+
+def inventory_image_rendition_path(image_path, rendition):
+    """Path of a rendition ("display" or "thumb") belonging to the stored image at image_path."""
+    stem = os.path.splitext(normalize_inventory_image_path(image_path))[0]
+    return f"{stem}{INVENTORY_IMAGE_RENDITIONS[rendition]['suffix']}{INVENTORY_IMAGE_EXTENSION}"
+
+def _write_image_rendition(source_image, destination_path, max_size):
+    """Writes a downscaled WebP copy of source_image, via a temp file so readers never see a partial image."""
+    rendition = source_image.copy()
+    rendition.thumbnail(max_size, Image.Resampling.LANCZOS)
+    temporary_path = f"{destination_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        rendition.save(temporary_path, format=INVENTORY_IMAGE_FORMAT, quality=INVENTORY_IMAGE_QUALITY, method=6)
+        os.replace(temporary_path, destination_path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+def _open_image_for_renditions(image_source):
+    """Opens an image (path or file object), applying EXIF rotation and flattening to RGB/RGBA."""
+    with Image.open(image_source) as opened_image:
+        opened_image.seek(0)
+        image = ImageOps.exif_transpose(opened_image)
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info)
+        return image.convert("RGBA" if has_alpha else "RGB")
+
+def store_inventory_image(image_bytes, directory=INVENTORY_IMAGE_DIRECTORY):
+    """
+    Stores an image's display and thumbnail renditions under its content hash and returns the
+    display path. Renditions already on disk (a duplicate upload) are reused, not rewritten.
+    Raises UnidentifiedImageError / OSError for unreadable images.
+    """
+    content_hash = hashlib.sha256(image_bytes).hexdigest()
+    display_path = f"{directory}/{content_hash}{INVENTORY_IMAGE_EXTENSION}"
+    rendition_paths = {name: inventory_image_rendition_path(display_path, name) for name in INVENTORY_IMAGE_RENDITIONS}
+    missing = {name: path for name, path in rendition_paths.items() if not os.path.exists(path)}
+    if missing:
+        os.makedirs(directory, exist_ok=True)
+        source_image = _open_image_for_renditions(io.BytesIO(image_bytes))
+        for name, path in missing.items():
+            _write_image_rendition(source_image, path, INVENTORY_IMAGE_RENDITIONS[name]["max_size"])
+    remember_inventory_thumbnail(display_path, rendition_paths["thumb"])
+    return display_path
+
+IMAGE_AVAILABILITY_CACHE_SECONDS = 300
+IMAGE_AVAILABILITY_CACHE_MAX_ENTRIES = 10000
+
+_image_availability_lock = threading.Lock()
+_image_availability_cache = {}
+
+def remember_inventory_thumbnail(image_path, thumbnail_path):
+    """Records the resolved thumbnail (or None when there is none) for image_path in the in-process cache."""
+    with _image_availability_lock:
+        if image_path not in _image_availability_cache and len(_image_availability_cache) >= IMAGE_AVAILABILITY_CACHE_MAX_ENTRIES:
+            _image_availability_cache.pop(next(iter(_image_availability_cache)))
+        _image_availability_cache[image_path] = (time.monotonic(), thumbnail_path)
+
+def get_inventory_thumbnail_path(image_path):
+    """
+    Thumbnail for a stored image, or the image itself when it has no thumbnail (uploads from
+    before renditions existed, until reencode_inventory_images converts them); None if neither
+    file exists. Nothing is encoded here. Results are cached in-process for
+    IMAGE_AVAILABILITY_CACHE_SECONDS, so rendering a list of known images does no filesystem calls.
+    """
+    with _image_availability_lock:
+        cached_entry = _image_availability_cache.get(image_path)
+    if cached_entry is not None and time.monotonic() - cached_entry[0] < IMAGE_AVAILABILITY_CACHE_SECONDS:
+        return cached_entry[1]
+
+    thumbnail_path = inventory_image_rendition_path(image_path, "thumb")
+    if not os.path.isfile(thumbnail_path):
+        source_path = normalize_inventory_image_path(image_path)
+        thumbnail_path = source_path if os.path.isfile(source_path) else None
+    remember_inventory_thumbnail(image_path, thumbnail_path)
+    return thumbnail_path
+
+CONTENT_ADDRESSED_IMAGE_PATTERN = re.compile(r"^[0-9a-f]{64}\.webp$")
+
+def _referenced_inventory_image_paths(connection):
+    """Every image_path stored in inventory (active or not), in one query."""
+    return set(connection.execute(
+        sqlalchemy.select(Inventory.image_path).where(Inventory.image_path.isnot(None), Inventory.image_path != "").distinct()
+    ).scalars())
+
+def collect_orphaned_inventory_images(connection, directory=INVENTORY_IMAGE_DIRECTORY, dry_run=False, min_age_seconds=3600):
+    """
+    Deletes files in the image directory that no inventory row references (directly or as one of
+    its renditions), scanning the directory once against a single query. Files younger than
+    min_age_seconds are kept, since an upload is written before its inventory row is committed.
+    Returns {'scanned', 'orphaned', 'orphaned_bytes', 'deleted', 'orphan_paths'}.
+    """
+    # Stored paths are usually relative to the app's working directory while directory may be
+    # absolute (or the other way round), so both sides are compared as resolved absolute paths.
+    def path_key(path):
+        return os.path.normcase(os.path.realpath(path))
+
+    keep_paths = set()
+    for image_path in _referenced_inventory_image_paths(connection):
+        keep_paths.add(path_key(normalize_inventory_image_path(image_path)))
+        for rendition in INVENTORY_IMAGE_RENDITIONS:
+            keep_paths.add(path_key(inventory_image_rendition_path(image_path, rendition)))
+
+    stats = {'scanned': 0, 'orphaned': 0, 'orphaned_bytes': 0, 'deleted': 0, 'orphan_paths': []}
+    if not os.path.isdir(directory):
+        return stats
+    cutoff = time.time() - min_age_seconds
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            stats['scanned'] += 1
+            entry_stat = entry.stat()
+            if path_key(entry.path) in keep_paths or entry_stat.st_mtime > cutoff:
+                continue
+            stats['orphaned'] += 1
+            stats['orphaned_bytes'] += entry_stat.st_size
+            stats['orphan_paths'].append(entry.path)
+            if not dry_run:
+                try:
+                    os.remove(entry.path)
+                    stats['deleted'] += 1
+                except FileNotFoundError:
+                    pass
+    if stats['deleted']:
+        with _image_availability_lock:
+            _image_availability_cache.clear()
+    return stats
+
+def reencode_inventory_images(connection, directory=INVENTORY_IMAGE_DIRECTORY, dry_run=False):
+    """
+    Converts images stored before content-addressed WebP renditions existed: each legacy file is
+    re-encoded with store_inventory_image and every inventory row pointing at it is repointed.
+    Content-addressed images whose thumbnail is missing get it rewritten. The old files are left
+    for collect_orphaned_inventory_images. Returns
+    {'converted', 'rows_updated', 'thumbnails_written', 'missing', 'failed', 'bytes_before', 'bytes_after'}.
+    """
+    stats = {'converted': 0, 'rows_updated': 0, 'thumbnails_written': 0, 'missing': 0, 'failed': 0, 'bytes_before': 0, 'bytes_after': 0}
+    for image_path in sorted(_referenced_inventory_image_paths(connection)):
+        source_path = normalize_inventory_image_path(image_path)
+        if CONTENT_ADDRESSED_IMAGE_PATTERN.match(os.path.basename(source_path)):
+            thumbnail_path = inventory_image_rendition_path(image_path, "thumb")
+            if os.path.isfile(thumbnail_path) or not os.path.isfile(source_path):
+                continue
+            if not dry_run:
+                try:
+                    _write_image_rendition(_open_image_for_renditions(source_path), thumbnail_path, INVENTORY_IMAGE_RENDITIONS["thumb"]["max_size"])
+                except (UnidentifiedImageError, OSError):
+                    stats['failed'] += 1
+                    continue
+                remember_inventory_thumbnail(image_path, thumbnail_path)
+            stats['thumbnails_written'] += 1
+            continue
+        if not os.path.isfile(source_path):
+            stats['missing'] += 1
+            continue
+        stats['bytes_before'] += os.path.getsize(source_path)
+        if dry_run:
+            stats['converted'] += 1
+            continue
+        try:
+            with open(source_path, "rb") as source_file:
+                new_path = store_inventory_image(source_file.read(), directory)
+        except (UnidentifiedImageError, OSError):
+            stats['failed'] += 1
+            continue
+        stats['bytes_after'] += os.path.getsize(normalize_inventory_image_path(new_path))
+        result = connection.execute(
+            Inventory.__table__.update().where(Inventory.__table__.c.image_path == image_path).values(image_path=new_path)
+        )
+        stats['converted'] += 1
+        stats['rows_updated'] += result.rowcount
+    return stats
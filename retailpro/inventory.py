@@ -0,0 +1,232 @@
+import difflib
+
+from sqlalchemy import func, and_, or_, case
+from sqlalchemy.exc import IntegrityError as SQLAlchemyIntegrityError, SQLAlchemyError
+
+from retailpro.analytics import LOW_STOCK_THRESHOLD
+from retailpro.cache import bump_workspace_data_version
+from retailpro.db import create_database_connection, row_to_dict, is_unique_violation, is_foreign_key_violation
+from retailpro.errors import ConflictError, DataAccessError, NotFoundError, ValidationError
+from retailpro.events import publish_workspace_event
+from retailpro.models import Inventory
+from retailpro.search import (INVENTORY_SEARCH_MIN_TERM_LENGTH, INVENTORY_SEARCH_FUZZY_MIN_SIMILARITY,
+                              inventory_search_available, sync_inventory_search_entry, inventory_name_matches,
+                              _inventory_search_ids, _inventory_search_phrase, _inventory_search_trigrams_query)
+from retailpro.workspaces import require_workspace_member
+
+
+def _validated_product_fields(name, retail_price, stock_level):
+    if not name: raise ValidationError("Item name cannot be empty.")
+    try:
+        price = float(retail_price); stock = int(stock_level)
+    except (TypeError, ValueError) as error:
+        raise ValidationError(f"Invalid price or stock level: {error}") from error
+    if price < 0: raise ValidationError("Price cannot be negative.")
+    if stock < 0: raise ValidationError("Stock level cannot be negative.")
+    return price, stock
+
+def add_product(workspace_id, name, retail_price, stock_level, image_path=None, added_by_user_id=None):
+    price, stock = _validated_product_fields(name, retail_price, stock_level)
+    session = create_database_connection()
+    try:
+        if added_by_user_id:
+            require_workspace_member(added_by_user_id, workspace_id, "add items to", session)
+
+        new_product = Inventory(
+            workspace_id=workspace_id,
+            name=name,
+            retail_price=price,
+            stock_level=stock,
+            image_path=image_path,
+            is_active=True
+        )
+        session.add(new_product)
+        session.flush()
+        sync_inventory_search_entry(session, new_product)
+        session.commit()
+        bump_workspace_data_version(workspace_id)
+        publish_workspace_event(workspace_id, "inventory")
+        return True
+    except SQLAlchemyIntegrityError as error:
+        session.rollback()
+        if is_unique_violation(error, "idx_inventory_workspace_name_active", ["inventory.workspace_id", "inventory.name"]):
+            raise ConflictError(f"An active item named '{name}' already exists in this workspace.") from error
+        elif is_foreign_key_violation(error):
+            raise ValidationError(f"Failed to add item: The specified workspace (ID: {workspace_id}) does not exist or there's a reference issue. Please ensure you are in a valid workspace.") from error
+        raise DataAccessError(f"Failed to add item due to a database constraint: {error.orig}") from error
+    except SQLAlchemyError as error:
+        session.rollback()
+        raise DataAccessError(f"Failed to add item: {error}") from error
+    finally:
+        session.close()
+
+def _filtered_products_query(session, workspace_id, search_term, price_filter, stock_filter, include_inactive, columns=(Inventory,)):
+    query = session.query(*columns).filter(Inventory.workspace_id == workspace_id)
+    if not include_inactive:
+        query = query.filter(Inventory.is_active == True)
+    if search_term:
+        query = query.filter(inventory_name_matches(session, workspace_id, search_term))
+
+    if price_filter == "< $30":
+        query = query.filter(Inventory.retail_price < 30.0)
+    elif price_filter == "$30-$100":
+        query = query.filter(Inventory.retail_price.between(30.0, 100.0))
+    elif price_filter == "> $100":
+        query = query.filter(Inventory.retail_price > 100.0)
+
+    if stock_filter == "Low Stock":
+        query = query.filter(Inventory.stock_level > 0, Inventory.stock_level <= LOW_STOCK_THRESHOLD)
+    elif stock_filter == "Out of Stock":
+        query = query.filter(Inventory.stock_level <= 0)
+    elif stock_filter == "In Stock":
+        query = query.filter(Inventory.stock_level > 0)
+    return query
+
+def get_products(workspace_id, search_term="", price_filter="Any", stock_filter="Any", include_inactive=False, page_size=None, after_key=None):
+    """
+    Returns matching inventory items ordered by (name, id). With page_size set, only one page
+    is loaded: pass the (name, id) of the last item of the previous page as after_key to get
+    the next one (keyset pagination, served by idx_inventory_workspace_name_id). A search_term
+    filters by name but does not reorder by relevance; see search_products for that. Inventory
+    reads are not cached: stock must be current even when another process has just sold it.
+    """
+    session = create_database_connection()
+    try:
+        query = _filtered_products_query(session, workspace_id, search_term, price_filter, stock_filter, include_inactive)
+        if after_key is not None:
+            after_name, after_id = after_key
+            query = query.filter(or_(
+                Inventory.name > after_name,
+                and_(Inventory.name == after_name, Inventory.id > after_id)
+            ))
+        query = query.order_by(Inventory.name.asc(), Inventory.id.asc())
+        if page_size:
+            query = query.limit(page_size)
+        return [row_to_dict(row) for row in query.all()]
+    except SQLAlchemyError as error:
+        raise DataAccessError(f"DB error getting inventory: {error}") from error
+    finally:
+        session.close()
+
+def count_products(workspace_id, search_term="", price_filter="Any", stock_filter="Any", include_inactive=False):
+    session = create_database_connection()
+    try:
+        return _filtered_products_query(
+            session, workspace_id, search_term, price_filter, stock_filter, include_inactive, columns=(func.count(Inventory.id),)
+        ).scalar() or 0
+    except SQLAlchemyError as error:
+        raise DataAccessError(f"DB error counting inventory: {error}") from error
+    finally:
+        session.close()
+
+def search_products(workspace_id, search_term, limit=10, stock_filter="Any"):
+    """
+    Type-ahead lookup over active products, best match first: names starting with the term,
+    then names containing it (by bm25 rank), then names sharing trigrams with it (by similarity),
+    so a small typo still finds the product.
+    """
+    search_term = (search_term or "").strip()
+    if not search_term: return []
+    session = create_database_connection()
+    try:
+        base_query = _filtered_products_query(session, workspace_id, "", "Any", stock_filter, False)
+        if len(search_term) < INVENTORY_SEARCH_MIN_TERM_LENGTH or not inventory_search_available(session):
+            matches = base_query.filter(Inventory.name.ilike(f"%{search_term}%")).order_by(
+                case((Inventory.name.ilike(f"{search_term}%"), 0), else_=1), Inventory.name.asc()
+            ).limit(limit).all()
+            return [row_to_dict(row) for row in matches]
+
+        candidate_limit = max(limit * 5, 50)
+        lowered_term = search_term.lower()
+        phrase_ids = session.execute(
+            _inventory_search_ids(workspace_id, _inventory_search_phrase(search_term)).limit(candidate_limit)
+        ).scalars().all()
+        phrase_rank = {item_id: position for position, item_id in enumerate(phrase_ids)}
+        phrase_items = base_query.filter(Inventory.id.in_(phrase_ids)).all() if phrase_ids else []
+        phrase_items.sort(key=lambda item: (not item.name.lower().startswith(lowered_term), phrase_rank[item.id]))
+        results = phrase_items[:limit]
+
+        if len(results) < limit:
+            fuzzy_ids = session.execute(
+                _inventory_search_ids(workspace_id, _inventory_search_trigrams_query(search_term)).limit(candidate_limit)
+            ).scalars().all()
+            fuzzy_ids = [item_id for item_id in fuzzy_ids if item_id not in phrase_rank]
+            fuzzy_items = base_query.filter(Inventory.id.in_(fuzzy_ids)).all() if fuzzy_ids else []
+            scored = []
+            for item in fuzzy_items:
+                candidates = [item.name.lower()] + item.name.lower().split()
+                similarity = max(difflib.SequenceMatcher(None, lowered_term, candidate).ratio() for candidate in candidates)
+                if similarity >= INVENTORY_SEARCH_FUZZY_MIN_SIMILARITY:
+                    scored.append((similarity, item))
+            scored.sort(key=lambda pair: -pair[0])
+            results += [item for _, item in scored[:limit - len(results)]]
+        return [row_to_dict(item) for item in results]
+    except SQLAlchemyError as error:
+        raise DataAccessError(f"DB error searching inventory: {error}") from error
+    finally:
+        session.close()
+
+def get_product_by_id(item_id, workspace_id, include_inactive=False):
+    session = create_database_connection()
+    try:
+        query = session.query(Inventory).filter_by(id=item_id, workspace_id=workspace_id)
+        if not include_inactive:
+            query = query.filter(Inventory.is_active == True)
+        return row_to_dict(query.first())
+    except SQLAlchemyError as error:
+        raise DataAccessError(f"DB error getting item by ID: {error}") from error
+    finally:
+        session.close()
+
+def update_product(item_id, workspace_id, name, retail_price, stock_level, image_path=None, is_active=True, updated_by_user_id=None):
+    price, stock = _validated_product_fields(name, retail_price, stock_level)
+    session = create_database_connection()
+    try:
+        if updated_by_user_id:
+            require_workspace_member(updated_by_user_id, workspace_id, "update items in", session)
+
+        item_to_update = session.query(Inventory).filter_by(id=item_id, workspace_id=workspace_id).first()
+        if not item_to_update:
+            raise NotFoundError(f"Item ID {item_id} not found for update in this workspace or no changes were made.")
+        item_to_update.name = name
+        item_to_update.retail_price = price
+        item_to_update.stock_level = stock
+        item_to_update.is_active = is_active
+        if image_path is not None:
+            item_to_update.image_path = image_path
+        session.flush()
+        sync_inventory_search_entry(session, item_to_update)
+        session.commit()
+        bump_workspace_data_version(workspace_id)
+        publish_workspace_event(workspace_id, "inventory")
+        return True
+    except SQLAlchemyIntegrityError as error:
+        session.rollback()
+        if is_unique_violation(error, "idx_inventory_workspace_name_active", ["inventory.workspace_id", "inventory.name"]):
+            raise ConflictError(f"Another active item named '{name}' already exists in this workspace.") from error
+        raise DataAccessError(f"Failed to update item due to a database constraint: {error.orig}") from error
+    except SQLAlchemyError as error:
+        session.rollback()
+        raise DataAccessError(f"Failed to update item: {error}") from error
+    finally:
+        session.close()
+
+def deactivate_product(item_id, workspace_id, deleted_by_user_id=None):
+    session = create_database_connection()
+    try:
+        if deleted_by_user_id:
+            require_workspace_member(deleted_by_user_id, workspace_id, "delete items in", session)
+
+        item_to_deactivate = session.query(Inventory).filter_by(id=item_id, workspace_id=workspace_id).first()
+        if not item_to_deactivate:
+            raise NotFoundError(f"Item ID {item_id} not found in this workspace to deactivate.")
+        item_to_deactivate.is_active = False
+        session.commit()
+        bump_workspace_data_version(workspace_id)
+        publish_workspace_event(workspace_id, "inventory")
+        return True
+    except SQLAlchemyError as error:
+        session.rollback()
+        raise DataAccessError(f"DB Error: Failed to deactivate item: {error}") from error
+    finally:
+        session.close()
@@ -0,0 +1,19 @@
+import importlib
+
+
+class LazyModule:
+    """
+    Stands in for a module and imports it on first attribute access. The data, charting and AI
+    stacks take seconds to import, and the login page and most requests never touch some of them.
+    """
+    def __init__(self, module_name):
+        self._module_name = module_name
+        self._module = None
+
+    def __getattr__(self, attribute):
+        if self._module is None:
+            self._module = importlib.import_module(self._module_name)
+        return getattr(self._module, attribute)
+
+pd = LazyModule("pandas")
+np = LazyModule("numpy")
@@ -0,0 +1,87 @@
+import datetime
+
+import sqlalchemy
+from sqlalchemy.exc import SQLAlchemyError
+
+from retailpro.db import Base, engine, format_sale_timestamp
+from retailpro.errors import DataAccessError
+from retailpro.models import Inventory, Sale, SchemaMigration, WorkspaceMessage
+from retailpro.sales import rebuild_daily_sales_rollup
+from retailpro.search import rebuild_inventory_search_index
+
+
+def migrate_normalize_sale_timestamps(connection):
+    """Rewrites every sale_datetime into the sortable format and adds the (workspace_id, sale_datetime) index."""
+    rows = connection.execute(sqlalchemy.select(Sale.id, Sale.sale_datetime)).all()
+    updates = []
+    for row in rows:
+        try:
+            normalized = format_sale_timestamp(datetime.datetime.fromisoformat(row.sale_datetime))
+        except ValueError:
+            continue
+        if normalized != row.sale_datetime:
+            updates.append({'sale_row_id': row.id, 'normalized': normalized})
+    if updates:
+        connection.execute(
+            Sale.__table__.update()
+            .where(Sale.__table__.c.id == sqlalchemy.bindparam('sale_row_id'))
+            .values(sale_datetime=sqlalchemy.bindparam('normalized')),
+            updates
+        )
+    for index in Sale.__table__.indexes:
+        index.create(bind=connection, checkfirst=True)
+
+def migrate_create_inventory_indexes(connection):
+    """Adds the (workspace_id, name, id) index used to page through inventory by keyset."""
+    for index in Inventory.__table__.indexes:
+        index.create(bind=connection, checkfirst=True)
+
+def migrate_create_workspace_message_id_index(connection):
+    """Adds the (workspace_id, id) WorkspaceMessage index that serves the chat's latest-messages window and its paging."""
+    for index in WorkspaceMessage.__table__.indexes:
+        if index.name == "idx_workspace_messages_workspace_id_id":
+            index.create(bind=connection, checkfirst=True)
+
+def migrate_create_workspace_message_timestamp_index(connection):
+    """Adds the (workspace_id, timestamp) WorkspaceMessage index that serves the retention job's age cutoff."""
+    for index in WorkspaceMessage.__table__.indexes:
+        if index.name == "idx_workspace_messages_workspace_id_timestamp":
+            index.create(bind=connection, checkfirst=True)
+
+def migrate_create_sales_workspace_id_index(connection):
+    """Adds the (workspace_id, id) sales index, which finds a workspace's newest sale id for the page change check."""
+    for index in Sale.__table__.indexes:
+        if index.name == "idx_sales_workspace_id_id":
+            index.create(bind=connection, checkfirst=True)
+
+SCHEMA_MIGRATIONS = [
+    ("0001_normalize_sale_timestamps", migrate_normalize_sale_timestamps),
+    ("0002_backfill_daily_sales_rollup", rebuild_daily_sales_rollup),
+    ("0003_inventory_keyset_index", migrate_create_inventory_indexes),
+    ("0004_inventory_search_index", rebuild_inventory_search_index),
+    ("0005_workspace_messages_tail_index", migrate_create_workspace_message_id_index),
+    ("0006_workspace_messages_timestamp_index", migrate_create_workspace_message_timestamp_index),
+    ("0007_sales_workspace_id_index", migrate_create_sales_workspace_id_index),
+]
+
+def run_schema_migrations():
+    """Applies any migrations from SCHEMA_MIGRATIONS that have not been recorded in schema_migrations yet."""
+    with engine.begin() as connection:
+        applied_versions = set(connection.execute(sqlalchemy.select(SchemaMigration.version)).scalars())
+    for version, migration in SCHEMA_MIGRATIONS:
+        if version in applied_versions:
+            continue
+        with engine.begin() as connection:
+            migration(connection)
+            connection.execute(SchemaMigration.__table__.insert().values(
+                version=version,
+                applied_at=datetime.datetime.now().isoformat()
+            ))
+
+def start_database():
+    """Creates database tables from SQLAlchemy models if they don't exist, then applies pending migrations."""
+    try:
+        Base.metadata.create_all(bind=engine)
+        run_schema_migrations()
+    except SQLAlchemyError as error:
+        raise DataAccessError(f"Database error during initialization: {error}") from error
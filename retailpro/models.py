@@ -0,0 +1,170 @@
+from sqlalchemy import Column, Integer, String, LargeBinary, ForeignKey, Boolean, TEXT, Index, and_
+from sqlalchemy.orm import relationship
+
+from retailpro.db import Base, PORTABLE_REAL
+
+class User(Base):
+    __tablename__ = "users"
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    email = Column(String, unique=True, nullable=False, index=True)
+    password_hash = Column(LargeBinary, nullable=False)
+    name = Column(String)
+
+    workspaces_owned = relationship("Workspace", back_populates="owner")
+    invitations_sent = relationship("WorkspaceMember", foreign_keys='WorkspaceMember.invited_by_user_id', back_populates="inviter")
+    sales_recorded = relationship("Sale", back_populates="recorder")
+    memberships = relationship("WorkspaceMember", foreign_keys='WorkspaceMember.user_id', back_populates="user", cascade="all, delete-orphan")
+    chat_messages = relationship("WorkspaceMessage", back_populates="user", cascade="all, delete-orphan")
+
+
+
+class Workspace(Base):
+    __tablename__ = "workspaces"
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    name = Column(String, nullable=False)
+    owner_user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    created_at = Column(String, nullable=False)
+
+    owner = relationship("User", back_populates="workspaces_owned")
+    members = relationship("WorkspaceMember", back_populates="workspace", cascade="all, delete-orphan")
+    inventory_items = relationship("Inventory", back_populates="workspace", cascade="all, delete-orphan")
+    sales = relationship("Sale", back_populates="workspace", cascade="all, delete-orphan")
+    chat_messages = relationship("WorkspaceMessage", back_populates="workspace", cascade="all, delete-orphan")
+
+class WorkspaceMessage(Base):
+    __tablename__ = "workspace_messages"
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    workspace_id = Column(Integer, ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    content = Column(TEXT, nullable=False)
+    timestamp = Column(String, nullable=False)
+
+    user = relationship("User", back_populates="chat_messages")
+    workspace = relationship("Workspace", back_populates="chat_messages")
+    __table_args__ = (
+        Index('idx_workspace_messages_workspace_id_id', 'workspace_id', 'id'),
+        Index('idx_workspace_messages_workspace_id_timestamp', 'workspace_id', 'timestamp'),
+    )
+
+
+class WorkspaceMember(Base):
+    __tablename__ = "workspace_members"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    workspace_id = Column(Integer, ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    role = Column(String, nullable=False, default='member')
+    invited_by_user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
+    invite_email = Column(String, index=True)
+    invite_token = Column(String, unique=True, index=True)
+    status = Column(String, nullable=False, default='pending')
+    joined_at = Column(String)
+
+    workspace = relationship("Workspace", back_populates="members")
+    user = relationship("User", foreign_keys=[user_id], back_populates="memberships")
+    inviter = relationship("User", foreign_keys=[invited_by_user_id], back_populates="invitations_sent")
+
+    __table_args__ = (
+        Index('idx_workspace_user_accepted_unique', 'workspace_id', 'user_id',
+              unique=True,
+              sqlite_where=and_(user_id != None, status == 'accepted'),
+              postgresql_where=and_(user_id != None, status == 'accepted')),
+        Index('idx_workspace_user_pending_unique', 'workspace_id', 'user_id',
+              unique=True,
+              sqlite_where=and_(user_id != None, status == 'pending', invite_token != None),
+              postgresql_where=and_(user_id != None, status == 'pending', invite_token != None)),
+        Index('idx_workspace_pending_email_unique', 'workspace_id', 'invite_email',
+              unique=True,
+              sqlite_where=and_(invite_email != None, status == 'pending', user_id == None),
+              postgresql_where=and_(invite_email != None, status == 'pending', user_id == None)),
+    )
+
+
+class Inventory(Base):
+    __tablename__ = "inventory"
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    workspace_id = Column(Integer, ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False)
+    name = Column(String, nullable=False)
+    retail_price = Column(PORTABLE_REAL)
+    stock_level = Column(Integer)
+    image_path = Column(String)
+    is_active = Column(Boolean, nullable=False, default=True)
+
+    workspace = relationship("Workspace", back_populates="inventory_items")
+    sale_items = relationship("SaleItem", back_populates="inventory_item")
+
+    __table_args__ = (
+        Index('idx_inventory_workspace_name_active', 'workspace_id', 'name',
+              unique=True,
+              sqlite_where=(is_active == True),
+              postgresql_where=(is_active == True)),
+        Index('idx_inventory_workspace_name_id', 'workspace_id', 'name', 'id'),
+    )
+
+
+class Sale(Base):
+    __tablename__ = "sales"
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    workspace_id = Column(Integer, ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False)
+    recorded_by_user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    sale_datetime = Column(String, nullable=False)
+    total_amount = Column(PORTABLE_REAL, nullable=False)
+
+    workspace = relationship("Workspace", back_populates="sales")
+    recorder = relationship("User", back_populates="sales_recorded")
+    items = relationship("SaleItem", back_populates="sale", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index('idx_sales_workspace_datetime', 'workspace_id', 'sale_datetime'),
+        Index('idx_sales_workspace_id_id', 'workspace_id', 'id'),
+    )
+
+
+class SaleItem(Base):
+    __tablename__ = "sale_items"
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    sale_id = Column(Integer, ForeignKey("sales.id", ondelete="CASCADE"), nullable=False, index=True)
+    inventory_item_id = Column(Integer, ForeignKey("inventory.id", ondelete="RESTRICT"), nullable=False, index=True)
+    quantity_sold = Column(Integer, nullable=False)
+    price_per_unit_at_sale = Column(PORTABLE_REAL, nullable=False)
+    discount_percentage = Column(PORTABLE_REAL, nullable=False, default=0)
+    subtotal = Column(PORTABLE_REAL, nullable=False)
+
+    sale = relationship("Sale", back_populates="items")
+    inventory_item = relationship("Inventory", back_populates="sale_items")
+
+
+class DailySalesRollup(Base):
+    __tablename__ = "daily_sales_rollup"
+    workspace_id = Column(Integer, ForeignKey("workspaces.id", ondelete="CASCADE"), primary_key=True)
+    inventory_item_id = Column(Integer, ForeignKey("inventory.id", ondelete="CASCADE"), primary_key=True)
+    sale_date = Column(String, primary_key=True)
+    units_sold = Column(Integer, nullable=False, default=0)
+    revenue = Column(PORTABLE_REAL, nullable=False, default=0)
+
+
+class SalesForecast(Base):
+    __tablename__ = "forecasts"
+    workspace_id = Column(Integer, ForeignKey("workspaces.id", ondelete="CASCADE"), primary_key=True)
+    inventory_item_id = Column(Integer, ForeignKey("inventory.id", ondelete="CASCADE"), primary_key=True)
+    sales_watermark = Column(Integer, nullable=False)
+    as_of_date = Column(String, nullable=False)
+    model_name = Column(String, nullable=False)
+    model_params = Column(TEXT)
+    next_day = Column(Integer, nullable=False)
+    next_week = Column(Integer, nullable=False)
+    next_30_days = Column(Integer, nullable=False)
+    generated_at = Column(String, nullable=False)
+
+
+class ChatRetentionPolicy(Base):
+    __tablename__ = "chat_retention_policies"
+    workspace_id = Column(Integer, ForeignKey("workspaces.id", ondelete="CASCADE"), primary_key=True)
+    max_age_days = Column(Integer)
+    max_messages = Column(Integer)
+    updated_at = Column(String, nullable=False)
+
+
+class SchemaMigration(Base):
+    __tablename__ = "schema_migrations"
+    version = Column(String, primary_key=True)
+    applied_at = Column(String, nullable=False)
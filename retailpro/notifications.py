@@ -0,0 +1,69 @@
+import smtplib
+import socket
+import ssl
+from email.message import EmailMessage
+
+from retailpro.config import get_secret
+from retailpro.errors import ConfigurationError, NotificationError
+
+EMAIL_CREDENTIAL_KEYS = ("sender_email", "app_password", "smtp_server", "smtp_port")
+
+def load_email_settings():
+    """The [email_credentials] section of the secrets; raises ConfigurationError naming the first missing key."""
+    credentials = get_secret("email_credentials")
+    if credentials is None:
+        raise ConfigurationError("Missing secret: 'email_credentials'. Please check your .streamlit/secrets.toml file.")
+    for key in EMAIL_CREDENTIAL_KEYS:
+        if key not in credentials:
+            raise ConfigurationError(f"Missing secret: '{key}'. Please check your .streamlit/secrets.toml file.")
+    return credentials
+
+def send_application_email(recipient_email, subject, body):
+    credentials = load_email_settings()
+    sender_email = credentials["sender_email"]
+    sender_app_password = credentials["app_password"]
+    if sender_app_password == "aaaaaaaaaaaaaaaa" or not sender_app_password:
+        raise ConfigurationError("CRITICAL: SENDER_APP_PASSWORD is not set correctly. Update it in the script or environment.")
+    msg = EmailMessage()
+    msg['Subject'] = subject
+    msg['From'] = sender_email
+    msg['To'] = recipient_email
+    msg.set_content(body)
+    context = ssl.create_default_context()
+    try:
+        with smtplib.SMTP_SSL(credentials["smtp_server"], credentials["smtp_port"], context=context) as server:
+            server.login(sender_email, sender_app_password)
+            server.send_message(msg)
+            return True
+    except smtplib.SMTPAuthenticationError as error_auth:
+        raise NotificationError("Email Auth failed. Check SENDER_EMAIL or SENDER_APP_PASSWORD.") from error_auth
+    except (smtplib.SMTPException, socket.gaierror, OSError) as error_smtp:
+        raise NotificationError(f"Failed to send email due to SMTP/Network issue: {error_smtp}") from error_smtp
+    except Exception as error:
+        raise NotificationError(f"An unexpected error occurred during email sending: {error}") from error
+
+def email_workspace_invite(recipient_email, inviter_name, workspace_name, invite_link):
+    subject = f"You're invited to join {workspace_name} on Retail Pro+"
+    body = f"""Hi,
+
+{inviter_name} has invited you to collaborate on the workspace '{workspace_name}' in Retail Pro+.
+
+To accept this invitation, please click the link below:
+{invite_link}
+
+If you don't have a Retail Pro+ account, you'll be prompted to create one.
+
+Thanks,
+The Retail Pro+ Team
+"""
+    return send_application_email(recipient_email, subject, body)
+
+def send_password_reset_link(recipient_email, reset_code):
+    subject = "Your Password Reset Code for Retail Pro+"
+    body = f"Hi,\n\nYour password reset code is: {reset_code}\n\nPlease use this to reset your password.\n\nThanks,\nThe Retail Pro+ Team"
+    return send_application_email(recipient_email, subject, body)
+
+def send_two_factor_auth_code(recipient_email, auth_code):
+    subject = "Your Retail Pro+ Login Verification Code"
+    body = f"Hi,\n\nYour login verification code is: {auth_code}\n\nThanks,\nThe Retail Pro+ Team"
+    return send_application_email(recipient_email, subject, body)
@@ -0,0 +1,176 @@
+import datetime
+import gzip
+import json
+import os
+
+import sqlalchemy
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+
+from retailpro.config import CHAT_ARCHIVE_DIRECTORY
+from retailpro.db import create_database_connection, engine
+from retailpro.errors import DataAccessError, PermissionDeniedError, ValidationError
+from retailpro.events import publish_workspace_event
+from retailpro.models import ChatRetentionPolicy, User, WorkspaceMessage
+from retailpro.workspaces import get_workspace_owner_user_id
+
+# Workspaces that have not set their own policy keep a year of chat and at most 10,000 messages.
+# Messages outside the policy are moved to the archive by `python manage.py archive-chat`.
+CHAT_RETENTION_DEFAULT_MAX_AGE_DAYS = 365
+CHAT_RETENTION_DEFAULT_MAX_MESSAGES = 10000
+CHAT_ARCHIVE_BATCH_SIZE = 500
+
+def get_chat_retention_policy(workspace_id):
+    """{'max_age_days', 'max_messages', 'is_default'} for a workspace; a limit of None is switched off."""
+    session = create_database_connection()
+    try:
+        policy = session.get(ChatRetentionPolicy, workspace_id)
+    except SQLAlchemyError as error:
+        raise DataAccessError(f"Failed to load the chat retention policy: {error}") from error
+    finally:
+        session.close()
+    if policy is None:
+        return {'max_age_days': CHAT_RETENTION_DEFAULT_MAX_AGE_DAYS,
+                'max_messages': CHAT_RETENTION_DEFAULT_MAX_MESSAGES, 'is_default': True}
+    return {'max_age_days': policy.max_age_days, 'max_messages': policy.max_messages, 'is_default': False}
+
+def set_chat_retention_policy(workspace_id, user_id, max_age_days, max_messages):
+    """Sets a workspace's chat limits (owner only). 0 or None switches a limit off."""
+    limits = {}
+    for label, value in (("Maximum message age", max_age_days), ("Maximum number of messages", max_messages)):
+        try:
+            value = int(value or 0)
+        except (TypeError, ValueError) as error:
+            raise ValidationError(f"{label} must be a whole number.") from error
+        if value < 0:
+            raise ValidationError(f"{label} cannot be negative.")
+        limits[label] = value or None
+
+    session = create_database_connection()
+    try:
+        if get_workspace_owner_user_id(workspace_id, session) != user_id:
+            raise PermissionDeniedError("Only the workspace owner can change how long chat history is kept.")
+        policy = session.get(ChatRetentionPolicy, workspace_id) or ChatRetentionPolicy(workspace_id=workspace_id)
+        policy.max_age_days = limits["Maximum message age"]
+        policy.max_messages = limits["Maximum number of messages"]
+        policy.updated_at = datetime.datetime.now().isoformat()
+        session.add(policy)
+        session.commit()
+        return True
+    except SQLAlchemyError as error:
+        session.rollback()
+        raise DataAccessError(f"Failed to save the chat retention policy: {error}") from error
+    finally:
+        session.close()
+
+def _chat_archive_boundary_id(connection, workspace_id, policy, now):
+    """Messages of workspace_id with an id below the returned one fall outside policy (None: none do)."""
+    in_workspace = WorkspaceMessage.workspace_id == workspace_id
+    boundaries = []
+    if policy['max_messages']:
+        oldest_kept_id = connection.execute(
+            sqlalchemy.select(WorkspaceMessage.id).where(in_workspace)
+            .order_by(WorkspaceMessage.id.desc()).offset(policy['max_messages'] - 1).limit(1)
+        ).scalar()
+        if oldest_kept_id is not None:
+            boundaries.append(oldest_kept_id)
+    if policy['max_age_days']:
+        cutoff = (now - datetime.timedelta(days=policy['max_age_days'])).isoformat()
+        # Ids grow with posting time, so the first message at or after the cutoff bounds the old ones.
+        # Served by idx_workspace_messages_workspace_id_timestamp, which stops at the first match.
+        first_recent_id = connection.execute(
+            sqlalchemy.select(WorkspaceMessage.id).where(in_workspace, WorkspaceMessage.timestamp >= cutoff)
+            .order_by(WorkspaceMessage.timestamp.asc(), WorkspaceMessage.id.asc()).limit(1)
+        ).scalar()
+        if first_recent_id is None:
+            newest_id = connection.execute(sqlalchemy.select(func.max(WorkspaceMessage.id)).where(in_workspace)).scalar()
+            first_recent_id = newest_id + 1 if newest_id is not None else None
+        if first_recent_id is not None:
+            boundaries.append(first_recent_id)
+    return max(boundaries) if boundaries else None
+
+def chat_archive_path(directory, workspace_id, month):
+    return os.path.join(directory, str(workspace_id), f"{month}.jsonl.gz")
+
+def _append_to_chat_archive(directory, workspace_id, messages):
+    """
+    Appends messages to the archive file of the month each was posted in, as one JSON object per
+    line. Each call adds a gzip member to the file (gzip readers and zcat read them all as one
+    stream) and is fsynced before returning. Returns the paths written.
+    """
+    messages_by_month = {}
+    for message in messages:
+        messages_by_month.setdefault(message['timestamp'][:7], []).append(message)
+    os.makedirs(os.path.join(directory, str(workspace_id)), exist_ok=True)
+    written_paths = []
+    for month, month_messages in messages_by_month.items():
+        archive_path = chat_archive_path(directory, workspace_id, month)
+        payload = "".join(json.dumps(message) + "\n" for message in month_messages).encode("utf-8")
+        with open(archive_path, "ab") as archive_file:
+            archive_file.write(gzip.compress(payload))
+            archive_file.flush()
+            os.fsync(archive_file.fileno())
+        written_paths.append(archive_path)
+    return written_paths
+
+def archive_workspace_chat(workspace_id, directory=CHAT_ARCHIVE_DIRECTORY, batch_size=CHAT_ARCHIVE_BATCH_SIZE, dry_run=False, now=None):
+    """
+    Moves a workspace's messages that fall outside its retention policy (older than max_age_days,
+    or beyond the newest max_messages) into gzip'd JSONL files, <directory>/<workspace_id>/<YYYY-MM>.jsonl.gz,
+    oldest first and batch_size at a time. A batch is written and synced to the archive before it
+    is deleted, so an interrupted run can at worst archive a batch twice (the copies share their
+    message id), never lose it. Returns {'archived', 'batches', 'archive_paths'}.
+    """
+    policy = get_chat_retention_policy(workspace_id)
+    now = now or datetime.datetime.now()
+    stats = {'archived': 0, 'batches': 0, 'archive_paths': []}
+    try:
+        with engine.connect() as connection:
+            boundary_id = _chat_archive_boundary_id(connection, workspace_id, policy, now)
+            if boundary_id is None:
+                return stats
+            if dry_run:
+                stats['archived'] = connection.execute(
+                    sqlalchemy.select(func.count(WorkspaceMessage.id))
+                    .where(WorkspaceMessage.workspace_id == workspace_id, WorkspaceMessage.id < boundary_id)
+                ).scalar()
+                return stats
+
+        archive_paths = set()
+        while True:
+            with engine.begin() as connection:
+                batch = connection.execute(
+                    sqlalchemy.select(
+                        WorkspaceMessage.id, WorkspaceMessage.user_id, User.name.label("user_name"),
+                        WorkspaceMessage.content, WorkspaceMessage.timestamp
+                    ).outerjoin(User, WorkspaceMessage.user_id == User.id)
+                    .where(WorkspaceMessage.workspace_id == workspace_id, WorkspaceMessage.id < boundary_id)
+                    .order_by(WorkspaceMessage.id.asc()).limit(batch_size)
+                ).mappings().all()
+                if not batch:
+                    break
+                archive_paths.update(_append_to_chat_archive(directory, workspace_id, [dict(message) for message in batch]))
+                connection.execute(
+                    sqlalchemy.delete(WorkspaceMessage).where(WorkspaceMessage.id.in_([message['id'] for message in batch]))
+                )
+            stats['archived'] += len(batch)
+            stats['batches'] += 1
+        stats['archive_paths'] = sorted(archive_paths)
+    except SQLAlchemyError as error:
+        raise DataAccessError(f"Chat archiving for workspace {workspace_id} stopped after {stats['archived']} messages: {error}") from error
+    if stats['archived']:
+        # Open chat windows drop the history they hold and reload the latest messages.
+        publish_workspace_event(workspace_id, "chat", "chat_cleared")
+    return stats
+
+def read_chat_archive(workspace_id, month, directory=CHAT_ARCHIVE_DIRECTORY):
+    """Messages archived for a workspace in a month ("YYYY-MM"), oldest first, without duplicates."""
+    archive_path = chat_archive_path(directory, workspace_id, month)
+    if not os.path.isfile(archive_path):
+        return []
+    messages_by_id = {}
+    with gzip.open(archive_path, "rt", encoding="utf-8") as archive_file:
+        for line in archive_file:
+            message = json.loads(line)
+            messages_by_id[message['id']] = message
+    return [messages_by_id[message_id] for message_id in sorted(messages_by_id)]
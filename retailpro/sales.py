@@ -0,0 +1,331 @@
+import csv
+import datetime
+import json
+import time
+
+import sqlalchemy
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from retailpro.cache import bump_workspace_data_version
+from retailpro.db import create_database_connection, format_sale_timestamp
+from retailpro.errors import DataAccessError, InsufficientStockError, ValidationError
+from retailpro.events import publish_workspace_event
+from retailpro.models import DailySalesRollup, Inventory, Sale, SaleItem
+from retailpro.workspaces import require_workspace_member
+
+
+def rebuild_daily_sales_rollup(connection, workspace_id=None):
+    """
+    Recomputes daily_sales_rollup from sales/sale_items in a single INSERT ... SELECT,
+    either for one workspace or for the whole database. Returns the number of rollup rows written.
+    """
+    rollup_table = DailySalesRollup.__table__
+    delete_statement = rollup_table.delete()
+    if workspace_id is not None:
+        delete_statement = delete_statement.where(rollup_table.c.workspace_id == workspace_id)
+    connection.execute(delete_statement)
+
+    sale_date = func.substr(Sale.sale_datetime, 1, 10)
+    source = sqlalchemy.select(
+        Sale.workspace_id,
+        SaleItem.inventory_item_id,
+        sale_date,
+        func.sum(SaleItem.quantity_sold),
+        func.sum(SaleItem.subtotal)
+    ).join(SaleItem, SaleItem.sale_id == Sale.id)
+    if workspace_id is not None:
+        source = source.where(Sale.workspace_id == workspace_id)
+    source = source.group_by(Sale.workspace_id, SaleItem.inventory_item_id, sale_date)
+    result = connection.execute(rollup_table.insert().from_select(
+        ['workspace_id', 'inventory_item_id', 'sale_date', 'units_sold', 'revenue'], source
+    ))
+    return result.rowcount
+
+def apply_daily_sales_rollup(session, workspace_id, sale_date, line_items):
+    """
+    Adds (inventory_item_id, units, revenue) line items onto the workspace's rollup rows
+    for sale_date, inside the caller's transaction.
+    """
+    totals = {}
+    for inventory_item_id, units, revenue in line_items:
+        item_units, item_revenue = totals.get(inventory_item_id, (0, 0.0))
+        totals[inventory_item_id] = (item_units + units, item_revenue + revenue)
+    if not totals:
+        return
+    rows = [
+        {'workspace_id': workspace_id, 'inventory_item_id': item_id, 'sale_date': sale_date,
+         'units_sold': units, 'revenue': revenue}
+        for item_id, (units, revenue) in totals.items()
+    ]
+    dialect_insert = postgresql.insert if session.get_bind().dialect.name == "postgresql" else sqlite_insert
+    insert_statement = dialect_insert(DailySalesRollup).values(rows)
+    session.execute(insert_statement.on_conflict_do_update(
+        index_elements=['workspace_id', 'inventory_item_id', 'sale_date'],
+        set_={
+            'units_sold': DailySalesRollup.units_sold + insert_statement.excluded.units_sold,
+            'revenue': DailySalesRollup.revenue + insert_statement.excluded.revenue,
+        }
+    ))
+
+def reserve_inventory_stock(session, workspace_id, requested_quantities, item_names=None):
+    """
+    Validates and decrements stock for {inventory_item_id: quantity} inside the caller's
+    transaction. All items are fetched with one IN query and checked in memory; each
+    decrement is a conditional UPDATE (stock_level >= quantity), so two tills selling
+    the last unit at the same time cannot both succeed. Raises InsufficientStockError on any shortfall.
+    """
+    item_names = item_names or {}
+    stock_rows = {
+        row.id: row for row in session.query(Inventory.id, Inventory.stock_level, Inventory.name, Inventory.is_active).filter(
+            Inventory.workspace_id == workspace_id,
+            Inventory.id.in_(list(requested_quantities))
+        ).all()
+    }
+    for item_id, quantity in requested_quantities.items():
+        stock_info = stock_rows.get(item_id)
+        item_name = item_names.get(item_id, stock_info.name if stock_info else item_id)
+        if stock_info is None:
+            raise InsufficientStockError(f"Product '{item_name}' (ID: {item_id}) not found in this workspace.")
+        if not stock_info.is_active:
+            raise InsufficientStockError(f"Product '{item_name}' is currently inactive and cannot be sold.")
+        if stock_info.stock_level < quantity:
+            raise InsufficientStockError(f"Not enough stock for '{item_name}'. Available: {stock_info.stock_level}, Requested: {quantity}.")
+
+    for item_id, quantity in requested_quantities.items():
+        result = session.execute(
+            sqlalchemy.update(Inventory)
+            .where(
+                Inventory.id == item_id,
+                Inventory.workspace_id == workspace_id,
+                Inventory.is_active == True,
+                Inventory.stock_level >= quantity
+            )
+            .values(stock_level=Inventory.stock_level - quantity)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            raise InsufficientStockError(f"Not enough stock for '{item_names.get(item_id, stock_rows[item_id].name)}'. It was sold elsewhere while this order was open; please check the stock level and try again.")
+
+def record_new_sale(workspace_id, recorded_by_user_id, cart_items, total_sale_amount):
+    session = create_database_connection()
+    try:
+        require_workspace_member(recorded_by_user_id, workspace_id, "record sales in", session)
+
+        requested_quantities = {}
+        item_names = {}
+        for item_in_cart in cart_items:
+            requested_quantities[item_in_cart['id']] = requested_quantities.get(item_in_cart['id'], 0) + item_in_cart['quantity']
+            item_names[item_in_cart['id']] = item_in_cart['name']
+        reserve_inventory_stock(session, workspace_id, requested_quantities, item_names)
+
+        sale_timestamp = datetime.datetime.now()
+        new_sale = Sale(
+            workspace_id=workspace_id,
+            recorded_by_user_id=recorded_by_user_id,
+            sale_datetime=format_sale_timestamp(sale_timestamp),
+            total_amount=total_sale_amount
+        )
+        session.add(new_sale)
+        session.flush()
+
+        session.execute(sqlalchemy.insert(SaleItem), [
+            {
+                'sale_id': new_sale.id,
+                'inventory_item_id': item_in_cart['id'],
+                'quantity_sold': item_in_cart['quantity'],
+                'price_per_unit_at_sale': item_in_cart['price_unit'],
+                'discount_percentage': item_in_cart.get('discount', 0.0),
+                'subtotal': item_in_cart['subtotal']
+            }
+            for item_in_cart in cart_items
+        ])
+
+        apply_daily_sales_rollup(session, workspace_id, sale_timestamp.date().isoformat(), [
+            (item_in_cart['id'], item_in_cart['quantity'], item_in_cart['subtotal']) for item_in_cart in cart_items
+        ])
+        session.commit()
+        bump_workspace_data_version(workspace_id)
+        publish_workspace_event(workspace_id, "sales", "inventory")
+        return True
+    except SQLAlchemyError as error:
+        session.rollback()
+        raise DataAccessError(f"Database Error: Failed to record sale: {error}") from error
+    finally:
+        session.close()
+
+
+BULK_SALES_CSV_COLUMNS = ["sale_ref", "sale_datetime", "inventory_item_id", "quantity", "price_per_unit"]
+
+def _parse_bulk_sale_item(raw_item, source_label):
+    if not isinstance(raw_item, dict):
+        raise ValidationError(f"{source_label}: each line item must be a JSON object.")
+    try:
+        quantity = int(raw_item['quantity'])
+        price_per_unit = float(raw_item['price_per_unit'])
+        discount = float(raw_item.get('discount_percentage') or 0.0)
+        subtotal = raw_item.get('subtotal')
+        subtotal = float(subtotal) if subtotal not in (None, "") else quantity * price_per_unit * (1 - discount / 100)
+        item = {
+            'inventory_item_id': int(raw_item['inventory_item_id']),
+            'quantity_sold': quantity,
+            'price_per_unit_at_sale': price_per_unit,
+            'discount_percentage': discount,
+            'subtotal': subtotal
+        }
+    except (KeyError, TypeError, ValueError) as error:
+        raise ValidationError(f"{source_label}: invalid line item ({error}).") from error
+    if quantity <= 0:
+        raise ValidationError(f"{source_label}: quantity must be positive.")
+    return item
+
+def _build_bulk_sale(sale_datetime, items, total_amount, source_label):
+    try:
+        sale_timestamp = datetime.datetime.fromisoformat(str(sale_datetime))
+    except ValueError as error:
+        raise ValidationError(f"{source_label}: '{sale_datetime}' is not an ISO date/time.") from error
+    if not items:
+        raise ValidationError(f"{source_label}: a sale needs at least one line item.")
+    if total_amount in (None, ""):
+        total_amount = sum(item['subtotal'] for item in items)
+    return {'sale_datetime': format_sale_timestamp(sale_timestamp), 'total_amount': float(total_amount), 'items': items}
+
+def iter_bulk_sales_file(source_path):
+    """
+    Streams sales from a JSONL or CSV file without loading it into memory.
+
+    JSONL: one sale per line, e.g.
+        {"sale_datetime": "2024-03-01T10:15:00", "total_amount": 40.0,
+         "items": [{"inventory_item_id": 3, "quantity": 2, "price_per_unit": 20.0}]}
+    CSV: one line item per row with the columns in BULK_SALES_CSV_COLUMNS (plus optional
+    discount_percentage, subtotal and total_amount). Consecutive rows sharing a sale_ref
+    form one sale.
+    """
+    if source_path.lower().endswith((".jsonl", ".ndjson")):
+        with open(source_path, encoding="utf-8") as source_file:
+            for line_number, line in enumerate(source_file, start=1):
+                if not line.strip():
+                    continue
+                source_label = f"line {line_number}"
+                try:
+                    raw_sale = json.loads(line)
+                except json.JSONDecodeError as error:
+                    raise ValidationError(f"{source_label}: invalid JSON ({error}).") from error
+                if not isinstance(raw_sale, dict):
+                    raise ValidationError(f"{source_label}: expected a JSON object.")
+                raw_items = raw_sale.get('items', [])
+                if not isinstance(raw_items, list):
+                    raise ValidationError(f"{source_label}: 'items' must be a list of line items.")
+                items = [_parse_bulk_sale_item(raw_item, source_label) for raw_item in raw_items]
+                yield _build_bulk_sale(raw_sale.get('sale_datetime'), items, raw_sale.get('total_amount'), source_label)
+    elif source_path.lower().endswith(".csv"):
+        with open(source_path, newline="", encoding="utf-8") as source_file:
+            reader = csv.DictReader(source_file)
+            missing_columns = [column for column in BULK_SALES_CSV_COLUMNS if column not in (reader.fieldnames or [])]
+            if missing_columns:
+                raise ValidationError(f"CSV is missing required columns: {', '.join(missing_columns)}.")
+            current_ref, current_row = None, None
+            current_items = []
+            for row_number, row in enumerate(reader, start=2):
+                if current_ref is not None and row['sale_ref'] != current_ref:
+                    yield _build_bulk_sale(current_row['sale_datetime'], current_items, current_row.get('total_amount'), f"sale '{current_ref}'")
+                    current_items = []
+                current_ref, current_row = row['sale_ref'], row
+                current_items.append(_parse_bulk_sale_item(row, f"row {row_number}"))
+            if current_items:
+                yield _build_bulk_sale(current_row['sale_datetime'], current_items, current_row.get('total_amount'), f"sale '{current_ref}'")
+    else:
+        raise ValidationError("Unsupported file type. Use a .csv or .jsonl file.")
+
+def _ingest_bulk_sales_chunk(session, workspace_id, recorded_by_user_id, sales_chunk, adjust_stock):
+    requested_quantities = {}
+    for sale in sales_chunk:
+        for item in sale['items']:
+            requested_quantities[item['inventory_item_id']] = requested_quantities.get(item['inventory_item_id'], 0) + item['quantity_sold']
+
+    if adjust_stock:
+        reserve_inventory_stock(session, workspace_id, requested_quantities)
+    else:
+        known_item_ids = set(session.execute(
+            sqlalchemy.select(Inventory.id).where(Inventory.workspace_id == workspace_id, Inventory.id.in_(list(requested_quantities)))
+        ).scalars())
+        unknown_item_ids = sorted(set(requested_quantities) - known_item_ids)
+        if unknown_item_ids:
+            raise ValidationError(f"Products not found in this workspace: {', '.join(str(item_id) for item_id in unknown_item_ids)}.")
+
+    sale_ids = session.execute(
+        sqlalchemy.insert(Sale).returning(Sale.id, sort_by_parameter_order=True),
+        [
+            {'workspace_id': workspace_id, 'recorded_by_user_id': recorded_by_user_id,
+             'sale_datetime': sale['sale_datetime'], 'total_amount': sale['total_amount']}
+            for sale in sales_chunk
+        ]
+    ).scalars().all()
+
+    sale_item_rows = []
+    rollup_items_by_date = {}
+    for sale_id, sale in zip(sale_ids, sales_chunk):
+        sale_date = sale['sale_datetime'][:10]
+        for item in sale['items']:
+            sale_item_rows.append(dict(item, sale_id=sale_id))
+            rollup_items_by_date.setdefault(sale_date, []).append(
+                (item['inventory_item_id'], item['quantity_sold'], item['subtotal'])
+            )
+    session.execute(sqlalchemy.insert(SaleItem), sale_item_rows)
+    for sale_date, line_items in rollup_items_by_date.items():
+        apply_daily_sales_rollup(session, workspace_id, sale_date, line_items)
+    return len(sale_item_rows)
+
+def bulk_import_sales(source_path, workspace_id, recorded_by_user_id, chunk_size=500, adjust_stock=True, progress_callback=None):
+    """
+    Imports historical or offline-till sales from a CSV/JSONL file (see iter_bulk_sales_file).
+    Each chunk of sales is written in its own transaction with executemany inserts, stock is
+    validated per chunk in aggregate (skip with adjust_stock=False for history that should not
+    touch current stock), and the daily rollup is updated alongside. Chunks committed before a
+    failing chunk stay imported; the error is raised as ValidationError (bad rows, stock shortfalls,
+    no access) or DataAccessError.
+    Returns throughput statistics.
+    """
+    if chunk_size < 1:
+        raise ValidationError("chunk_size must be at least 1.")
+    require_workspace_member(recorded_by_user_id, workspace_id, "record sales in")
+
+    stats = {'sales_imported': 0, 'line_items_imported': 0, 'chunks': 0}
+    started_at = time.perf_counter()
+
+    def write_chunk(sales_chunk):
+        session = create_database_connection()
+        try:
+            line_items_written = _ingest_bulk_sales_chunk(session, workspace_id, recorded_by_user_id, sales_chunk, adjust_stock)
+            session.commit()
+        except ValidationError:
+            session.rollback()
+            raise
+        except SQLAlchemyError as error:
+            session.rollback()
+            raise DataAccessError(f"Import failed after {stats['sales_imported']} sales: {error}") from error
+        finally:
+            session.close()
+        bump_workspace_data_version(workspace_id)
+        publish_workspace_event(workspace_id, "sales", "inventory")
+        stats['sales_imported'] += len(sales_chunk)
+        stats['line_items_imported'] += line_items_written
+        stats['chunks'] += 1
+        if progress_callback:
+            progress_callback(dict(stats, elapsed_seconds=time.perf_counter() - started_at))
+
+    sales_chunk = []
+    for sale in iter_bulk_sales_file(source_path):
+        sales_chunk.append(sale)
+        if len(sales_chunk) >= chunk_size:
+            write_chunk(sales_chunk)
+            sales_chunk = []
+    if sales_chunk:
+        write_chunk(sales_chunk)
+
+    elapsed_seconds = time.perf_counter() - started_at
+    stats['elapsed_seconds'] = elapsed_seconds
+    stats['sales_per_second'] = stats['sales_imported'] / elapsed_seconds if elapsed_seconds > 0 else 0.0
+    return stats
@@ -0,0 +1,83 @@
+import sqlalchemy
+from sqlalchemy import Integer, String, literal_column
+
+from retailpro.models import Inventory
+
+# Full-text index over inventory names: an SQLite FTS5 table using the trigram tokenizer (SQLite 3.34+),
+# so any substring of 3+ characters is an index lookup instead of a LIKE scan. rowid mirrors inventory.id.
+# Other backends, or SQLite builds without FTS5, fall back to ILIKE.
+inventory_search_table = sqlalchemy.table(
+    "inventory_search",
+    sqlalchemy.column("rowid", Integer),
+    sqlalchemy.column("name", String),
+    sqlalchemy.column("workspace_id", Integer),
+    sqlalchemy.column("rank"),
+)
+INVENTORY_SEARCH_MIN_TERM_LENGTH = 3
+INVENTORY_SEARCH_FUZZY_MIN_SIMILARITY = 0.5
+_inventory_search_status = {'available': None}
+
+def rebuild_inventory_search_index(connection):
+    """(Re)creates inventory_search and fills it from inventory. Returns the number of items indexed, or None if FTS5 is unavailable."""
+    _inventory_search_status['available'] = None
+    if connection.dialect.name != "sqlite":
+        return None
+    try:
+        connection.execute(sqlalchemy.text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS inventory_search "
+            "USING fts5(name, workspace_id UNINDEXED, tokenize='trigram')"
+        ))
+    except sqlalchemy.exc.OperationalError:
+        return None
+    connection.execute(inventory_search_table.delete())
+    result = connection.execute(inventory_search_table.insert().from_select(
+        ['rowid', 'name', 'workspace_id'],
+        sqlalchemy.select(Inventory.id, Inventory.name, Inventory.workspace_id)
+    ))
+    return result.rowcount
+
+def inventory_search_available(session):
+    """True when the inventory_search FTS5 table exists on this database (checked once per process)."""
+    if _inventory_search_status['available'] is None:
+        bind = session.get_bind()
+        _inventory_search_status['available'] = bind.dialect.name == "sqlite" and session.execute(sqlalchemy.text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'inventory_search'"
+        )).first() is not None
+    return _inventory_search_status['available']
+
+def sync_inventory_search_entry(session, item):
+    """Mirrors an inventory item's name into inventory_search inside the caller's transaction."""
+    if not inventory_search_available(session):
+        return
+    session.execute(inventory_search_table.delete().where(inventory_search_table.c.rowid == item.id))
+    session.execute(inventory_search_table.insert().values(rowid=item.id, name=item.name, workspace_id=item.workspace_id))
+
+def _inventory_search_phrase(search_term):
+    """Quotes a term as an FTS5 phrase, so it matches as a literal substring whatever characters it contains."""
+    return '"' + search_term.replace('"', '""') + '"'
+
+def _inventory_search_trigrams_query(search_term):
+    """FTS5 query matching names that share any trigram with the term, used for typo-tolerant lookup."""
+    lowered = search_term.lower()
+    trigrams = dict.fromkeys(lowered[i:i + 3] for i in range(len(lowered) - 2))
+    return " OR ".join(_inventory_search_phrase(trigram) for trigram in trigrams)
+
+def _inventory_search_ids(workspace_id, match_query):
+    """Select of inventory ids whose name matches an FTS5 query, best bm25 rank first."""
+    return (
+        sqlalchemy.select(inventory_search_table.c.rowid)
+        .where(literal_column("inventory_search").op("MATCH")(match_query))
+        .where(inventory_search_table.c.workspace_id == workspace_id)
+        .order_by(inventory_search_table.c.rank)
+    )
+
+def inventory_name_matches(session, workspace_id, search_term):
+    """
+    Filter criterion for inventory names containing search_term, served by inventory_search when
+    possible. It only narrows the browse list: the Inventory page keeps its (name, id) order and
+    keyset paging, so there is no bm25 ranking or trigram fallback here. Ranked, typo-tolerant
+    lookup is inventory.search_products.
+    """
+    if len(search_term) >= INVENTORY_SEARCH_MIN_TERM_LENGTH and inventory_search_available(session):
+        return Inventory.id.in_(_inventory_search_ids(workspace_id, _inventory_search_phrase(search_term)))
+    return Inventory.name.ilike(f"%{search_term}%")
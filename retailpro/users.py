@@ -0,0 +1,74 @@
+import re
+
+import bcrypt
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+
+from retailpro.db import create_database_connection, row_to_dict
+from retailpro.errors import DataAccessError, NotFoundError, ValidationError
+from retailpro.models import User
+
+
+def hash_user_password(password):
+    if not password: return None
+    try: return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    except Exception: return None
+
+def check_user_password(plain_password, hashed_password_bytes):
+    if not plain_password or not hashed_password_bytes: return False
+    try: return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password_bytes)
+    except Exception: return False
+
+def password_meet_req(password):
+    errors = []
+    if len(password) < 8: errors.append("min 8 characters")
+    if not any(char.isupper() for char in password): errors.append("1 uppercase letter")
+    if not any(char.isdigit() for char in password): errors.append("1 number")
+    if not errors: return True, ""
+    return False, "Password must contain: " + ", ".join(errors) + "."
+
+def is_email_valid(email):
+    if not email: return False
+    return re.match(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$", email) is not None
+
+def find_user_by_email_in_db(email, db_conn_to_use=None):
+    session = db_conn_to_use if db_conn_to_use else create_database_connection()
+    try:
+        return row_to_dict(session.query(User).filter(func.lower(User.email) == email.lower()).first())
+    except SQLAlchemyError as error:
+        raise DataAccessError(f"DB error finding user: {error}") from error
+    finally:
+        if not db_conn_to_use:
+            session.close()
+
+def find_user_by_id_in_db(user_id, db_conn_to_use=None):
+    session = db_conn_to_use if db_conn_to_use else create_database_connection()
+    try:
+        return row_to_dict(session.query(User).filter_by(id=user_id).first())
+    except SQLAlchemyError as error:
+        raise DataAccessError(f"DB error finding user by ID: {error}") from error
+    finally:
+        if not db_conn_to_use:
+            session.close()
+
+def update_user_password_in_db(email, new_password):
+    hashed_pw = hash_user_password(new_password)
+    if not hashed_pw:
+        raise ValidationError("Failed to update password: Password hashing failed.")
+    session = create_database_connection()
+    try:
+        user_to_update = session.query(User).filter(func.lower(User.email) == email.lower()).first()
+        if not user_to_update:
+            raise NotFoundError("Could not find user to update password.")
+        user_to_update.password_hash = hashed_pw
+        session.commit()
+        return True
+    except SQLAlchemyError as error:
+        session.rollback()
+        raise DataAccessError(f"DB Error: Failed to update password: {error}") from error
+    finally:
+        session.close()
+
+def check_if_user_exists(user_id, db_conn):
+    user = db_conn.query(User).filter_by(id=user_id).first()
+    return user is not None
@@ -0,0 +1,385 @@
+import datetime
+
+from sqlalchemy import and_, or_, literal_column
+from sqlalchemy.exc import IntegrityError as SQLAlchemyIntegrityError, SQLAlchemyError
+
+from retailpro.cache import cached_membership_lookup, invalidate_membership_cache
+from retailpro.db import (create_database_connection, row_to_dict, is_unique_violation,
+                          is_foreign_key_violation, is_not_null_violation)
+from retailpro.errors import ConflictError, DataAccessError, NotFoundError, PermissionDeniedError, ValidationError
+from retailpro.events import publish_user_event, publish_workspace_event
+from retailpro.models import User, Workspace, WorkspaceMember
+from retailpro.users import find_user_by_email_in_db, find_user_by_id_in_db
+
+
+def rename_workspace(workspace_id, new_name, user_id):
+    """Renames a workspace after verifying the user is the owner."""
+    if not new_name or not new_name.strip():
+        raise ValidationError("Workspace name cannot be empty.")
+
+    session = create_database_connection()
+    try:
+        workspace = session.query(Workspace).filter_by(id=workspace_id).first()
+
+        if not workspace:
+            raise NotFoundError("Workspace not found.")
+
+        if workspace.owner_user_id != user_id:
+            raise PermissionDeniedError("You are not authorized to rename this workspace.")
+
+        workspace.name = new_name.strip()
+        session.commit()
+        invalidate_membership_cache(workspace_id=workspace_id)
+        publish_workspace_event(workspace_id, "members")
+        return True
+    except SQLAlchemyError as error:
+        session.rollback()
+        raise DataAccessError(f"An error occurred while renaming the workspace: {error}") from error
+    finally:
+        session.close()
+
+def create_new_workspace(name, owner_user_id):
+    session = create_database_connection()
+    try:
+        new_workspace = Workspace(
+            name=name,
+            owner_user_id=owner_user_id,
+            created_at=datetime.datetime.now().isoformat()
+        )
+        session.add(new_workspace)
+        session.commit()
+        workspace_id = new_workspace.id
+    except SQLAlchemyError as error:
+        session.rollback()
+        raise DataAccessError(f"DB Error: Failed to create workspace: {error}") from error
+    finally:
+        session.close()
+
+    add_workspace_team_member(workspace_id, owner_user_id, owner_user_id, role='owner', status='accepted')
+    return workspace_id
+
+
+def add_workspace_team_member(workspace_id, user_id, invited_by_user_id, role='member', invite_email=None, invite_token=None, status='pending'):
+    session = create_database_connection()
+    try:
+        joined_at = datetime.datetime.now().isoformat() if status == 'accepted' else None
+        actual_invitee_user_id = user_id
+
+        if invite_email and not actual_invitee_user_id:
+            invited_user_obj = find_user_by_email_in_db(invite_email, session)
+            if invited_user_obj:
+                actual_invitee_user_id = invited_user_obj['id']
+                existing_member = session.query(WorkspaceMember).filter(
+                    WorkspaceMember.workspace_id == workspace_id,
+                    WorkspaceMember.user_id == actual_invitee_user_id,
+                    or_(
+                        WorkspaceMember.status == 'accepted',
+                        and_(WorkspaceMember.status == 'pending', WorkspaceMember.invite_token != None)
+                    )
+                ).first()
+                if existing_member:
+                    raise ConflictError(f"User {invite_email} is already an accepted member or has a pending invitation for this workspace.")
+
+        new_member_data = {
+            'workspace_id': workspace_id,
+            'role': role,
+            'invited_by_user_id': invited_by_user_id,
+            'status': status,
+            'joined_at': joined_at,
+            'invite_email': invite_email,
+            'invite_token': invite_token,
+            'user_id': actual_invitee_user_id
+        }
+
+        if actual_invitee_user_id:
+            new_member = WorkspaceMember(**new_member_data)
+        elif invite_email and invite_token:
+            new_member_data.pop('user_id')
+            new_member_data.pop('joined_at')
+            new_member = WorkspaceMember(**new_member_data)
+        else:
+            raise ValidationError("Cannot add member: Insufficient information for add_workspace_team_member.")
+
+        session.add(new_member)
+        session.commit()
+        invalidate_membership_cache(workspace_id=workspace_id, user_id=actual_invitee_user_id)
+        publish_workspace_event(workspace_id, "members")
+        if actual_invitee_user_id:
+            publish_user_event(actual_invitee_user_id)
+        return True
+
+    except SQLAlchemyIntegrityError as error:
+        session.rollback()
+        if is_unique_violation(error, "ix_workspace_members_invite_token", ["workspace_members.invite_token"]):
+            raise ConflictError("Failed to add member: This invitation token has already been used or generated.") from error
+        elif (is_unique_violation(error, "idx_workspace_user_accepted_unique", ["workspace_members.workspace_id", "workspace_members.user_id"])
+              or is_unique_violation(error, "idx_workspace_user_pending_unique", ["workspace_members.workspace_id", "workspace_members.user_id"])):
+            raise ConflictError("This user is already an active or pending member of the workspace.") from error
+        elif is_unique_violation(error, "idx_workspace_pending_email_unique", ["workspace_members.workspace_id", "workspace_members.invite_email"]):
+            raise ConflictError(f"A pending invitation already exists for {invite_email} in this workspace.") from error
+        elif is_foreign_key_violation(error):
+            raise ValidationError(f"Failed to add member: Invalid workspace or user reference. Details: {error.orig}") from error
+        elif is_not_null_violation(error, "user_id"):
+            raise DataAccessError(f"DB Integrity Error: User ID was null when it shouldn't be. Check logic. Error: {error.orig}") from error
+        raise DataAccessError(f"DB Integrity Error: Failed to add workspace member: {error.orig}") from error
+    except SQLAlchemyError as error:
+        session.rollback()
+        raise DataAccessError(f"DB Error: Failed to add workspace member: {error}") from error
+    finally:
+        session.close()
+
+
+def _require_workspace_owner(session, workspace_id, user_id, action):
+    actual_owner_id = get_workspace_owner_user_id(workspace_id, db_conn_to_use=session)
+    if actual_owner_id is None:
+        raise NotFoundError("Workspace not found or error fetching owner information.")
+    if actual_owner_id != user_id:
+        raise PermissionDeniedError(f"You are not authorized to {action} this workspace.")
+
+def remove_workspace_member(workspace_id_to_modify, member_user_id_to_remove, current_user_id_acting):
+    session = create_database_connection()
+    try:
+        _require_workspace_owner(session, workspace_id_to_modify, current_user_id_acting, "remove members from")
+
+        if member_user_id_to_remove == current_user_id_acting:
+            raise PermissionDeniedError("Owners cannot remove themselves from the workspace using this feature.")
+
+        member_to_delete = session.query(WorkspaceMember).filter_by(
+            workspace_id=workspace_id_to_modify,
+            user_id=member_user_id_to_remove
+        ).first()
+
+        if not member_to_delete:
+            raise NotFoundError(f"Could not remove member (User ID: {member_user_id_to_remove}). They might not be a member or were already removed.")
+        session.delete(member_to_delete)
+        session.commit()
+        invalidate_membership_cache(workspace_id=workspace_id_to_modify, user_id=member_user_id_to_remove)
+        publish_workspace_event(workspace_id_to_modify, "members")
+        publish_user_event(member_user_id_to_remove)
+        return True
+    except SQLAlchemyError as error:
+        session.rollback()
+        raise DataAccessError(f"Database error while removing member: {error}") from error
+    finally:
+        session.close()
+
+
+def cancel_pending_invite(workspace_id_to_modify, invite_token_to_cancel, current_user_id_acting):
+    session = create_database_connection()
+    try:
+        _require_workspace_owner(session, workspace_id_to_modify, current_user_id_acting, "cancel invitations for")
+
+        invite_to_delete = session.query(WorkspaceMember).filter_by(
+            workspace_id=workspace_id_to_modify,
+            invite_token=invite_token_to_cancel,
+            user_id=None,
+            status='pending'
+        ).first()
+
+        if not invite_to_delete:
+            raise NotFoundError("Could not cancel invitation. It might have already been accepted, cancelled, or the token is invalid.")
+        session.delete(invite_to_delete)
+        session.commit()
+        invalidate_membership_cache(workspace_id=workspace_id_to_modify)
+        publish_workspace_event(workspace_id_to_modify, "members")
+        return True
+    except SQLAlchemyError as error:
+        session.rollback()
+        raise DataAccessError(f"Database error while cancelling invitation: {error}") from error
+    finally:
+        session.close()
+
+@cached_membership_lookup(lambda user_id: (user_id, None))
+def get_user_workspaces_from_db(user_id):
+    session = create_database_connection()
+    try:
+        results = session.query(
+            Workspace.id, Workspace.name, Workspace.owner_user_id, WorkspaceMember.role
+        ).join(WorkspaceMember, Workspace.id == WorkspaceMember.workspace_id).filter(
+            WorkspaceMember.user_id == user_id,
+            WorkspaceMember.status == 'accepted'
+        ).all()
+        return [dict(row._mapping) for row in results]
+    except SQLAlchemyError as error:
+        raise DataAccessError(f"DB Error: Failed to get user workspaces: {error}") from error
+    finally:
+        session.close()
+
+def find_workspace_in_db(workspace_id):
+    session = create_database_connection()
+    try:
+        return row_to_dict(session.query(Workspace).filter_by(id=workspace_id).first())
+    except SQLAlchemyError as error:
+        raise DataAccessError(f"DB Error: Failed to find workspace by ID: {error}") from error
+    finally:
+        session.close()
+
+def get_workspace_member_details(workspace_id):
+    session = create_database_connection()
+    members = []
+    try:
+        accepted_members = session.query(
+            User.id.label('user_id'), User.name, User.email,
+            WorkspaceMember.role, WorkspaceMember.status, WorkspaceMember.joined_at
+        ).join(User, WorkspaceMember.user_id == User.id).filter(
+            WorkspaceMember.workspace_id == workspace_id,
+            WorkspaceMember.status == 'accepted'
+        ).all()
+        members.extend([dict(row._mapping) for row in accepted_members])
+
+        pending_registered = session.query(
+            User.id.label('user_id'), User.name, User.email,
+            WorkspaceMember.role, WorkspaceMember.status, WorkspaceMember.invite_token
+        ).join(User, WorkspaceMember.user_id == User.id).filter(
+            WorkspaceMember.workspace_id == workspace_id,
+            WorkspaceMember.status == 'pending',
+            WorkspaceMember.invite_token != None
+        ).all()
+        members.extend([dict(row._mapping) for row in pending_registered])
+
+        pending_unregistered = session.query(
+            literal_column("null").label('user_id'),
+            literal_column("'(Invited User - Not Registered)'").label('name'),
+            WorkspaceMember.invite_email.label('email'),
+            WorkspaceMember.role,
+            WorkspaceMember.status,
+            WorkspaceMember.invite_token
+        ).filter(
+            WorkspaceMember.workspace_id == workspace_id,
+            WorkspaceMember.status == 'pending',
+            WorkspaceMember.user_id == None,
+            WorkspaceMember.invite_email != None
+        ).all()
+        members.extend([dict(row._mapping) for row in pending_unregistered])
+    except SQLAlchemyError as error:
+        raise DataAccessError(f"DB Error fetching workspace members: {error}") from error
+    finally:
+        session.close()
+    return members
+
+
+def process_workspace_invitation_token(invite_token, accepting_user_id):
+    """
+    Accepts a pending invitation for accepting_user_id. Returns (workspace_id, message); raises
+    NotFoundError for unknown or used tokens and PermissionDeniedError when the invitation was
+    addressed to someone else.
+    """
+    session = create_database_connection()
+    try:
+        invite_details = session.query(
+            WorkspaceMember.id.label('invite_id'),
+            WorkspaceMember.workspace_id,
+            WorkspaceMember.invite_email,
+            WorkspaceMember.user_id
+        ).filter(
+            WorkspaceMember.invite_token == invite_token,
+            WorkspaceMember.status == 'pending'
+        ).first()
+
+        if not invite_details:
+            raise NotFoundError("Invalid or expired invitation token.")
+
+        invite_details_dict = dict(invite_details._mapping)
+        workspace_id_joined = invite_details_dict['workspace_id']
+        invited_original_user_id = invite_details_dict['user_id']
+        invite_id_in_db = invite_details_dict['invite_id']
+
+        accepting_user_obj = find_user_by_id_in_db(accepting_user_id, session)
+        if not accepting_user_obj:
+            raise NotFoundError("Accepting user not found.")
+
+        can_accept = False
+        if invited_original_user_id and invited_original_user_id == accepting_user_id:
+            can_accept = True
+        elif invite_details_dict['invite_email'] and invite_details_dict['invite_email'].lower() == accepting_user_obj['email'].lower():
+            can_accept = True
+
+        if not can_accept:
+            raise PermissionDeniedError("This invitation was intended for a different user or email address.")
+
+        already_member = session.query(WorkspaceMember).filter_by(
+            workspace_id=workspace_id_joined,
+            user_id=accepting_user_id,
+            status='accepted'
+        ).first()
+
+        invite_to_update = session.query(WorkspaceMember).filter_by(id=invite_id_in_db).first()
+
+        if already_member:
+            session.delete(invite_to_update)
+            session.commit()
+            invalidate_membership_cache(workspace_id=workspace_id_joined, user_id=accepting_user_id)
+            publish_workspace_event(workspace_id_joined, "members")
+            return workspace_id_joined, "You are already a member of this workspace."
+
+        if invited_original_user_id is None and invite_details_dict['invite_email']:
+            invite_to_update.user_id = accepting_user_id
+            invite_to_update.status = 'accepted'
+            invite_to_update.joined_at = datetime.datetime.now().isoformat()
+            invite_to_update.invite_token = None
+            invite_to_update.invite_email = accepting_user_obj['email']
+        else:
+            invite_to_update.status = 'accepted'
+            invite_to_update.joined_at = datetime.datetime.now().isoformat()
+            invite_to_update.invite_token = None
+
+        session.commit()
+        invalidate_membership_cache(workspace_id=workspace_id_joined, user_id=accepting_user_id)
+
+        other_pending_invites = session.query(WorkspaceMember).filter(
+            WorkspaceMember.workspace_id == workspace_id_joined,
+            WorkspaceMember.user_id == accepting_user_id,
+            WorkspaceMember.status == 'pending',
+            WorkspaceMember.id != invite_id_in_db
+        ).all()
+        for p_invite in other_pending_invites:
+            session.delete(p_invite)
+        session.commit()
+        publish_workspace_event(workspace_id_joined, "members")
+        publish_user_event(accepting_user_id)
+
+        return workspace_id_joined, "Invitation accepted successfully! You now have access to the workspace."
+
+    except SQLAlchemyError as error:
+        session.rollback()
+        raise DataAccessError(f"DB Error: Failed to process invitation: {error}") from error
+    finally:
+        session.close()
+
+
+def is_user_a_member_of_workspace(user_id, workspace_id, db_conn_to_use=None):
+    """
+    Whether user_id is an accepted member of workspace_id. Access checks are not cached: each one
+    is a single lookup on idx_workspace_user_accepted_unique, so a member removed by any process
+    loses access on the very next check.
+    """
+    session = db_conn_to_use if db_conn_to_use else create_database_connection()
+    try:
+        member = session.query(WorkspaceMember).filter_by(
+            user_id=user_id,
+            workspace_id=workspace_id,
+            status='accepted'
+        ).first()
+        return member is not None
+    except SQLAlchemyError as error:
+        raise DataAccessError(f"DB Error checking workspace membership: {error}") from error
+    finally:
+        if not db_conn_to_use:
+            session.close()
+
+def require_workspace_member(user_id, workspace_id, action, db_conn_to_use=None):
+    """Raises PermissionDeniedError unless user_id is an accepted member; action completes "is not authorized to ... this workspace"."""
+    if not is_user_a_member_of_workspace(user_id, workspace_id, db_conn_to_use):
+        raise PermissionDeniedError(f"User (ID: {user_id}) is not authorized to {action} this workspace (ID: {workspace_id}).")
+
+@cached_membership_lookup(lambda workspace_id, db_conn_to_use=None: (None, workspace_id))
+def get_workspace_owner_user_id(workspace_id, db_conn_to_use=None):
+    session = db_conn_to_use if db_conn_to_use else create_database_connection()
+    try:
+        workspace = session.query(Workspace.owner_user_id).filter_by(id=workspace_id).first()
+        return workspace.owner_user_id if workspace else None
+    except SQLAlchemyError as error:
+        raise DataAccessError(f"DB Error getting workspace owner: {error}") from error
+    finally:
+        if not db_conn_to_use:
+            session.close()
@@ -0,0 +1,77 @@
+"""
+Shared fixtures. Every test runs against its own SQLite file built with db.create_database_engine
+and migrated with start_database, so the app database is never touched. Run from the project
+directory with `python -m pytest -q`.
+"""
+import os
+import sys
+import tempfile
+
+# Point the engine created at import time at a throwaway file before retailpro is imported.
+os.environ["RETAIL_PRO_DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'retail_pro_import.db')}"
+
+import pytest
+
+from retailpro import cache, db, images, migrations, search
+from retailpro.inventory import add_product, get_products
+from retailpro.models import User
+from retailpro.workspaces import create_new_workspace
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """A fresh, migrated database that every retailpro module uses for the duration of the test."""
+    test_engine = db.create_database_engine(f"sqlite:///{tmp_path / 'retail_pro_test.db'}")
+    import_time_engine = db.engine
+    for module_name, module in list(sys.modules.items()):
+        if module_name.startswith("retailpro") and getattr(module, "engine", None) is import_time_engine:
+            monkeypatch.setattr(module, "engine", test_engine)
+    db.SessionLocal.configure(bind=test_engine)
+
+    with cache._analytics_cache_lock:
+        cache._analytics_cache.clear()
+        cache._workspace_data_versions.clear()
+    with cache._membership_cache_lock:
+        cache._membership_cache.clear()
+    with images._image_availability_lock:
+        images._image_availability_cache.clear()
+    search._inventory_search_status['available'] = None
+
+    migrations.start_database()
+    try:
+        yield test_engine
+    finally:
+        db.SessionLocal.configure(bind=import_time_engine)
+        search._inventory_search_status['available'] = None
+        test_engine.dispose()
+
+
+def create_user(name, email=None):
+    """Inserts a user directly (skipping password hashing) and returns its id."""
+    session = db.create_database_connection()
+    try:
+        user = User(email=email or f"{name.lower()}@example.com", password_hash=b"not-a-real-hash", name=name)
+        session.add(user)
+        session.commit()
+        return user.id
+    finally:
+        session.close()
+
+
+def add_item(workspace, name, price=10.0, stock=100):
+    """Adds an active product as the workspace owner and returns it as a dict."""
+    add_product(workspace['id'], name, price, stock, added_by_user_id=workspace['owner_id'])
+    return next(item for item in get_products(workspace['id'], include_inactive=True) if item['name'] == name)
+
+
+def cart_line(item, quantity):
+    """A record_new_sale cart entry selling quantity units of item at its retail price."""
+    return {'id': item['id'], 'name': item['name'], 'quantity': quantity,
+            'price_unit': item['retail_price'], 'subtotal': quantity * item['retail_price']}
+
+
+@pytest.fixture
+def workspace(database):
+    """{'id', 'owner_id'} of a workspace owned by a fresh user."""
+    owner_id = create_user("Owner")
+    return {'id': create_new_workspace("Test Shop", owner_id), 'owner_id': owner_id}
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+import sqlalchemy
+from sqlalchemy import func
+
+from retailpro import db
+from retailpro.errors import InsufficientStockError, ValidationError
+from retailpro.models import Inventory, Sale, SaleItem
+from retailpro.sales import bulk_import_sales, iter_bulk_sales_file
+from tests.conftest import add_item
+
+
+def _write_jsonl(path, sales):
+    path.write_text("\n".join(json.dumps(sale) for sale in sales) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def test_csv_rows_sharing_a_sale_ref_form_one_sale(tmp_path):
+    source_path = tmp_path / "sales.csv"
+    source_path.write_text(
+        "sale_ref,sale_datetime,inventory_item_id,quantity,price_per_unit\n"
+        "a,2024-03-01T10:00:00,1,2,5.0\n"
+        "a,2024-03-01T10:00:00,2,1,3.0\n"
+        "b,2024-03-02T11:00:00,1,1,5.0\n", encoding="utf-8")
+    sales = list(iter_bulk_sales_file(str(source_path)))
+    assert [len(sale['items']) for sale in sales] == [2, 1]
+    assert [sale['total_amount'] for sale in sales] == [13.0, 5.0]
+    assert sales[0]['sale_datetime'] == "2024-03-01T10:00:00.000000"
+
+
+def test_import_writes_sales_in_order_and_decrements_stock(workspace, tmp_path):
+    item = add_item(workspace, "Scarf", price=10.0, stock=10)
+    source_path = _write_jsonl(tmp_path / "sales.jsonl", [
+        {"sale_datetime": f"2024-03-0{day}T10:00:00", "items": [{"inventory_item_id": item['id'], "quantity": day, "price_per_unit": 10.0}]}
+        for day in (1, 2, 3)
+    ])
+    stats = bulk_import_sales(source_path, workspace['id'], workspace['owner_id'], chunk_size=2)
+    assert (stats['sales_imported'], stats['line_items_imported'], stats['chunks']) == (3, 3, 2)
+    with db.engine.connect() as connection:
+        rows = connection.execute(
+            sqlalchemy.select(Sale.sale_datetime, SaleItem.quantity_sold).join(SaleItem, SaleItem.sale_id == Sale.id).order_by(Sale.id)
+        ).all()
+        stock_level = connection.execute(sqlalchemy.select(Inventory.stock_level).where(Inventory.id == item['id'])).scalar()
+    assert [quantity for _, quantity in rows] == [1, 2, 3]
+    assert stock_level == 4
+
+
+def test_chunk_with_a_stock_shortfall_is_rolled_back(workspace, tmp_path):
+    item = add_item(workspace, "Scarf", stock=2)
+    source_path = _write_jsonl(tmp_path / "sales.jsonl", [
+        {"sale_datetime": "2024-03-01T10:00:00", "items": [{"inventory_item_id": item['id'], "quantity": 2, "price_per_unit": 10.0}]},
+        {"sale_datetime": "2024-03-02T10:00:00", "items": [{"inventory_item_id": item['id'], "quantity": 1, "price_per_unit": 10.0}]},
+    ])
+    with pytest.raises(InsufficientStockError):
+        bulk_import_sales(source_path, workspace['id'], workspace['owner_id'], chunk_size=1)
+    with db.engine.connect() as connection:
+        assert connection.execute(sqlalchemy.select(func.count(Sale.id))).scalar() == 1
+
+
+@pytest.mark.parametrize("line, message", [
+    ('[1, 2]', "expected a JSON object"),
+    ('"sale"', "expected a JSON object"),
+    ('{"sale_datetime": "2024-03-01", "items": 5}', "'items' must be a list"),
+    ('{"sale_datetime": "2024-03-01", "items": [3]}', "must be a JSON object"),
+    ('{"sale_datetime": "2024-03-01", "items": [{"inventory_item_id": 1}]}', "invalid line item"),
+    ('{"sale_datetime": "yesterday", "items": [{"inventory_item_id": 1, "quantity": 1, "price_per_unit": 2}]}', "not an ISO date/time"),
+    ('{"sale_datetime": "2024-03-01", "items": []}', "at least one line item"),
+    ('{not json', "invalid JSON"),
+])
+def test_malformed_jsonl_lines_raise_validation_error(tmp_path, line, message):
+    source_path = tmp_path / "sales.jsonl"
+    source_path.write_text(line + "\n", encoding="utf-8")
+    with pytest.raises(ValidationError, match=message):
+        list(iter_bulk_sales_file(str(source_path)))
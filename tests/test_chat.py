@@ -0,0 +1,47 @@
+from retailpro.chat import clear_workspace_chat, get_workspace_messages, post_workspace_message
+
+
+def _post(workspace, count):
+    for number in range(count):
+        post_workspace_message(workspace['id'], workspace['owner_id'], f"message {number}")
+
+
+def test_latest_window_is_the_newest_messages_oldest_first(workspace):
+    _post(workspace, 12)
+    messages = get_workspace_messages(workspace['id'], limit=5)
+    assert [message['content'] for message in messages] == [f"message {number}" for number in range(7, 12)]
+    assert all(message['user_name'] == "Owner" for message in messages)
+
+
+def test_after_id_returns_only_newer_messages(workspace):
+    _post(workspace, 3)
+    last_seen_id = get_workspace_messages(workspace['id'])[-1]['id']
+    assert get_workspace_messages(workspace['id'], after_id=last_seen_id) == []
+    post_workspace_message(workspace['id'], workspace['owner_id'], "late")
+    assert [message['content'] for message in get_workspace_messages(workspace['id'], after_id=last_seen_id)] == ["late"]
+
+
+def test_after_id_is_capped_at_limit_oldest_first(workspace):
+    _post(workspace, 10)
+    first_id = get_workspace_messages(workspace['id'])[0]['id']
+    newer = get_workspace_messages(workspace['id'], limit=4, after_id=first_id)
+    assert [message['content'] for message in newer] == [f"message {number}" for number in range(1, 5)]
+    from_start = get_workspace_messages(workspace['id'], limit=3, after_id=0)
+    assert [message['content'] for message in from_start] == [f"message {number}" for number in range(3)]
+
+
+def test_before_id_pages_back_to_the_beginning(workspace):
+    _post(workspace, 11)
+    window = get_workspace_messages(workspace['id'], limit=4)
+    history = list(window)
+    while window:
+        window = get_workspace_messages(workspace['id'], limit=4, before_id=history[0]['id'])
+        history = window + history
+    assert [message['content'] for message in history] == [f"message {number}" for number in range(11)]
+
+
+def test_messages_stay_in_their_workspace(workspace):
+    _post(workspace, 2)
+    assert get_workspace_messages(workspace['id'] + 1) == []
+    assert clear_workspace_chat(workspace['id']) == 2
+    assert get_workspace_messages(workspace['id']) == []
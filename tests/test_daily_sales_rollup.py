@@ -0,0 +1,70 @@
+import json
+
+import sqlalchemy
+from sqlalchemy import func
+
+from retailpro import db
+from retailpro.models import DailySalesRollup, Sale, SaleItem
+from retailpro.sales import apply_daily_sales_rollup, bulk_import_sales, rebuild_daily_sales_rollup, record_new_sale
+from tests.conftest import add_item, cart_line
+
+
+def _rollup_rows(connection, workspace_id):
+    return sorted(connection.execute(
+        sqlalchemy.select(DailySalesRollup.inventory_item_id, DailySalesRollup.sale_date,
+                          DailySalesRollup.units_sold, func.round(DailySalesRollup.revenue, 6))
+        .where(DailySalesRollup.workspace_id == workspace_id)
+    ).all())
+
+
+def _raw_sales_totals(connection, workspace_id):
+    sale_date = func.substr(Sale.sale_datetime, 1, 10)
+    return sorted(connection.execute(
+        sqlalchemy.select(SaleItem.inventory_item_id, sale_date, func.sum(SaleItem.quantity_sold),
+                          func.round(func.sum(SaleItem.subtotal), 6))
+        .join(Sale, SaleItem.sale_id == Sale.id).where(Sale.workspace_id == workspace_id)
+        .group_by(SaleItem.inventory_item_id, sale_date)
+    ).all())
+
+
+def test_rollup_upsert_adds_onto_existing_rows(workspace):
+    scarf = add_item(workspace, "Scarf")
+    boots = add_item(workspace, "Boots")
+    session = db.create_database_connection()
+    try:
+        apply_daily_sales_rollup(session, workspace['id'], "2024-03-01", [(scarf['id'], 2, 20.0), (scarf['id'], 1, 10.0)])
+        apply_daily_sales_rollup(session, workspace['id'], "2024-03-01", [(scarf['id'], 3, 30.0), (boots['id'], 1, 80.0)])
+        apply_daily_sales_rollup(session, workspace['id'], "2024-03-02", [(scarf['id'], 1, 10.0)])
+        apply_daily_sales_rollup(session, workspace['id'], "2024-03-02", [])
+        session.commit()
+    finally:
+        session.close()
+    with db.engine.connect() as connection:
+        assert _rollup_rows(connection, workspace['id']) == sorted([
+            (scarf['id'], "2024-03-01", 6, 60.0), (boots['id'], "2024-03-01", 1, 80.0), (scarf['id'], "2024-03-02", 1, 10.0),
+        ])
+
+
+def test_rollup_matches_raw_sales_after_sales_and_bulk_import(workspace, tmp_path):
+    scarf = add_item(workspace, "Scarf", price=12.5, stock=100)
+    boots = add_item(workspace, "Boots", price=80.0, stock=100)
+    record_new_sale(workspace['id'], workspace['owner_id'], [cart_line(scarf, 2), cart_line(boots, 1)], 105.0)
+    record_new_sale(workspace['id'], workspace['owner_id'], [cart_line(scarf, 1)], 12.5)
+
+    source_path = tmp_path / "history.jsonl"
+    source_path.write_text("\n".join(json.dumps(sale) for sale in [
+        {"sale_datetime": "2024-03-01T10:15:00", "items": [
+            {"inventory_item_id": scarf['id'], "quantity": 4, "price_per_unit": 12.5},
+            {"inventory_item_id": scarf['id'], "quantity": 1, "price_per_unit": 12.5, "discount_percentage": 10},
+        ]},
+        {"sale_datetime": "2024-03-01T18:00:00", "items": [{"inventory_item_id": boots['id'], "quantity": 2, "price_per_unit": 75.0}]},
+        {"sale_datetime": "2024-03-02T09:00:00", "items": [{"inventory_item_id": boots['id'], "quantity": 1, "price_per_unit": 80.0}]},
+    ]), encoding="utf-8")
+    stats = bulk_import_sales(str(source_path), workspace['id'], workspace['owner_id'], chunk_size=2, adjust_stock=False)
+    assert stats['sales_imported'] == 3
+
+    with db.engine.begin() as connection:
+        incremental_rollup = _rollup_rows(connection, workspace['id'])
+        assert incremental_rollup == _raw_sales_totals(connection, workspace['id'])
+        rebuild_daily_sales_rollup(connection, workspace_id=workspace['id'])
+        assert _rollup_rows(connection, workspace['id']) == incremental_rollup
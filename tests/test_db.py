@@ -0,0 +1,30 @@
+import pytest
+import sqlalchemy
+
+from retailpro.db import create_database_engine
+
+
+def test_file_databases_use_the_profile_pool_settings(tmp_path):
+    engine = create_database_engine(f"sqlite:///{tmp_path / 'pooled.db'}", "tuned", {"pool_size": 3})
+    try:
+        assert isinstance(engine.pool, sqlalchemy.pool.QueuePool)
+        assert engine.pool.size() == 3
+        with engine.connect() as connection:
+            assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+    finally:
+        engine.dispose()
+
+
+@pytest.mark.parametrize("profile_name", ["legacy", "tuned"])
+def test_in_memory_databases_can_be_created(profile_name):
+    engine = create_database_engine("sqlite://", profile_name)
+    try:
+        with engine.connect() as connection:
+            assert connection.exec_driver_sql("SELECT 1").scalar() == 1
+    finally:
+        engine.dispose()
+
+
+def test_unknown_profiles_are_rejected():
+    with pytest.raises(ValueError):
+        create_database_engine("sqlite://", "turbo")
@@ -0,0 +1,37 @@
+from retailpro.chat import post_workspace_message
+from retailpro.events import workspace_change_cursor
+from retailpro.inventory import deactivate_product
+from retailpro.sales import record_new_sale
+from tests.conftest import add_item, cart_line
+
+
+def test_cursor_stays_put_while_nothing_changes(workspace):
+    add_item(workspace, "Lamp")
+    topics = ("members", "chat", "sales", "inventory")
+    assert workspace_change_cursor(workspace['id'], topics) == workspace_change_cursor(workspace['id'], topics)
+    assert workspace_change_cursor(workspace['id'], ()) == ()
+
+
+def test_cursor_moves_with_the_topics_it_covers(workspace):
+    lamp = add_item(workspace, "Lamp")
+    chat_cursor = workspace_change_cursor(workspace['id'], ("chat",))
+    inventory_cursor = workspace_change_cursor(workspace['id'], ("inventory",))
+
+    post_workspace_message(workspace['id'], workspace['owner_id'], "hello")
+    assert workspace_change_cursor(workspace['id'], ("chat",)) != chat_cursor
+    assert workspace_change_cursor(workspace['id'], ("inventory",)) == inventory_cursor
+
+    record_new_sale(workspace['id'], workspace['owner_id'], [cart_line(lamp, 1)], lamp['retail_price'])
+    after_sale = workspace_change_cursor(workspace['id'], ("inventory",))
+    assert after_sale != inventory_cursor
+
+    deactivate_product(lamp['id'], workspace['id'], workspace['owner_id'])
+    assert workspace_change_cursor(workspace['id'], ("inventory",)) != after_sale
+
+
+def test_cursor_ignores_other_workspaces(workspace):
+    sales_cursor = workspace_change_cursor(workspace['id'] + 1, ("sales", "chat"))
+    lamp = add_item(workspace, "Lamp")
+    record_new_sale(workspace['id'], workspace['owner_id'], [cart_line(lamp, 1)], lamp['retail_price'])
+    post_workspace_message(workspace['id'], workspace['owner_id'], "hello")
+    assert workspace_change_cursor(workspace['id'] + 1, ("sales", "chat")) == sales_cursor
@@ -0,0 +1,60 @@
+import importlib.util
+import os
+
+import numpy as np
+import pytest
+
+from retailpro.forecasting import (FORECAST_MIN_PROPHET_DAYS, FORECAST_MIN_SMOOTHING_DAYS, FORECAST_SMOOTHING_ALPHA,
+                                   NUMPY_FORECAST_METHODS, choose_forecast_tier, forecast_croston,
+                                   forecast_exponential_smoothing, forecast_moving_average, summarize_daily_forecast)
+
+BENCHMARK_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "bench_forecast_tiers.py")
+
+
+@pytest.mark.parametrize("values, tier", [
+    (np.ones(FORECAST_MIN_SMOOTHING_DAYS - 1), "moving_average"),
+    (np.r_[np.zeros(30), 5.0], "moving_average"),
+    (np.tile([0.0, 0.0, 3.0], 20), "croston"),
+    (np.ones(FORECAST_MIN_PROPHET_DAYS - 1), "exponential_smoothing"),
+    (np.ones(FORECAST_MIN_PROPHET_DAYS), "prophet"),
+])
+def test_tier_follows_history_length_and_sparsity(values, tier):
+    assert choose_forecast_tier(values) == tier
+
+
+def test_moving_average_uses_the_last_week():
+    values = np.r_[np.full(10, 100.0), np.arange(1.0, 8.0)]
+    assert np.array_equal(forecast_moving_average(values, 5), np.full(5, 4.0))
+
+
+def test_exponential_smoothing_matches_the_recursive_definition():
+    values = np.random.default_rng(3).poisson(4, 60).astype(float)
+    level = values[0]
+    for value in values[1:]:
+        level = FORECAST_SMOOTHING_ALPHA * value + (1 - FORECAST_SMOOTHING_ALPHA) * level
+    assert np.allclose(forecast_exponential_smoothing(values, 3), level)
+
+
+def test_croston_forecasts_size_over_interval():
+    assert np.allclose(forecast_croston(np.tile([0.0, 0.0, 3.0], 20), 4), 1.0)
+    assert np.array_equal(forecast_croston(np.zeros(20), 4), np.zeros(4))
+
+
+def test_summary_ignores_negative_days():
+    assert summarize_daily_forecast(np.r_[-2.0, np.full(29, 1.0)]) == {'next_day': 0, 'next_week': 6, 'next_30_days': 29}
+
+
+def test_backtest_scores_every_numpy_tier():
+    spec = importlib.util.spec_from_file_location("bench_forecast_tiers", BENCHMARK_PATH)
+    benchmark = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(benchmark)
+    histories = {item_id: history for item_id, history in benchmark.synthetic_histories(12).items() if len(history) < FORECAST_MIN_PROPHET_DAYS}
+    tiers = list(NUMPY_FORECAST_METHODS) + ["auto"]
+
+    results, auto_choices = benchmark.backtest(histories, 7, tiers)
+    scored_items = sum(len(history) > 8 for history in histories.values())
+    assert scored_items
+    for tier in tiers:
+        assert results[tier]['items'] == scored_items and results[tier]['failed'] == 0
+        assert results[tier]['abs_error'] >= 0 and results[tier]['actual_total'] > 0
+    assert sum(auto_choices.values()) == scored_items and "prophet" not in auto_choices
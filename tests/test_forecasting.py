@@ -0,0 +1,68 @@
+import pytest
+
+from retailpro.errors import NotFoundError
+from retailpro.forecasting import get_item_sales_forecast, get_workspace_forecasts, run_batch_forecasts
+from retailpro.sales import record_new_sale
+from tests.conftest import add_item, cart_line
+
+
+def _sell(workspace, item, quantity):
+    record_new_sale(workspace['id'], workspace['owner_id'], [cart_line(item, quantity)], quantity * item['retail_price'])
+
+
+def test_stored_forecast_is_reused_until_a_new_sale_arrives(workspace):
+    kettle = add_item(workspace, "Kettle")
+    _sell(workspace, kettle, 2)
+
+    first = get_item_sales_forecast(kettle['id'], workspace['id'])
+    second = get_item_sales_forecast(kettle['id'], workspace['id'])
+    assert first['from_store'] is False and second['from_store'] is True
+    assert {key: second[key] for key in first if key != 'from_store'} == {key: first[key] for key in first if key != 'from_store'}
+
+    _sell(workspace, kettle, 5)
+    refit = get_item_sales_forecast(kettle['id'], workspace['id'])
+    assert refit['from_store'] is False
+    assert refit['next_day'] == 7
+
+
+def test_items_without_sales_have_no_forecast(workspace):
+    unsold = add_item(workspace, "Unsold")
+    with pytest.raises(NotFoundError):
+        get_item_sales_forecast(unsold['id'], workspace['id'])
+
+
+def test_batch_forecasts_every_item_with_sales_and_skips_up_to_date_ones(workspace):
+    kettle = add_item(workspace, "Kettle")
+    toaster = add_item(workspace, "Toaster")
+    add_item(workspace, "Unsold")
+    _sell(workspace, kettle, 3)
+    _sell(workspace, toaster, 1)
+    progress = []
+
+    stats = run_batch_forecasts(workspace['id'], max_workers=1,
+                                progress_callback=lambda item_id, tier, fit_seconds, error: progress.append((item_id, error)))
+    assert (stats['items'], stats['fitted'], stats['up_to_date'], stats['insufficient_history'], stats['failed']) == (3, 2, 0, 1, 0)
+    assert stats['tiers'] == {"moving_average": 2}
+    assert set(stats['fit_seconds']) == {kettle['id'], toaster['id']}
+    assert sorted(progress) == sorted([(kettle['id'], None), (toaster['id'], None)])
+    assert [(forecast['name'], forecast['next_day']) for forecast in get_workspace_forecasts(workspace['id'])] == [
+        ("Kettle", 3), ("Toaster", 1)
+    ]
+
+    rerun = run_batch_forecasts(workspace['id'], max_workers=1)
+    assert (rerun['fitted'], rerun['up_to_date']) == (0, 2)
+    assert run_batch_forecasts(workspace['id'], max_workers=1, force=True)['fitted'] == 2
+
+
+def test_batch_refits_items_with_new_sales_only(workspace):
+    kettle = add_item(workspace, "Kettle")
+    toaster = add_item(workspace, "Toaster")
+    _sell(workspace, kettle, 3)
+    _sell(workspace, toaster, 1)
+    run_batch_forecasts(workspace['id'], max_workers=1)
+
+    _sell(workspace, toaster, 4)
+    stats = run_batch_forecasts(workspace['id'], max_workers=1)
+    assert (stats['fitted'], stats['up_to_date']) == (1, 1)
+    assert set(stats['fit_seconds']) == {toaster['id']}
+    assert get_item_sales_forecast(toaster['id'], workspace['id'])['from_store'] is True
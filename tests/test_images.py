@@ -0,0 +1,71 @@
+import io
+import os
+import time
+
+import pytest
+from PIL import Image
+
+from retailpro import db
+from retailpro.images import (INVENTORY_IMAGE_RENDITIONS, collect_orphaned_inventory_images, get_inventory_thumbnail_path,
+                              inventory_image_rendition_path, store_inventory_image)
+from retailpro.inventory import add_product
+
+
+def _png_bytes(size=(1600, 900), color=(200, 30, 30)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_store_writes_downscaled_webp_renditions_named_by_content(tmp_path):
+    display_path = store_inventory_image(_png_bytes(), str(tmp_path))
+    assert os.path.dirname(display_path) == str(tmp_path)
+    assert len(os.path.basename(display_path)) == 64 + len(".webp")
+    for rendition, spec in INVENTORY_IMAGE_RENDITIONS.items():
+        with Image.open(inventory_image_rendition_path(display_path, rendition)) as image:
+            assert image.format == "WEBP"
+            assert image.width <= spec['max_size'][0] and image.height <= spec['max_size'][1]
+            assert abs(image.width / image.height - 16 / 9) < 0.02
+
+
+def test_duplicate_uploads_share_one_copy(tmp_path):
+    first_path = store_inventory_image(_png_bytes(), str(tmp_path))
+    modified_at = os.path.getmtime(first_path)
+    assert store_inventory_image(_png_bytes(), str(tmp_path)) == first_path
+    assert os.path.getmtime(first_path) == modified_at
+    assert store_inventory_image(_png_bytes(color=(0, 0, 255)), str(tmp_path)) != first_path
+    assert len(os.listdir(tmp_path)) == 2 * len(INVENTORY_IMAGE_RENDITIONS)
+
+
+def test_transparency_is_kept(tmp_path):
+    buffer = io.BytesIO()
+    Image.new("RGBA", (50, 50), (0, 0, 0, 0)).save(buffer, format="PNG")
+    display_path = store_inventory_image(buffer.getvalue(), str(tmp_path))
+    with Image.open(display_path) as image:
+        assert image.mode == "RGBA"
+
+
+def test_thumbnail_path_is_the_stored_thumbnail(tmp_path):
+    display_path = store_inventory_image(_png_bytes(), str(tmp_path))
+    assert get_inventory_thumbnail_path(display_path) == inventory_image_rendition_path(display_path, "thumb")
+
+
+@pytest.mark.parametrize("absolute_directory", [False, True])
+def test_gc_keeps_referenced_images_whether_directory_is_relative_or_absolute(workspace, tmp_path, monkeypatch, absolute_directory):
+    app_directory = tmp_path / "app"
+    app_directory.mkdir()
+    monkeypatch.chdir(app_directory)
+    kept_path = store_inventory_image(_png_bytes(), "inventory_images")
+    orphan_path = store_inventory_image(_png_bytes(color=(0, 0, 255)), "inventory_images")
+    add_product(workspace['id'], "Pictured", 5.0, 1, image_path=kept_path, added_by_user_id=workspace['owner_id'])
+    two_hours_ago = time.time() - 2 * 3600
+    for entry in os.scandir("inventory_images"):
+        os.utime(entry.path, (two_hours_ago, two_hours_ago))
+
+    directory = str(app_directory / "inventory_images") if absolute_directory else "inventory_images"
+    with db.engine.connect() as connection:
+        stats = collect_orphaned_inventory_images(connection, directory)
+
+    assert stats['deleted'] == len(INVENTORY_IMAGE_RENDITIONS)
+    assert os.path.isfile(kept_path) and os.path.isfile(inventory_image_rendition_path(kept_path, "thumb"))
+    assert not os.path.exists(orphan_path)
@@ -0,0 +1,101 @@
+import pytest
+import sqlalchemy
+
+from retailpro import db
+from retailpro.db import create_database_connection
+from retailpro.inventory import (add_product, count_products, deactivate_product, get_products, search_products,
+                                 update_product)
+from retailpro.models import Inventory
+from retailpro.search import INVENTORY_SEARCH_MIN_TERM_LENGTH, inventory_search_available
+from tests.conftest import add_item
+
+
+def _add_items(workspace, names, stock=10):
+    for name in names:
+        add_product(workspace['id'], name, 25.0, stock, added_by_user_id=workspace['owner_id'])
+
+
+def _item_id(workspace, name):
+    return next(item['id'] for item in get_products(workspace['id']) if item['name'] == name)
+
+
+def test_stock_changed_by_another_process_is_seen_immediately(workspace):
+    item = add_item(workspace, "Wool Hat", stock=5)
+    assert get_products(workspace['id'])[0]['stock_level'] == 5
+    assert search_products(workspace['id'], "Wool")[0]['stock_level'] == 5
+    assert count_products(workspace['id'], stock_filter="Out of Stock") == 0
+    # A write that bypasses this process's cache invalidation, e.g. a sale on another app node.
+    with db.engine.begin() as connection:
+        connection.execute(sqlalchemy.update(Inventory).where(Inventory.id == item['id']).values(stock_level=0))
+    assert get_products(workspace['id'])[0]['stock_level'] == 0
+    assert search_products(workspace['id'], "Wool")[0]['stock_level'] == 0
+    assert count_products(workspace['id'], stock_filter="Out of Stock") == 1
+
+
+def test_keyset_pages_cover_every_item_once_in_name_order(workspace):
+    _add_items(workspace, [f"Item {number:02d}" for number in range(23)] + ["apple", "Zebra"])
+    # Deactivating frees the name, so two rows share it and only the id breaks the tie.
+    deactivate_product(_item_id(workspace, "Item 05"), workspace['id'], workspace['owner_id'])
+    _add_items(workspace, ["Item 05"])
+
+    expected = get_products(workspace['id'], include_inactive=True)
+    assert [(item['name'], item['id']) for item in expected] == sorted((item['name'], item['id']) for item in expected)
+
+    pages, after_key = [], None
+    while True:
+        page = get_products(workspace['id'], include_inactive=True, page_size=7, after_key=after_key)
+        if not page:
+            break
+        assert len(page) <= 7
+        pages.append(page)
+        after_key = (page[-1]['name'], page[-1]['id'])
+    paged = [item['id'] for page in pages for item in page]
+    assert paged == [item['id'] for item in expected]
+    assert len(paged) == count_products(workspace['id'], include_inactive=True) == 26
+
+
+def test_keyset_pages_apply_filters(workspace):
+    _add_items(workspace, ["Red Hat", "Red Scarf", "Blue Hat"])
+    _add_items(workspace, ["Red Boots"], stock=0)
+    first_page = get_products(workspace['id'], search_term="Red", stock_filter="In Stock", page_size=1)
+    second_page = get_products(workspace['id'], search_term="Red", stock_filter="In Stock", page_size=1,
+                               after_key=(first_page[-1]['name'], first_page[-1]['id']))
+    assert [item['name'] for item in first_page + second_page] == ["Red Hat", "Red Scarf"]
+    assert count_products(workspace['id'], search_term="Red", stock_filter="In Stock") == 2
+
+
+def test_migrated_database_has_the_fts5_index(database):
+    session = create_database_connection()
+    try:
+        assert inventory_search_available(session)
+    finally:
+        session.close()
+
+
+@pytest.mark.parametrize("term", ['"quoted"', 'Tee "', 'NEAR(', 'a*b', 'OR', '-x-', "o'clock", 'col:umn'])
+def test_search_terms_with_fts5_syntax_match_literally(workspace, term):
+    literal_name = f"Shirt {term} edition"
+    _add_items(workspace, [literal_name, "Plain Shirt"])
+    assert [item['name'] for item in get_products(workspace['id'], search_term=term)] == [literal_name]
+    assert literal_name in [item['name'] for item in search_products(workspace['id'], term)]
+
+
+def test_search_follows_renamed_items(workspace):
+    _add_items(workspace, ["Wool Socks"])
+    update_product(_item_id(workspace, "Wool Socks"), workspace['id'], "Cotton Socks", 25.0, 10)
+    assert get_products(workspace['id'], search_term="Wool") == []
+    assert [item['name'] for item in get_products(workspace['id'], search_term="Cotton")] == ["Cotton Socks"]
+
+
+def test_search_products_ranks_prefix_matches_first_and_tolerates_typos(workspace):
+    _add_items(workspace, ["Leather Jacket", "Jacket Hanger", "Denim Jacket", "Umbrella"])
+    names = [item['name'] for item in search_products(workspace['id'], "jacket")]
+    assert names[0] == "Jacket Hanger"
+    assert set(names) == {"Leather Jacket", "Jacket Hanger", "Denim Jacket"}
+    assert "Umbrella" in [item['name'] for item in search_products(workspace['id'], "umbrela")]
+
+
+def test_short_terms_fall_back_to_substring_search(workspace):
+    _add_items(workspace, ["Tie", "Tights", "Hat"])
+    short_term = "Ti"[:INVENTORY_SEARCH_MIN_TERM_LENGTH - 1]
+    assert [item['name'] for item in search_products(workspace['id'], short_term)] == ["Tie", "Tights"]
@@ -0,0 +1,108 @@
+import datetime
+import gzip
+
+import pytest
+import sqlalchemy
+
+from retailpro import db
+from retailpro.errors import PermissionDeniedError, ValidationError
+from retailpro.migrations import migrate_create_workspace_message_timestamp_index
+from retailpro.models import WorkspaceMessage
+from retailpro.retention import (CHAT_RETENTION_DEFAULT_MAX_AGE_DAYS, archive_workspace_chat, chat_archive_path,
+                                 get_chat_retention_policy, read_chat_archive, set_chat_retention_policy)
+from tests.conftest import create_user
+
+NOW = datetime.datetime(2025, 6, 15, 12, 0, 0)
+
+
+def _insert_messages(workspace, ages_in_days):
+    with db.engine.begin() as connection:
+        connection.execute(WorkspaceMessage.__table__.insert(), [
+            {'workspace_id': workspace['id'], 'user_id': workspace['owner_id'], 'content': f"{age} days old",
+             'timestamp': (NOW - datetime.timedelta(days=age)).isoformat()}
+            for age in ages_in_days
+        ])
+
+
+def _remaining_contents(workspace):
+    with db.engine.connect() as connection:
+        return connection.execute(
+            sqlalchemy.select(WorkspaceMessage.content)
+            .where(WorkspaceMessage.workspace_id == workspace['id']).order_by(WorkspaceMessage.id)
+        ).scalars().all()
+
+
+@pytest.fixture
+def archive_directory(tmp_path):
+    return tmp_path / "chat_archive"
+
+
+def test_default_policy_applies_until_the_owner_sets_one(workspace):
+    assert get_chat_retention_policy(workspace['id'])['max_age_days'] == CHAT_RETENTION_DEFAULT_MAX_AGE_DAYS
+    set_chat_retention_policy(workspace['id'], workspace['owner_id'], 30, 0)
+    assert get_chat_retention_policy(workspace['id']) == {'max_age_days': 30, 'max_messages': None, 'is_default': False}
+
+
+def test_only_the_owner_can_set_a_valid_policy(workspace):
+    member_id = create_user("Member")
+    with pytest.raises(PermissionDeniedError):
+        set_chat_retention_policy(workspace['id'], member_id, 30, 100)
+    with pytest.raises(ValidationError):
+        set_chat_retention_policy(workspace['id'], workspace['owner_id'], -1, 100)
+
+
+def test_age_limit_archives_old_messages_by_month(workspace, archive_directory):
+    _insert_messages(workspace, [200, 190, 120, 40, 10, 0])
+    set_chat_retention_policy(workspace['id'], workspace['owner_id'], 100, 0)
+
+    assert archive_workspace_chat(workspace['id'], archive_directory, dry_run=True, now=NOW)['archived'] == 3
+    assert len(_remaining_contents(workspace)) == 6
+
+    stats = archive_workspace_chat(workspace['id'], archive_directory, batch_size=2, now=NOW)
+    assert (stats['archived'], stats['batches']) == (3, 2)
+    assert _remaining_contents(workspace) == ["40 days old", "10 days old", "0 days old"]
+    assert sorted(path.name for path in (archive_directory / str(workspace['id'])).iterdir()) == [
+        "2024-11.jsonl.gz", "2024-12.jsonl.gz", "2025-02.jsonl.gz"]
+    archived = [message for month in ("2024-11", "2024-12", "2025-02")
+                for message in read_chat_archive(workspace['id'], month, archive_directory)]
+    assert [message['content'] for message in archived] == ["200 days old", "190 days old", "120 days old"]
+    assert all(message['user_name'] == "Owner" for message in archived)
+
+
+def test_count_limit_keeps_the_newest_messages(workspace, archive_directory):
+    _insert_messages(workspace, [5, 4, 3, 2, 1])
+    set_chat_retention_policy(workspace['id'], workspace['owner_id'], 0, 2)
+    assert archive_workspace_chat(workspace['id'], archive_directory, now=NOW)['archived'] == 3
+    assert _remaining_contents(workspace) == ["2 days old", "1 days old"]
+    assert archive_workspace_chat(workspace['id'], archive_directory, now=NOW)['archived'] == 0
+
+
+def test_archive_reader_drops_batches_written_twice(workspace, archive_directory):
+    _insert_messages(workspace, [3, 2, 1])
+    set_chat_retention_policy(workspace['id'], workspace['owner_id'], 0, 1)
+    archive_workspace_chat(workspace['id'], archive_directory, now=NOW)
+    archive_path = chat_archive_path(archive_directory, workspace['id'], "2025-06")
+    with gzip.open(archive_path, "rt", encoding="utf-8") as archive_file:
+        archived_lines = archive_file.read()
+    # A run interrupted between writing a batch and deleting it appends the same rows again.
+    with open(archive_path, "ab") as archive_file:
+        archive_file.write(gzip.compress(archived_lines.encode("utf-8")))
+    assert len(archived_lines.splitlines()) == 2
+    assert [message['content'] for message in read_chat_archive(workspace['id'], "2025-06", archive_directory)] == ["3 days old", "2 days old"]
+
+
+def test_no_limits_archives_nothing(workspace, archive_directory):
+    _insert_messages(workspace, [900, 1])
+    set_chat_retention_policy(workspace['id'], workspace['owner_id'], 0, 0)
+    assert archive_workspace_chat(workspace['id'], archive_directory, now=NOW)['archived'] == 0
+    assert not archive_directory.exists()
+
+
+def test_timestamp_index_migration_adds_only_its_own_index(database):
+    with db.engine.begin() as connection:
+        for index_name in ("idx_workspace_messages_workspace_id_id", "idx_workspace_messages_workspace_id_timestamp"):
+            connection.exec_driver_sql(f"DROP INDEX {index_name}")
+        migrate_create_workspace_message_timestamp_index(connection)
+    index_names = {index['name'] for index in sqlalchemy.inspect(db.engine).get_indexes("workspace_messages")}
+    assert "idx_workspace_messages_workspace_id_timestamp" in index_names
+    assert "idx_workspace_messages_workspace_id_id" not in index_names
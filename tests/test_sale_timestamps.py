@@ -0,0 +1,47 @@
+import datetime
+
+import sqlalchemy
+
+from retailpro import db
+from retailpro.db import format_sale_timestamp
+from retailpro.migrations import migrate_normalize_sale_timestamps
+from retailpro.models import Sale
+
+
+def test_sale_timestamps_are_fixed_width_and_sort_chronologically():
+    moments = [
+        datetime.datetime(2024, 3, 1, 9, 5),
+        datetime.datetime(2024, 3, 1, 9, 5, 0, 123),
+        datetime.datetime(2024, 11, 30, 23, 59, 59, 999999),
+    ]
+    formatted = [format_sale_timestamp(moment) for moment in moments]
+    assert formatted[0] == "2024-03-01T09:05:00.000000"
+    assert len(set(map(len, formatted))) == 1
+    assert sorted(formatted) == formatted
+
+
+def test_aware_timestamps_are_stored_as_local_time():
+    aware = datetime.datetime(2024, 3, 1, 12, 0, tzinfo=datetime.timezone.utc)
+    assert format_sale_timestamp(aware) == format_sale_timestamp(aware.astimezone().replace(tzinfo=None))
+
+
+def test_migration_normalizes_legacy_timestamps(workspace):
+    legacy_values = ["2024-03-01T09:05:00", "2024-03-01 10:00:00.5", "not a date"]
+    with db.engine.begin() as connection:
+        connection.execute(Sale.__table__.insert(), [
+            {'workspace_id': workspace['id'], 'recorded_by_user_id': workspace['owner_id'],
+             'sale_datetime': value, 'total_amount': 1.0} for value in legacy_values
+        ])
+        migrate_normalize_sale_timestamps(connection)
+        stored = connection.execute(sqlalchemy.select(Sale.sale_datetime).order_by(Sale.id)).scalars().all()
+    assert stored == ["2024-03-01T09:05:00.000000", "2024-03-01T10:00:00.500000", "not a date"]
+
+
+def test_workspace_date_range_filter_uses_the_composite_index(database):
+    query = sqlalchemy.select(Sale.id).where(
+        Sale.workspace_id == 1, Sale.sale_datetime >= "2024-03-01", Sale.sale_datetime < "2024-04-01"
+    )
+    with db.engine.connect() as connection:
+        sql = str(query.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+        plan = " ".join(row[-1] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + sql))
+    assert "idx_sales_workspace_datetime" in plan
@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+import sqlalchemy
+from sqlalchemy import func
+
+from retailpro import db
+from retailpro.errors import InsufficientStockError, RetailProError
+from retailpro.models import Inventory, Sale, SaleItem
+from retailpro.sales import record_new_sale
+from tests.conftest import add_item, cart_line
+
+
+def _stock_level(item_id):
+    with db.engine.connect() as connection:
+        return connection.execute(sqlalchemy.select(Inventory.stock_level).where(Inventory.id == item_id)).scalar()
+
+
+def test_record_new_sale_decrements_stock(workspace):
+    item = add_item(workspace, "Scarf", stock=5)
+    record_new_sale(workspace['id'], workspace['owner_id'], [cart_line(item, 3)], 30.0)
+    assert _stock_level(item['id']) == 2
+
+
+def test_record_new_sale_rejects_shortfall_without_writing(workspace):
+    item = add_item(workspace, "Scarf", stock=2)
+    with pytest.raises(InsufficientStockError):
+        record_new_sale(workspace['id'], workspace['owner_id'], [cart_line(item, 3)], 30.0)
+    assert _stock_level(item['id']) == 2
+    with db.engine.connect() as connection:
+        assert connection.execute(sqlalchemy.select(func.count(Sale.id))).scalar() == 0
+
+
+def test_concurrent_sales_of_the_last_unit_cannot_oversell(workspace):
+    item = add_item(workspace, "Last Jacket", stock=1)
+    attempts = 6
+    start = threading.Barrier(attempts)
+    outcomes = []
+
+    def sell():
+        start.wait()
+        try:
+            record_new_sale(workspace['id'], workspace['owner_id'], [cart_line(item, 1)], item['retail_price'])
+            outcomes.append("sold")
+        except RetailProError as error:
+            outcomes.append(error)
+
+    threads = [threading.Thread(target=sell) for _ in range(attempts)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert outcomes.count("sold") == 1
+    assert len(outcomes) == attempts
+    assert _stock_level(item['id']) == 0
+    with db.engine.connect() as connection:
+        assert connection.execute(sqlalchemy.select(func.sum(SaleItem.quantity_sold))).scalar() == 1
@@ -0,0 +1,57 @@
+import datetime
+
+import pytest
+
+from retailpro import db
+from retailpro.analytics import bucket_sales_totals, floor_to_sales_bucket
+from retailpro.db import format_sale_timestamp
+from retailpro.errors import ValidationError
+from retailpro.models import Sale
+
+
+def _insert_sales(workspace, amounts_by_time):
+    with db.engine.begin() as connection:
+        connection.execute(Sale.__table__.insert(), [
+            {'workspace_id': workspace['id'], 'recorded_by_user_id': workspace['owner_id'],
+             'sale_datetime': format_sale_timestamp(sale_time), 'total_amount': amount}
+            for sale_time, amount in amounts_by_time
+        ])
+
+
+@pytest.mark.parametrize("granularity, expected", [
+    ("Hour", datetime.datetime(2024, 3, 6, 14)),
+    ("Day", datetime.datetime(2024, 3, 6)),
+    ("Week", datetime.datetime(2024, 3, 4)),
+    ("Month", datetime.datetime(2024, 3, 1)),
+])
+def test_floor_to_sales_bucket(granularity, expected):
+    assert floor_to_sales_bucket(datetime.datetime(2024, 3, 6, 14, 35, 10), granularity) == expected
+
+
+def test_daily_buckets_sum_sales_inside_the_window_only(workspace):
+    _insert_sales(workspace, [
+        (datetime.datetime(2024, 2, 29, 23, 59), 1000.0),
+        (datetime.datetime(2024, 3, 1, 0, 0), 10.0),
+        (datetime.datetime(2024, 3, 1, 18, 30), 5.5),
+        (datetime.datetime(2024, 3, 3, 12, 0), 7.0),
+        (datetime.datetime(2024, 3, 4, 0, 0), 2000.0),
+    ])
+    totals = bucket_sales_totals(workspace['id'], datetime.datetime(2024, 3, 1), datetime.datetime(2024, 3, 4), "Day")
+    assert [timestamp.day for timestamp in totals.index] == [1, 2, 3]
+    assert totals['Sales'].tolist() == [15.5, 0.0, 7.0]
+
+
+def test_weekly_buckets_start_on_monday(workspace):
+    _insert_sales(workspace, [(datetime.datetime(2024, 3, 6), 4.0), (datetime.datetime(2024, 3, 12), 6.0)])
+    totals = bucket_sales_totals(workspace['id'], datetime.datetime(2024, 3, 6), datetime.datetime(2024, 3, 18), "Week")
+    assert [timestamp.date() for timestamp in totals.index] == [datetime.date(2024, 3, 4), datetime.date(2024, 3, 11)]
+    assert totals['Sales'].tolist() == [4.0, 6.0]
+
+
+def test_invalid_ranges_are_rejected(workspace):
+    with pytest.raises(ValidationError):
+        bucket_sales_totals(workspace['id'], datetime.datetime(2024, 3, 2), datetime.datetime(2024, 3, 1), "Day")
+    with pytest.raises(ValidationError):
+        bucket_sales_totals(workspace['id'], datetime.datetime(2000, 1, 1), datetime.datetime(2024, 1, 1), "Hour")
+    with pytest.raises(ValidationError):
+        bucket_sales_totals(workspace['id'], datetime.datetime(2024, 1, 1), datetime.datetime(2024, 2, 1), "Fortnight")
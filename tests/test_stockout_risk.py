@@ -0,0 +1,38 @@
+import warnings
+
+from retailpro.analytics import LOW_STOCK_THRESHOLD, STOCK_RISK_LEVELS, get_stockout_risk
+from retailpro.inventory import get_products
+from retailpro.sales import record_new_sale
+from tests.conftest import add_item, cart_line
+
+
+def test_items_without_stock_or_sales_score_without_warnings(workspace):
+    add_item(workspace, "Empty and unsold", stock=0)
+    add_item(workspace, "Unsold", stock=3)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        risk = {item['name']: item for item in get_stockout_risk(workspace['id'])}
+    assert risk["Empty and unsold"]['risk_level'] == "Out of Stock"
+    assert risk["Empty and unsold"]['days_until_stockout'] == 0
+    assert risk["Unsold"]['risk_level'] == "Healthy"
+    assert risk["Unsold"]['days_until_stockout'] is None
+    assert risk["Unsold"]['suggested_reorder_units'] == 0
+
+
+def test_fast_sellers_rank_ahead_of_slow_ones(workspace):
+    fast = add_item(workspace, "Fast", stock=60)
+    slow = add_item(workspace, "Slow", stock=60)
+    record_new_sale(workspace['id'], workspace['owner_id'], [cart_line(fast, 56), cart_line(slow, 1)], 57 * 10.0)
+
+    risk = get_stockout_risk(workspace['id'])
+    assert [item['name'] for item in risk] == ["Fast", "Slow"]
+    assert risk[0]['daily_velocity'] == 8.0 and risk[0]['days_until_stockout'] == 0.5
+    assert risk[0]['risk_level'] == "Reorder Now" and risk[0]['suggested_reorder_units'] > 0
+    assert risk[1]['risk_level'] == STOCK_RISK_LEVELS[-1]
+
+
+def test_low_stock_filter_uses_the_shared_threshold(workspace):
+    add_item(workspace, "At threshold", stock=LOW_STOCK_THRESHOLD)
+    add_item(workspace, "Above threshold", stock=LOW_STOCK_THRESHOLD + 1)
+    add_item(workspace, "Sold out", stock=0)
+    assert [item['name'] for item in get_products(workspace['id'], stock_filter="Low Stock")] == ["At threshold"]
@@ -0,0 +1,94 @@
+import pytest
+
+from retailpro import db
+from retailpro.errors import NotFoundError, PermissionDeniedError
+from retailpro.inventory import add_product
+from retailpro.models import WorkspaceMember
+from retailpro.workspaces import (add_workspace_team_member, cancel_pending_invite, get_user_workspaces_from_db,
+                                  get_workspace_owner_user_id, is_user_a_member_of_workspace,
+                                  process_workspace_invitation_token, remove_workspace_member, rename_workspace,
+                                  require_workspace_member)
+from tests.conftest import create_user
+
+
+def _add_member(workspace, name):
+    member_id = create_user(name)
+    add_workspace_team_member(workspace['id'], member_id, workspace['owner_id'], status='accepted')
+    return member_id
+
+
+def _delete_membership_directly(workspace_id, user_id):
+    session = db.create_database_connection()
+    try:
+        session.query(WorkspaceMember).filter_by(workspace_id=workspace_id, user_id=user_id).delete()
+        session.commit()
+    finally:
+        session.close()
+
+
+def test_access_checks_see_memberships_deleted_outside_the_service_layer(workspace):
+    member_id = _add_member(workspace, "Member")
+    assert is_user_a_member_of_workspace(member_id, workspace['id'])
+    _delete_membership_directly(workspace['id'], member_id)
+    assert not is_user_a_member_of_workspace(member_id, workspace['id'])
+    with pytest.raises(PermissionDeniedError):
+        require_workspace_member(member_id, workspace['id'], "record sales in")
+
+
+def test_negative_lookups_are_not_cached(workspace):
+    outsider_id = create_user("Outsider")
+    assert not is_user_a_member_of_workspace(outsider_id, workspace['id'])
+    assert get_user_workspaces_from_db(outsider_id) == []
+    session = db.create_database_connection()
+    try:
+        session.add(WorkspaceMember(workspace_id=workspace['id'], user_id=outsider_id, role='member', status='accepted'))
+        session.commit()
+    finally:
+        session.close()
+    assert is_user_a_member_of_workspace(outsider_id, workspace['id'])
+    assert [entry['id'] for entry in get_user_workspaces_from_db(outsider_id)] == [workspace['id']]
+
+
+def test_removing_a_member_revokes_access_immediately(workspace):
+    member_id = _add_member(workspace, "Member")
+    add_product(workspace['id'], "Before removal", 5.0, 1, added_by_user_id=member_id)
+    assert [entry['id'] for entry in get_user_workspaces_from_db(member_id)] == [workspace['id']]
+    remove_workspace_member(workspace['id'], member_id, workspace['owner_id'])
+    assert not is_user_a_member_of_workspace(member_id, workspace['id'])
+    assert get_user_workspaces_from_db(member_id) == []
+    with pytest.raises(PermissionDeniedError):
+        add_product(workspace['id'], "After removal", 5.0, 1, added_by_user_id=member_id)
+
+
+def test_accepting_an_invitation_grants_access(workspace):
+    invitee_id = create_user("Invitee", "invitee@example.com")
+    add_workspace_team_member(workspace['id'], None, workspace['owner_id'], invite_email="invitee@example.com",
+                              invite_token="invite-token", status='pending')
+    assert not is_user_a_member_of_workspace(invitee_id, workspace['id'])
+    process_workspace_invitation_token("invite-token", invitee_id)
+    assert is_user_a_member_of_workspace(invitee_id, workspace['id'])
+    assert [entry['id'] for entry in get_user_workspaces_from_db(invitee_id)] == [workspace['id']]
+
+
+def test_renaming_refreshes_every_members_workspace_list(workspace):
+    member_id = _add_member(workspace, "Member")
+    assert get_user_workspaces_from_db(member_id)[0]['name'] == "Test Shop"
+    rename_workspace(workspace['id'], "Renamed Shop", workspace['owner_id'])
+    assert get_user_workspaces_from_db(member_id)[0]['name'] == "Renamed Shop"
+    assert get_user_workspaces_from_db(workspace['owner_id'])[0]['name'] == "Renamed Shop"
+
+
+def test_cancelled_invitation_cannot_be_accepted(workspace):
+    add_workspace_team_member(workspace['id'], None, workspace['owner_id'], invite_email="newcomer@example.com",
+                              invite_token="invite-token", status='pending')
+    cancel_pending_invite(workspace['id'], "invite-token", workspace['owner_id'])
+    newcomer_id = create_user("Newcomer", "newcomer@example.com")
+    with pytest.raises(NotFoundError):
+        process_workspace_invitation_token("invite-token", newcomer_id)
+    assert not is_user_a_member_of_workspace(newcomer_id, workspace['id'])
+    assert get_workspace_owner_user_id(workspace['id']) == workspace['owner_id']
+
+
+def test_cached_results_are_copies(workspace):
+    get_user_workspaces_from_db(workspace['owner_id'])[0]['name'] = "Changed by a caller"
+    assert get_user_workspaces_from_db(workspace['owner_id'])[0]['name'] == "Test Shop"